@@ -1 +1,105 @@
 __version__ = "0.2.5.dev0"
+
+# The pens and functions of the submodules are available from the package,
+# the submodule, and fontTools with it, is only imported on first use.
+_lazyNames = {
+    "angledMarginPen": (
+        "AngledMarginPen", "getAngledMargins", "setAngledLeftMargin", "setAngledRightMargin",
+        "centerAngledMargins", "guessItalicOffset",
+    ),
+    "asyncBatch": (
+        "processGlyphsAsync", "getMarginsAsync", "getAngledMarginsAsync", "getDigestsAsync",
+        "flattenGlyphsAsync", "sampleGlyphsAsync",
+    ),
+    "batch": ("runBatch",),
+    "contourIntersections": ("findIntersections", "hasIntersections", "findFontIntersections", "findUFOIntersections"),
+    "digestPointPen": ("DigestPointPen", "DigestPointStructurePen"),
+    "flattenPen": ("FlattenPen", "flattenGlyph", "SamplingPen", "samplingGlyph", "FlattenPointPen", "SamplingPointPen"),
+    "glifReader": ("GlifGlyph", "GlifGlyphSet", "drawGlif", "getLayerPath", "mapGlifGlyphs"),
+    "guessSmoothPointPen": ("GuessSmoothPointPen", "guessSmoothFlags"),
+    "marginPen": ("MarginPen",),
+    "outlineIndex": ("OutlineIndex", "indexGlyph"),
+    "penInstrumentation": ("Instrumentation", "PenStatistics", "instrumentPen"),
+    "penPipeline": ("buildPenPipeline",),
+    "penTools": (
+        "distance", "middlePoint", "getCubicPoint", "getQuadraticPoint", "getCubicPoints",
+        "estimateCubicCurveLength", "estimateQuadraticCurveLength", "interpolatePoint",
+    ),
+    "printPen": ("PrintPen", "dumpGlyphs"),
+    "printPointPen": ("PrintPointPen",),
+    "recordingFile": (
+        "CompactSegmentRecording", "packRecording", "unpackRecording", "packRecordings",
+        "RecordingFileWriter", "RecordingBufferReader", "RecordingFileReader",
+    ),
+    "recordingPointPen": ("RecordingPointPen", "CompactRecordingPointPen", "ReplayPlan", "replayRecording"),
+    "sharedRecordings": ("SharedRecordings", "mapSharedRecordings"),
+    "spikePen": (
+        "SpikePen", "spikeGlyph", "spikeGlyphs", "spikeContour",
+        "SpikePattern", "SinePattern", "RandomPattern", "NoisePattern",
+    ),
+    "thresholdPen": ("ThresholdPen", "thresholdGlyph"),
+    "thresholdPointPen": ("ThresholdPointPen",),
+    "transformPointPen": ("TransformPointPen", "transformCoordinates", "transformRecording"),
+    "windingIndex": ("WindingIndex", "buildWindingIndex"),
+}
+
+_lazyModules = {name: moduleName for moduleName, names in _lazyNames.items() for name in names}
+
+__all__ = sorted(_lazyModules)
+
+
+def __getattr__(name):
+    moduleName = _lazyModules.get(name)
+    if moduleName is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    import importlib
+    value = getattr(importlib.import_module("." + moduleName, __name__), name)
+    # the next lookups don't go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazyModules))
+
+
+def _importAll():
+    for name in __all__:
+        __getattr__(name)
+
+
+import sys  # noqa: E402
+
+if sys.version_info < (3, 7):
+    # no module __getattr__ before Python 3.7
+    _importAll()
+
+del sys
+
+
+# =========
+# = tests =
+# =========
+
+def _testLazyImport():
+    """
+    >>> import subprocess, sys, os
+    >>> code = "import sys, fontPens; print('fontTools' in sys.modules); fontPens.FlattenPen; print('fontTools' in sys.modules)"
+    >>> libFolder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    >>> output = subprocess.check_output([sys.executable, "-c", code], cwd=libFolder)
+    >>> output.split() == [str(sys.version_info < (3, 7)).encode(), b"True"]
+    True
+    >>> from fontPens import FlattenPen
+    >>> from fontPens.flattenPen import FlattenPen as FlattenPen2
+    >>> FlattenPen is FlattenPen2
+    True
+    >>> "SpikePen" in dir(sys.modules["fontPens"])
+    True
+    >>> import fontPens
+    >>> all(getattr(fontPens, name) for name in fontPens.__all__)
+    True
+    >>> fontPens.notAPen
+    Traceback (most recent call last):
+        ...
+    AttributeError: module 'fontPens' has no attribute 'notAPen'
+    """
@@ -17,7 +17,15 @@ class AngledMarginPen(BasePen):
         BasePen.__init__(self, glyphSet)
         self.width = width
         self._angle = math.radians(90 + italicAngle)
+        self._tangent = math.tan(self._angle)
         self.maxSteps = 100
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the margins, to measure another glyph with this pen.
+        Set width to the width of the new glyph.
+        """
         self.margin = None
         self._left = None
         self._right = None
@@ -25,8 +33,9 @@ class AngledMarginPen(BasePen):
         self.currentPoint = None
 
     def _getAngled(self, pt):
-        right = (self.width + (pt[1] / math.tan(self._angle))) - pt[0]
-        left = pt[0] - ((pt[1] / math.tan(self._angle)))
+        offset = pt[1] / self._tangent
+        right = (self.width + offset) - pt[0]
+        left = pt[0] - offset
         if self._right is None:
             self._right = right
         else:
@@ -45,11 +54,12 @@ class AngledMarginPen(BasePen):
         self.currentPoint = pt
 
     def _curveToOne(self, pt1, pt2, pt3):
+        getAngled = self._getAngled
+        currentPoint = self.currentPoint
         step = 1.0 / self.maxSteps
         factors = range(0, self.maxSteps + 1)
         for i in factors:
-            pt = getCubicPoint(i * step, self.currentPoint, pt1, pt2, pt3)
-            self._getAngled(pt)
+            getAngled(getCubicPoint(i * step, currentPoint, pt1, pt2, pt3))
         self.currentPoint = pt3
 
 
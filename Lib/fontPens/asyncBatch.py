@@ -0,0 +1,231 @@
+"""
+Process the glyphs of a UFO from asyncio code without blocking the event loop.
+
+    async for glyphName, margins, error in getMarginsAsync("Regular.ufo", value=250):
+        ...
+
+The glyphs are read and processed in chunks on an executor, the default
+executor of the loop unless one is given, with at most concurrency chunks
+at a time. Results are yielded as the chunks finish, not in glyph order.
+Leaving the loop early, or cancelling the task iterating, cancels the
+chunks that haven't started yet.
+
+The operations are those of fontPens.batch. As in the batch runner, an
+error in a glyph is reported for that glyph and the other glyphs are
+still processed.
+"""
+import asyncio
+import itertools
+import os
+import sys
+from concurrent.futures import Executor, Future
+
+from fontPens.batch import _FontInfo, _operations, _processChunk, parseOperation
+
+
+if sys.version_info < (3, 7):
+    # no get_running_loop() before Python 3.7, in a coroutine this is the running loop
+    _getRunningLoop = asyncio.get_event_loop
+else:
+    _getRunningLoop = asyncio.get_running_loop
+
+
+def _prepareUFO(ufoPath, layerName, glyphNames):
+    from fontTools.ufoLib import UFOReader
+    reader = UFOReader(ufoPath, validate=False)
+    glyphSet = reader.getGlyphSet(layerName)
+    info = _FontInfo()
+    reader.readInfo(info)
+    if glyphNames is None:
+        glyphNames = sorted(glyphSet.keys())
+    for glyphName in glyphNames:
+        if glyphName not in glyphSet:
+            raise KeyError(glyphName)
+    return os.path.join(ufoPath, glyphSet.dirName), list(glyphNames), info
+
+
+async def processGlyphsAsync(ufoPath, operations, layerName=None, glyphNames=None,
+                             executor=None, concurrency=4, chunkSize=16):
+    """
+    Apply operations, a list of (name, kwargs) tuples or strings for
+    fontPens.batch.parseOperation(), to the glyphs of glyphNames in a
+    layer of a UFO, all glyphs when omitted.
+
+    Yield (glyphName, glif, report) tuples as the glyphs are done, glif is
+    the text of the changed glyph or None when no filter was applied,
+    report holds the results of the report operations, or an error.
+    """
+    operations = [parseOperation(operation) if isinstance(operation, str) else operation for operation in operations]
+    loop = _getRunningLoop()
+    glyphsPath, glyphNames, info = await loop.run_in_executor(executor, _prepareUFO, ufoPath, layerName, glyphNames)
+    jobs = iter([
+        (glyphsPath, glyphNames[i:i + chunkSize], operations, info) for i in range(0, len(glyphNames), chunkSize)
+    ])
+    pending = set()
+
+    def submit(count):
+        for job in itertools.islice(jobs, count):
+            pending.add(loop.run_in_executor(executor, _processChunk, job))
+
+    try:
+        submit(max(1, concurrency))
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+            submit(len(done))
+            for future in done:
+                for glyphName, fileName, glif, report in future.result():
+                    yield glyphName, glif, report
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def _iterOperation(ufoPath, operationName, kwargs, options):
+    kind = _operations[operationName][0]
+    results = processGlyphsAsync(ufoPath, [(operationName, kwargs)], **options)
+    try:
+        async for glyphName, glif, report in results:
+            if "error" in report:
+                yield glyphName, None, report["error"]
+            elif kind == "report":
+                yield glyphName, report[operationName], None
+            else:
+                yield glyphName, glif, None
+    finally:
+        # cancel the pending chunks now, not when the generator is collected
+        await results.aclose()
+
+
+def getMarginsAsync(ufoPath, value=None, isHorizontal=True, **options):
+    """
+    Yield (glyphName, margins, error) tuples, margins are (left, right) at
+    height value, half the x-height by default, or (bottom, top) when
+    isHorizontal is False. None for glyphs without outline at that value.
+    error is None, or the error for the glyph with margins None.
+
+    The other options are those of processGlyphsAsync().
+    """
+    kwargs = dict(isHorizontal=isHorizontal)
+    if value is not None:
+        kwargs["value"] = value
+    return _iterOperation(ufoPath, "margins", kwargs, options)
+
+
+def getAngledMarginsAsync(ufoPath, **options):
+    """
+    Yield (glyphName, margins, error) tuples with the angled (left, right)
+    margins along the italic angle of the font.
+    """
+    return _iterOperation(ufoPath, "angled-margins", {}, options)
+
+
+def getDigestsAsync(ufoPath, ignoreSmoothAndName=False, **options):
+    """
+    Yield (glyphName, digests, error) tuples, digests is a dict with the
+    sha1 of the digest and the points only digest of the glyph.
+    """
+    return _iterOperation(ufoPath, "digest", dict(ignoreSmoothAndName=ignoreSmoothAndName), options)
+
+
+def flattenGlyphsAsync(ufoPath, approximateSegmentLength=5, segmentLines=False, filterDoubles=True, **options):
+    """
+    Yield (glyphName, glif, error) tuples with the glif text of the flattened glyphs.
+    """
+    kwargs = dict(approximateSegmentLength=approximateSegmentLength, segmentLines=segmentLines, filterDoubles=filterDoubles)
+    return _iterOperation(ufoPath, "flatten", kwargs, options)
+
+
+def sampleGlyphsAsync(ufoPath, steps=10, filterDoubles=True, **options):
+    """
+    Yield (glyphName, glif, error) tuples with the glif text of the sampled glyphs.
+    """
+    return _iterOperation(ufoPath, "sample", dict(steps=steps, filterDoubles=filterDoubles), options)
+
+
+# =========
+# = tests =
+# =========
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+async def _collect(iterator):
+    return sorted([item async for item in iterator])
+
+
+class _ManualExecutor(Executor):
+    """
+    Runs the first jobs at once and never starts the others.
+    """
+
+    def __init__(self, run):
+        self.run = run
+        self.futures = []
+
+    def submit(self, function, *args, **kwargs):
+        future = Future()
+        if len(self.futures) < self.run:
+            future.set_result(function(*args, **kwargs))
+        self.futures.append(future)
+        return future
+
+
+def _testAsyncBatch():
+    """
+    >>> import shutil, tempfile
+    >>> from fontPens.batch import _makeTestUFO
+    >>> tempDir = tempfile.mkdtemp()
+    >>> ufoPath = os.path.join(tempDir, "Test.ufo")
+    >>> _makeTestUFO(ufoPath)
+    >>> _run(_collect(getMarginsAsync(ufoPath)))
+    [('a', [100.0, 115.2084], None), ('b', [110.0, 105.2084], None)]
+    >>> _run(_collect(getMarginsAsync(ufoPath, value=1000, concurrency=1, chunkSize=1)))
+    [('a', None, None), ('b', None, None)]
+    >>> [(glyphName, [round(margin, 4) for margin in margins]) for glyphName, margins, error in _run(_collect(getAngledMarginsAsync(ufoPath)))]
+    [('a', [100.0, 100.0]), ('b', [110.0, 90.0])]
+    >>> [(glyphName, len(digests["digest"])) for glyphName, digests, error in _run(_collect(getDigestsAsync(ufoPath)))]
+    [('a', 40), ('b', 40)]
+    >>> glyphName, glif, error = _run(_collect(flattenGlyphsAsync(ufoPath, approximateSegmentLength=50, glyphNames=["a"])))[0]
+    >>> glif.count("<point")
+    12
+    >>> glyphName, glif, error = _run(_collect(sampleGlyphsAsync(ufoPath, steps=4, glyphNames=["a"])))[0]
+    >>> glif.count("<point")
+    7
+
+    Leaving the loop early cancels the chunks that haven't started.
+
+    >>> executor = _ManualExecutor(run=2)
+    >>> async def first():
+    ...     async for glyphName, margins, error in getMarginsAsync(ufoPath, executor=executor, concurrency=2, chunkSize=1):
+    ...         return glyphName
+    >>> _run(first())
+    'a'
+    >>> [future.cancelled() for future in executor.futures]
+    [False, False, True]
+    >>> _run(_collect(getMarginsAsync(ufoPath, glyphNames=["c"])))
+    Traceback (most recent call last):
+        ...
+    KeyError: 'c'
+
+    An error in a glyph is reported for that glyph only.
+
+    >>> with open(os.path.join(ufoPath, "glyphs", "b.glif"), "w") as f:
+    ...     length = f.write("<glyph")
+    >>> for glyphName, margins, error in _run(_collect(getMarginsAsync(ufoPath, chunkSize=1))):
+    ...     print(glyphName, margins, error)
+    a [100.0, 115.2084] None
+    b None ParseError: unclosed token: line 1, column 0
+    >>> shutil.rmtree(tempDir)
+    """
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,563 @@
+"""
+Apply a chain of fontPens operations to the glyphs of one or more UFOs.
+
+    python -m fontPens Regular.ufo Bold.ufo --op flatten:approximateSegmentLength=10 --op threshold:threshold=8 --output-dir out
+    python -m fontPens *.ufo --op digest --op margins:value=250 --report report.jsonl
+
+Glyphs are read straight from the .glif files, one chunk at a time, in a
+pool of worker processes. Operations are applied in order: filters change
+the outline for the next operations, reports measure it as it is at their
+place in the chain, components included: their base glyphs are drawn
+with the same filters applied. Changed glyphs are written to a copy of
+each UFO in the output folder, reports are written as JSON lines, both as
+the chunks come back. Each finished glyph is logged in a journal, a run
+that was stopped continues where it left off with --resume.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+from fontTools.pens.pointPen import PointToSegmentPen, SegmentToPointPen
+
+from fontPens.glifReader import GlifGlyphSet
+from fontPens.recordingPointPen import RecordingPointPen, replayRecording
+
+
+class _GlyphData(object):
+    """
+    Receives the glyph attributes read from a .glif file.
+    """
+
+    def __init__(self):
+        self.width = 0
+
+
+class _FontInfo(object):
+    """
+    Receives the font info attributes read from a UFO.
+    """
+
+    def __init__(self):
+        self.italicAngle = None
+        self.xHeight = None
+        self.unitsPerEm = None
+
+
+class _Context(object):
+
+    def __init__(self, glyphName, glyph, glyphSet, info):
+        self.glyphName = glyphName
+        self.glyph = glyph
+        self.glyphSet = glyphSet
+        self.info = info
+
+
+class _FilteredGlyph(object):
+
+    def __init__(self, recording):
+        self._recording = recording
+
+    def draw(self, pen):
+        replayRecording(self._recording, PointToSegmentPen(pen))
+
+    def drawPoints(self, pointPen):
+        replayRecording(self._recording, pointPen)
+
+
+class _FilteredGlyphSet(object):
+    """
+    The glyphs of glyphSet with the filter operations applied, for the
+    report operations to draw components from. The filtered recordings
+    are kept in cache, by glyph name and number of filters, which is
+    shared by all glyphs of a chunk.
+    """
+
+    def __init__(self, glyphSet, filters, info, cache):
+        self._glyphSet = glyphSet
+        self._filters = filters
+        self._info = info
+        self._cache = cache
+
+    def __contains__(self, glyphName):
+        return glyphName in self._glyphSet
+
+    def __getitem__(self, glyphName):
+        key = glyphName, len(self._filters)
+        recording = self._cache.get(key)
+        if recording is None:
+            glyph, recording = _readGlyph(self._glyphSet, glyphName)
+            context = _Context(glyphName, glyph, self._glyphSet, self._info)
+            for name, kwargs in self._filters:
+                recording = _applyFilter(recording, name, kwargs, context)
+            self._cache[key] = recording
+        return _FilteredGlyph(recording)
+
+
+def _parseBool(value):
+    return value.lower() in ("1", "true", "yes")
+
+
+# ==============
+# = operations =
+# ==============
+
+def _flatten(outPen, context, **kwargs):
+    from fontPens.flattenPen import FlattenPointPen
+    return FlattenPointPen(outPen, **kwargs)
+
+
+def _sample(outPen, context, **kwargs):
+    from fontPens.flattenPen import SamplingPointPen
+    return SamplingPointPen(outPen, **kwargs)
+
+
+def _threshold(outPen, context, **kwargs):
+    from fontPens.thresholdPen import ThresholdPen
+    return ThresholdPen(outPen, **kwargs)
+
+
+def _spike(outPen, context, segmentLength=20, spikeLength=40):
+    from fontPens.spikePen import _makeSpikePipeline
+    return _makeSpikePipeline(outPen, segmentLength, spikeLength, None, None, context.glyphName)
+
+
+def _guessSmooth(outPen, context, **kwargs):
+    from fontPens.guessSmoothPointPen import GuessSmoothPointPen
+    return GuessSmoothPointPen(outPen, **kwargs)
+
+
+def _sha1(value):
+    return hashlib.sha1(repr(value).encode("utf-8")).hexdigest()
+
+
+def _digest(recording, context, ignoreSmoothAndName=False):
+    from fontPens.digestPointPen import DigestPointPen
+    pen = DigestPointPen(ignoreSmoothAndName=ignoreSmoothAndName)
+    replayRecording(recording, pen)
+    return dict(digest=_sha1(pen.getDigest()), pointsDigest=_sha1(pen.getDigestPointsOnly()))
+
+
+def _margins(recording, context, value=None, isHorizontal=True):
+    from fontPens.marginPen import MarginPen
+    if value is None:
+        info = context.info
+        if info.xHeight:
+            value = info.xHeight * .5
+        else:
+            value = (info.unitsPerEm or 1000) * .25
+    pen = MarginPen(context.glyphSet, value, isHorizontal=isHorizontal)
+    replayRecording(recording, PointToSegmentPen(pen))
+    margins = pen.getMargins()
+    if margins is None:
+        return None
+    low, high = margins
+    if isHorizontal:
+        return [low, round(context.glyph.width - high, 4)]
+    return [low, high]
+
+
+def _angledMargins(recording, context):
+    from fontPens.angledMarginPen import AngledMarginPen
+    pen = AngledMarginPen(context.glyphSet, context.glyph.width, context.info.italicAngle or 0)
+    replayRecording(recording, PointToSegmentPen(pen))
+    if pen.margin is None:
+        return None
+    return list(pen.margin)
+
+
+# name -> (kind, function, parameter types)
+# segment and point operations are filters, report operations return a json value
+_operations = {
+    "flatten": ("point", _flatten, dict(approximateSegmentLength=float, segmentLines=_parseBool, filterDoubles=_parseBool)),
+    "sample": ("point", _sample, dict(steps=int, filterDoubles=_parseBool)),
+    "threshold": ("segment", _threshold, dict(threshold=float)),
+    "spike": ("segment", _spike, dict(segmentLength=float, spikeLength=float)),
+    "guess-smooth": ("point", _guessSmooth, dict(error=float)),
+    "digest": ("report", _digest, dict(ignoreSmoothAndName=_parseBool)),
+    "margins": ("report", _margins, dict(value=float, isHorizontal=_parseBool)),
+    "angled-margins": ("report", _angledMargins, dict()),
+}
+
+
+def _operationArgument(text):
+    try:
+        return parseOperation(text)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def parseOperation(text):
+    """
+    Parse an operation given as name or name:key=value,key=value
+    and return it as a (name, kwargs) tuple.
+
+    >>> parseOperation("flatten:approximateSegmentLength=10,segmentLines=true")
+    ('flatten', {'approximateSegmentLength': 10.0, 'segmentLines': True})
+    >>> parseOperation("digest")
+    ('digest', {})
+    >>> parseOperation("blur")
+    Traceback (most recent call last):
+        ...
+    ValueError: unknown operation 'blur', choose from angled-margins, digest, flatten, guess-smooth, margins, sample, spike, threshold
+    """
+    name, _, arguments = text.partition(":")
+    name = name.strip()
+    if name not in _operations:
+        raise ValueError("unknown operation %r, choose from %s" % (name, ", ".join(sorted(_operations))))
+    parameterTypes = _operations[name][2]
+    kwargs = {}
+    for argument in arguments.split(","):
+        if not argument.strip():
+            continue
+        key, _, value = argument.partition("=")
+        key = key.strip()
+        if key not in parameterTypes:
+            raise ValueError("unknown parameter %r for %s, choose from %s" % (key, name, ", ".join(sorted(parameterTypes))))
+        kwargs[key] = parameterTypes[key](value.strip())
+    return name, kwargs
+
+
+def _readGlyph(glyphSet, glyphName):
+    glyph = _GlyphData()
+    recorder = RecordingPointPen()
+    glyphSet.readGlyph(glyphName, glyph, recorder)
+    return glyph, recorder.value
+
+
+def _applyFilter(recording, name, kwargs, context):
+    kind, function, parameterTypes = _operations[name]
+    recorder = RecordingPointPen()
+    if kind == "segment":
+        replayRecording(recording, PointToSegmentPen(function(SegmentToPointPen(recorder), context, **kwargs)))
+    else:
+        replayRecording(recording, function(recorder, context, **kwargs))
+    return recorder.value
+
+
+def processGlyph(glyphSet, glyphName, operations, info=None, cache=None):
+    """
+    Apply operations, a list of (name, kwargs) tuples, to a glyph of glyphSet.
+    Return the glif text of the changed glyph, or None when no filter was
+    applied, and a dict with the results of the report operations. A report
+    operation used more than once gets a number: margins, margins.2, ...
+
+    Report operations draw components from the base glyphs with the same
+    filters applied. cache is an optional dict to share the filtered base
+    glyphs between calls for the same glyphSet and operations.
+    """
+    from fontTools.ufoLib.glifLib import writeGlyphToString
+    if info is None:
+        info = _FontInfo()
+    if cache is None:
+        cache = {}
+    glyph, recording = _readGlyph(glyphSet, glyphName)
+    context = _Context(glyphName, glyph, glyphSet, info)
+    filters = []
+    report = {}
+    for name, kwargs in operations:
+        if _operations[name][0] == "report":
+            # a report operation used more than once: margins, margins.2, ...
+            key = name
+            count = 1
+            while key in report:
+                count += 1
+                key = "%s.%d" % (name, count)
+            reportGlyphSet = _FilteredGlyphSet(glyphSet, list(filters), info, cache) if filters else glyphSet
+            function = _operations[name][1]
+            report[key] = function(recording, _Context(glyphName, glyph, reportGlyphSet, info), **kwargs)
+            continue
+        recording = _applyFilter(recording, name, kwargs, context)
+        filters.append((name, kwargs))
+        cache[glyphName, len(filters)] = recording
+    glif = None
+    if filters:
+        glif = writeGlyphToString(glyphName, glyph, lambda pointPen: replayRecording(recording, pointPen))
+    return glif, report
+
+
+def _processChunk(job):
+    glyphsPath, glyphNames, operations, info = job
+    if all(_operations[name][0] == "report" for name, kwargs in operations):
+        # nothing is written back, the outline and the advance are enough
+        glyphSet = GlifGlyphSet(glyphsPath)
+    else:
+        from fontTools.ufoLib.glifLib import GlyphSet
+        glyphSet = GlyphSet(glyphsPath, expectContentsFile=True)
+    # the filtered base glyphs of components
+    cache = {}
+    results = []
+    for glyphName in glyphNames:
+        try:
+            glif, report = processGlyph(glyphSet, glyphName, operations, info, cache)
+        except Exception as error:
+            glif, report = None, dict(error="%s: %s" % (error.__class__.__name__, error))
+        results.append((glyphName, glyphSet.contents[glyphName], glif, report))
+    return results
+
+
+# ===========
+# = the run =
+# ===========
+
+def _readJournal(path):
+    done = set()
+    if path is None or not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                font, layer, glyphName = json.loads(line)
+            except ValueError:
+                # a line cut short when the run was stopped
+                continue
+            done.add((font, layer, glyphName))
+    return done
+
+
+def _openLog(path, resume):
+    if not resume:
+        return open(path, "w", encoding="utf-8")
+    # end a line cut short when the run was stopped
+    cutShort = False
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            cutShort = f.read(1) != b"\n"
+    f = open(path, "a", encoding="utf-8")
+    if cutShort:
+        f.write("\n")
+    return f
+
+
+def _writeFile(path, text):
+    # write next to the file and move it in place, a stopped run never leaves half a file
+    tempPath = path + ".tmp"
+    with open(tempPath, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tempPath, path)
+
+
+def _mapChunks(jobs, workers):
+    if workers == 1:
+        for job in jobs:
+            yield _processChunk(job)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(_processChunk, jobs):
+            yield results
+
+
+def runBatch(ufoPaths, operations, outputDir=None, reportPath=None, journalPath=None, resume=False,
+             layerName=None, workers=None, chunkSize=32, progress=None):
+    """
+    Apply operations, a list of (name, kwargs) tuples or strings for
+    parseOperation(), to all glyphs of a layer in each UFO of ufoPaths.
+
+    - outputDir: changed glyphs are written to a copy of each UFO in this folder.
+    - reportPath: the results of the report operations are written to
+      this file, one JSON object per glyph.
+    - journalPath: finished glyphs are logged in this file, by default
+      next to the report or in the output folder.
+    - resume: skip the glyphs logged in the journal and append to the report.
+    - workers: the number of worker processes, 1 to work in this process.
+    - progress: a stream for progress messages.
+
+    Return the number of glyphs processed and the number of glyphs with errors.
+    """
+    from fontTools.ufoLib import UFOReader
+    operations = [parseOperation(operation) if isinstance(operation, str) else operation for operation in operations]
+    hasFilters = any(_operations[name][0] != "report" for name, kwargs in operations)
+    hasReports = any(_operations[name][0] == "report" for name, kwargs in operations)
+    if hasFilters and outputDir is None:
+        raise ValueError("filter operations need an output folder")
+    if journalPath is None:
+        if reportPath is not None:
+            journalPath = reportPath + ".journal"
+        elif outputDir is not None:
+            journalPath = os.path.join(outputDir, "fontPens.journal")
+    if resume and journalPath is None:
+        raise ValueError("resuming a run needs a journal")
+    done = _readJournal(journalPath) if resume else set()
+
+    if outputDir is not None and not os.path.exists(outputDir):
+        os.makedirs(outputDir)
+    reportFile = journal = None
+    if hasReports:
+        reportFile = _openLog(reportPath, resume) if reportPath is not None else sys.stdout
+    if journalPath is not None:
+        journal = _openLog(journalPath, resume)
+
+    processed = errors = 0
+    try:
+        for ufoPath in ufoPaths:
+            reader = UFOReader(ufoPath, validate=False)
+            glyphSet = reader.getGlyphSet(layerName)
+            info = _FontInfo()
+            reader.readInfo(info)
+            fontKey = os.path.abspath(ufoPath)
+            layerKey = layerName or ""
+            glyphsPath = os.path.join(ufoPath, glyphSet.dirName)
+            glyphNames = [glyphName for glyphName in sorted(glyphSet.keys()) if (fontKey, layerKey, glyphName) not in done]
+            outputGlyphsPath = None
+            if hasFilters:
+                outputUFO = os.path.join(outputDir, os.path.basename(os.path.normpath(ufoPath)))
+                if not os.path.exists(outputUFO):
+                    shutil.copytree(ufoPath, outputUFO)
+                elif not resume:
+                    raise ValueError("%s exists, remove it or resume the run" % outputUFO)
+                outputGlyphsPath = os.path.join(outputUFO, glyphSet.dirName)
+            jobs = [(glyphsPath, glyphNames[i:i + chunkSize], operations, info) for i in range(0, len(glyphNames), chunkSize)]
+            count = 0
+            for results in _mapChunks(jobs, workers):
+                for glyphName, fileName, glif, report in results:
+                    if glif is not None:
+                        _writeFile(os.path.join(outputGlyphsPath, fileName), glif)
+                    if "error" in report:
+                        errors += 1
+                    if reportFile is not None or "error" in report:
+                        line = dict(font=ufoPath, glyph=glyphName)
+                        if layerName is not None:
+                            line["layer"] = layerName
+                        line.update(report)
+                        (reportFile or sys.stderr).write(json.dumps(line, sort_keys=True) + "\n")
+                    if journal is not None:
+                        journal.write(json.dumps([fontKey, layerKey, glyphName]) + "\n")
+                # the journal only lists glyphs whose results are on disk
+                if reportFile is not None:
+                    reportFile.flush()
+                if journal is not None:
+                    journal.flush()
+                count += len(results)
+                processed += len(results)
+                if progress is not None:
+                    progress.write("%s: %d/%d glyphs\n" % (ufoPath, count, len(glyphNames)))
+                    progress.flush()
+    finally:
+        if reportFile is not None and reportFile is not sys.stdout:
+            reportFile.close()
+        if journal is not None:
+            journal.close()
+    return processed, errors
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m fontPens",
+        description="Apply a chain of fontPens operations to the glyphs of UFOs.",
+        epilog="operations: %s" % ", ".join(
+            "%s(%s)" % (name, ", ".join(sorted(_operations[name][2]))) for name in sorted(_operations)))
+    parser.add_argument("ufos", nargs="+", metavar="UFO", help="the UFOs to process")
+    parser.add_argument("--op", dest="operations", action="append", required=True, type=_operationArgument,
+                        metavar="NAME[:KEY=VALUE,...]", help="an operation, repeat to chain operations")
+    parser.add_argument("--output-dir", dest="outputDir", help="write the changed UFOs to this folder")
+    parser.add_argument("--report", dest="reportPath", help="write the reports to this file, as JSON lines, instead of stdout")
+    parser.add_argument("--journal", dest="journalPath", help="log the finished glyphs to this file")
+    parser.add_argument("--resume", action="store_true", help="skip the glyphs in the journal of a previous run")
+    parser.add_argument("--layer", dest="layerName", help="the layer to process, the default layer if omitted")
+    parser.add_argument("--workers", type=int, help="the number of worker processes, 1 to run in a single process")
+    parser.add_argument("--chunk-size", dest="chunkSize", type=int, default=32, help="the number of glyphs per job")
+    parser.add_argument("--quiet", action="store_true", help="don't print the progress")
+    options = parser.parse_args(args)
+    try:
+        processed, errors = runBatch(
+            options.ufos, options.operations, outputDir=options.outputDir, reportPath=options.reportPath,
+            journalPath=options.journalPath, resume=options.resume, layerName=options.layerName,
+            workers=options.workers, chunkSize=options.chunkSize, progress=None if options.quiet else sys.stderr)
+    except ValueError as error:
+        parser.error(str(error))
+    if not options.quiet:
+        sys.stderr.write("%d glyphs processed, %d errors\n" % (processed, errors))
+    return 1 if errors else 0
+
+
+# =========
+# = tests =
+# =========
+
+def _makeTestUFO(path):
+    from fontParts.fontshell import RFont
+    font = RFont()
+    font.info.unitsPerEm = 1000
+    font.info.xHeight = 500
+    glyph = font.newGlyph("a")
+    glyph.width = 400
+    pen = glyph.getPen()
+    pen.moveTo((100, 0))
+    pen.lineTo((300, 0))
+    pen.curveTo((300, 200), (300, 300), (200, 400))
+    pen.lineTo((100, 400))
+    pen.closePath()
+    glyph = font.newGlyph("b")
+    glyph.width = 400
+    glyph.appendComponent("a", offset=(10, 0))
+    font.save(path)
+
+
+def _testRunBatch():
+    """
+    >>> import tempfile
+    >>> from fontTools.ufoLib import UFOReader
+    >>> tempDir = tempfile.mkdtemp()
+    >>> ufoPath = os.path.join(tempDir, "Test.ufo")
+    >>> _makeTestUFO(ufoPath)
+    >>> outputDir = os.path.join(tempDir, "out")
+    >>> reportPath = os.path.join(tempDir, "report.jsonl")
+    >>> operations = ["margins", "flatten:approximateSegmentLength=50", "threshold:threshold=20", "margins:value=300"]
+    >>> runBatch([ufoPath], operations, outputDir=outputDir, reportPath=reportPath, workers=1)
+    (2, 0)
+    >>> with open(reportPath) as f:
+    ...     reports = [json.loads(line) for line in f]
+    >>> [(report["glyph"], report["margins"], report["margins.2"]) for report in reports]
+    [('a', [100.0, 115.2084], [100.0, 131.4249]), ('b', [110.0, 105.2084], [110.0, 121.4249])]
+
+    The reports of glyph b measure its component as the flattened glyph a
+    that was written, offset by 10 units. The changed glyphs are written to a copy of the UFO. The component
+    of glyph b is unchanged.
+
+    >>> outputGlyphSet = UFOReader(os.path.join(outputDir, "Test.ufo")).getGlyphSet()
+    >>> recorder = RecordingPointPen()
+    >>> outputGlyphSet.readGlyph("a", pointPen=recorder)
+    >>> len(recorder.value)
+    14
+    >>> recorder = RecordingPointPen()
+    >>> outputGlyphSet.readGlyph("b", pointPen=recorder)
+    >>> recorder.value
+    [('addComponent', ('a', (1, 0, 0, 1, 10, 0)), {})]
+
+    A finished run has nothing left to resume, a run stopped halfway picks up the rest.
+
+    >>> runBatch([ufoPath], operations, outputDir=outputDir, reportPath=reportPath, resume=True, workers=1)
+    (0, 0)
+    >>> with open(reportPath + ".journal") as f:
+    ...     lines = f.readlines()
+    >>> len(lines)
+    2
+    >>> with open(reportPath + ".journal", "w") as f:
+    ...     length = f.write(lines[0] + lines[1][:10])
+    >>> runBatch([ufoPath], operations, outputDir=outputDir, reportPath=reportPath, resume=True, workers=1)
+    (1, 0)
+    >>> with open(reportPath) as f:
+    ...     [(report["glyph"], report["margins.2"]) for report in map(json.loads, f)]
+    [('a', [100.0, 131.4249]), ('b', [110.0, 121.4249]), ('b', [110.0, 121.4249])]
+    >>> sorted(_readJournal(reportPath + ".journal")) == sorted((os.path.abspath(ufoPath), "", glyphName) for glyphName in "ab")
+    True
+
+    From the command line, with a pool of workers:
+
+    >>> main([ufoPath, "--op", "digest", "--report", reportPath, "--workers", "2", "--chunk-size", "1", "--quiet"])
+    0
+    >>> with open(reportPath) as f:
+    ...     reports = [json.loads(line) for line in f]
+    >>> [(report["glyph"], len(report["digest"]["pointsDigest"])) for report in reports]
+    [('a', 40), ('b', 40)]
+    >>> shutil.rmtree(tempDir)
+    """
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
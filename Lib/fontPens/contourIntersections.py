@@ -0,0 +1,375 @@
+"""
+Find self-intersecting and overlapping contours on flattened outlines.
+
+    findIntersections(glyph)
+    hasIntersections(glyph)
+    for glyphName, intersections in findUFOIntersections("Regular.ufo", workers=4):
+        ...
+
+An intersection is a (location, (contourIndex, segmentIndex), (otherContourIndex,
+otherSegmentIndex)) tuple. The segment indexes count the segments of the
+original contour, in drawing order, the closing line of a closed contour
+included. Both contour indexes are the same for a self-intersection.
+
+The contours are flattened with a FlattenPen, then the flattened segments
+are swept from left to right: a segment is only compared with the segments
+whose horizontal extent it overlaps, and only when their vertical extents
+overlap as well. With refine, the intersections are computed again on the
+original lines and curves.
+"""
+from functools import partial
+from heapq import heappop, heappush
+
+from fontTools.pens.basePen import BasePen
+
+from fontPens.flattenPen import FlattenPen
+
+
+class _SegmentCollector(BasePen):
+    """
+    Collects the flattened segments, with the original segment they come from.
+    """
+
+    def __init__(self):
+        BasePen.__init__(self, None)
+        self.segments = []
+        # (segment count, closed) per contour
+        self.contours = []
+        self.source = None
+        self.currentPt = None
+        self.firstPt = None
+        self._position = 0
+
+    def _moveTo(self, pt):
+        self.currentPt = self.firstPt = tuple(pt)
+        self._position = 0
+
+    def _lineTo(self, pt):
+        pt = tuple(pt)
+        currentPt = self.currentPt
+        if pt != currentPt:
+            contourIndex, segmentIndex, original = self.source
+            (x0, y0), (x1, y1) = currentPt, pt
+            self.segments.append((
+                min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1),
+                currentPt, pt, contourIndex, self._position, segmentIndex, original))
+            self._position += 1
+        self.currentPt = pt
+
+    def _closePath(self):
+        self.contours.append((self._position, True))
+        self.currentPt = None
+
+    def _endPath(self):
+        self.contours.append((self._position, False))
+        self.currentPt = None
+
+    def addComponent(self, glyphName, transformation):
+        pass
+
+
+class _TaggingPen(BasePen):
+    """
+    Draws into a FlattenPen and tells the collector which original segment
+    the flattened segments come from.
+    """
+
+    def __init__(self, collector, approximateSegmentLength, glyphSet):
+        BasePen.__init__(self, glyphSet)
+        self.collector = collector
+        self.flattenPen = FlattenPen(collector, approximateSegmentLength=approximateSegmentLength, segmentLines=False)
+        self.contourIndex = -1
+        self.segmentIndex = 0
+        self.firstPt = None
+
+    def _tag(self, original):
+        self.collector.source = (self.contourIndex, self.segmentIndex, original)
+        self.segmentIndex += 1
+
+    def _moveTo(self, pt):
+        self.contourIndex += 1
+        self.segmentIndex = 0
+        self.firstPt = pt
+        self.flattenPen.moveTo(pt)
+
+    def _lineTo(self, pt):
+        self._tag((self._getCurrentPoint(), pt))
+        self.flattenPen.lineTo(pt)
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        self._tag((self._getCurrentPoint(), pt1, pt2, pt3))
+        self.flattenPen.curveTo(pt1, pt2, pt3)
+
+    def _qCurveToOne(self, pt1, pt2):
+        self._tag((self._getCurrentPoint(), pt1, pt2))
+        self.flattenPen.qCurveTo(pt1, pt2)
+
+    def _closePath(self):
+        currentPt = self._getCurrentPoint()
+        self._tag((currentPt, self.firstPt))
+        self.flattenPen.closePath()
+
+    def _endPath(self):
+        self.flattenPen.endPath()
+
+    def addComponent(self, glyphName, transformation):
+        if self.glyphSet is None:
+            # without a glyph set components can't be drawn
+            return
+        BasePen.addComponent(self, glyphName, transformation)
+
+
+def _lineIntersection(segment, otherSegment):
+    # the intersection point of two straight segments, or None
+    (x1, y1), (x2, y2) = segment
+    (x3, y3), (x4, y4) = otherSegment
+    dx = x2 - x1
+    dy = y2 - y1
+    otherDx = x4 - x3
+    otherDy = y4 - y3
+    denominator = dx * otherDy - dy * otherDx
+    if denominator == 0:
+        if (x3 - x1) * dy - (y3 - y1) * dx != 0:
+            # parallel
+            return None
+        # collinear: an end point of one on the other
+        for (x, y), (ax, ay), (bx, by) in (
+                ((x3, y3), (x1, y1), (x2, y2)), ((x4, y4), (x1, y1), (x2, y2)),
+                ((x1, y1), (x3, y3), (x4, y4)), ((x2, y2), (x3, y3), (x4, y4))):
+            if min(ax, bx) <= x <= max(ax, bx) and min(ay, by) <= y <= max(ay, by):
+                return (x, y)
+        return None
+    t = ((x3 - x1) * otherDy - (y3 - y1) * otherDx) / denominator
+    u = ((x3 - x1) * dy - (y3 - y1) * dx) / denominator
+    if 0 <= t <= 1 and 0 <= u <= 1:
+        return (x1 + t * dx, y1 + t * dy)
+    return None
+
+
+def _refine(location, original, otherOriginal, tolerance):
+    # the intersection of the original segments closest to location, or None
+    from fontTools.misc.bezierTools import segmentSegmentIntersections
+    if original == otherOriginal:
+        # a curve crossing itself, keep the flattened location
+        return location
+    x, y = location
+    best = None
+    for intersection in segmentSegmentIntersections(original, otherOriginal):
+        ix, iy = intersection.pt
+        distance = abs(ix - x) + abs(iy - y)
+        if distance <= tolerance and (best is None or distance < best[0]):
+            best = (distance, (ix, iy))
+    if best is None:
+        return None
+    return best[1]
+
+
+def _findSegmentIntersections(collector, refine, tolerance, stopAtFirst):
+    contours = collector.contours
+    segments = sorted(collector.segments, key=lambda segment: segment[0])
+    results = []
+    seen = set()
+    # (xMax, order, segment) of the segments that may reach this one, a heap on xMax
+    active = []
+    for order, segment in enumerate(segments):
+        xMin, xMax, yMin, yMax, p0, p1, contourIndex, position, segmentIndex, original = segment
+        # forget the segments ending left of this one
+        while active and active[0][0] < xMin:
+            heappop(active)
+        for activeXMax, activeOrder, other in active:
+            if other[3] < yMin or other[2] > yMax:
+                continue
+            otherContourIndex = other[6]
+            if otherContourIndex == contourIndex:
+                # neighbours share an end point
+                otherPosition = other[7]
+                if abs(otherPosition - position) == 1:
+                    continue
+                segmentCount, closed = contours[contourIndex]
+                if closed and {position, otherPosition} == {0, segmentCount - 1}:
+                    continue
+            location = _lineIntersection((p0, p1), (other[4], other[5]))
+            if location is None:
+                continue
+            if refine:
+                location = _refine(location, original, other[9], tolerance)
+                if location is None:
+                    continue
+            first = (contourIndex, segmentIndex)
+            second = (otherContourIndex, other[8])
+            if second < first:
+                first, second = second, first
+            # a crossing at a corner touches two segments of a contour, count it once
+            key = (first[0], second[0], round(location[0], 6), round(location[1], 6))
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append((location, first, second))
+            if stopAtFirst:
+                return results
+        heappush(active, (xMax, order, segment))
+    results.sort(key=lambda result: (result[1], result[2], result[0]))
+    return results
+
+
+def findIntersections(glyph, approximateSegmentLength=5, glyphSet=None, refine=False, stopAtFirst=False):
+    """
+    Return the intersections of the contours of glyph, crossing themselves
+    or each other. Components are drawn from glyphSet, when given, and
+    skipped otherwise.
+
+    - approximateSegmentLength: the length of the flattened segments.
+    - refine: compute the locations on the original lines and curves, and
+      drop the intersections only found on the flattened outline.
+    - stopAtFirst: return as soon as one intersection is found.
+    """
+    collector = _SegmentCollector()
+    glyph.draw(_TaggingPen(collector, approximateSegmentLength, glyphSet))
+    return _findSegmentIntersections(collector, refine, approximateSegmentLength, stopAtFirst)
+
+
+def hasIntersections(glyph, approximateSegmentLength=5, glyphSet=None, refine=False):
+    """
+    Return whether any contour of glyph crosses itself or another contour.
+    """
+    return bool(findIntersections(glyph, approximateSegmentLength, glyphSet, refine, stopAtFirst=True))
+
+
+def findFontIntersections(font, glyphNames=None, **kwargs):
+    """
+    Return a dict with the intersections of the glyphs of glyphNames in
+    font, all glyphs when omitted. Components are drawn from the font.
+    The keyword arguments are those of findIntersections().
+    """
+    if glyphNames is None:
+        glyphNames = font.keys()
+    return {glyphName: findIntersections(font[glyphName], glyphSet=font, **kwargs) for glyphName in glyphNames}
+
+
+def _glifIntersections(glyph, glyphSet, **kwargs):
+    return findIntersections(glyph, glyphSet=glyphSet, **kwargs)
+
+
+def findUFOIntersections(ufoPath, layerName=None, glyphNames=None, workers=None, chunkSize=32, **kwargs):
+    """
+    Yield (glyphName, intersections) tuples for the glyphs of glyphNames in
+    a layer of a UFO, all glyphs when omitted, read from the .glif files in
+    a pool of worker processes. workers=1 works in this process.
+    The keyword arguments are those of findIntersections().
+    """
+    from fontPens.glifReader import getLayerPath, mapGlifGlyphs
+    function = partial(_glifIntersections, **kwargs)
+    return mapGlifGlyphs(function, getLayerPath(ufoPath, layerName), glyphNames, workers=workers, chunkSize=chunkSize)
+
+
+# =========
+# = tests =
+# =========
+
+def _makeTestGlyph():
+    # a bow tie crossing itself, and a square overlapping it
+    from fontParts.fontshell import RGlyph
+    testGlyph = RGlyph()
+    testGlyph.name = "testGlyph"
+    testGlyph.width = 500
+    pen = testGlyph.getPen()
+    pen.moveTo((0, 0))
+    pen.lineTo((200, 200))
+    pen.lineTo((200, 0))
+    pen.lineTo((0, 200))
+    pen.closePath()
+    pen.moveTo((150, 50))
+    pen.lineTo((300, 50))
+    pen.curveTo((350, 100), (350, 150), (300, 150))
+    pen.lineTo((150, 150))
+    pen.closePath()
+    return testGlyph
+
+
+def _testFindIntersections():
+    """
+    >>> glyph = _makeTestGlyph()
+    >>> for location, segment, otherSegment in findIntersections(glyph):
+    ...     print((round(location[0], 3), round(location[1], 3)), segment, otherSegment)
+    (100.0, 100.0) (0, 0) (0, 2)
+    (150.0, 150.0) (0, 0) (1, 2)
+    (200.0, 50.0) (0, 1) (1, 0)
+    (200.0, 150.0) (0, 1) (1, 2)
+    (150.0, 50.0) (0, 2) (1, 0)
+    >>> hasIntersections(glyph)
+    True
+    >>> len(findIntersections(glyph, stopAtFirst=True))
+    1
+
+    A contour without intersections:
+
+    >>> from fontParts.fontshell import RGlyph
+    >>> square = RGlyph()
+    >>> pen = square.getPen()
+    >>> pen.moveTo((0, 0))
+    >>> pen.lineTo((0, 100))
+    >>> pen.curveTo((50, 150), (100, 150), (100, 100))
+    >>> pen.lineTo((100, 0))
+    >>> pen.closePath()
+    >>> hasIntersections(square), findIntersections(square, refine=True)
+    (False, [])
+
+    Components are drawn from the glyph set, when given.
+
+    >>> composite = RGlyph()
+    >>> pen = composite.getPen()
+    >>> pen.addComponent("square", (1, 0, 0, 1, 50, 0))
+    >>> pen.moveTo((0, 20))
+    >>> pen.lineTo((200, 20))
+    >>> pen.lineTo((200, 40))
+    >>> pen.lineTo((0, 40))
+    >>> pen.closePath()
+    >>> findIntersections(composite)
+    []
+    >>> for location, segment, otherSegment in findIntersections(composite, glyphSet={"square": square}):
+    ...     print(location, segment, otherSegment)
+    (50.0, 20.0) (0, 0) (1, 0)
+    (150.0, 20.0) (0, 0) (1, 2)
+    (50.0, 40.0) (0, 2) (1, 0)
+    (150.0, 40.0) (0, 2) (1, 2)
+    """
+
+
+def _testRefine():
+    """
+    A curve crossing a line, the flattened locations are close, the refined ones are on the curve.
+
+    >>> from fontParts.fontshell import RGlyph
+    >>> glyph = RGlyph()
+    >>> pen = glyph.getPen()
+    >>> pen.moveTo((0, 0))
+    >>> pen.curveTo((0, 100), (100, 100), (100, 0))
+    >>> pen.closePath()
+    >>> pen.moveTo((-20, 60))
+    >>> pen.lineTo((120, 60))
+    >>> pen.lineTo((120, 90))
+    >>> pen.lineTo((-20, 90))
+    >>> pen.closePath()
+    >>> findIntersections(glyph, approximateSegmentLength=20)
+    [((19.36, 60.0), (0, 0), (1, 0)), ((80.64, 60.0), (0, 0), (1, 0))]
+    >>> [(round(x, 4), round(y, 4)) for (x, y), segment, otherSegment in findIntersections(glyph, approximateSegmentLength=20, refine=True)]
+    [(18.695, 60.0), (81.305, 60.0)]
+    """
+
+
+def _testFindUFOIntersections():
+    """
+    >>> import os, shutil, tempfile
+    >>> from fontPens.batch import _makeTestUFO
+    >>> tempDir = tempfile.mkdtemp()
+    >>> ufoPath = os.path.join(tempDir, "Test.ufo")
+    >>> _makeTestUFO(ufoPath)
+    >>> sorted(findUFOIntersections(ufoPath, workers=2, chunkSize=1))
+    [('a', []), ('b', [])]
+    >>> shutil.rmtree(tempDir)
+    """
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -10,8 +10,19 @@ class DigestPointPen(AbstractPointPen):
     """
 
     def __init__(self, ignoreSmoothAndName=False):
-        self._data = []
         self.ignoreSmoothAndName = ignoreSmoothAndName
+        self.reset()
+
+    def reset(self):
+        """
+        Forget everything drawn so far, to digest another glyph with this pen.
+        """
+        self._data = []
+        # point coordinates are also collected separately as they arrive,
+        # so the point-only digests don't have to rescan self._data
+        self._points = []
+        # needSort -> (point count, digest, hash)
+        self._pointsOnlyCache = {}
 
     def beginPath(self, identifier=None):
         self._data.append('beginPath')
@@ -24,6 +35,7 @@ class DigestPointPen(AbstractPointPen):
             self._data.append((pt, segmentType))
         else:
             self._data.append((pt, segmentType, smooth, name))
+        self._points.append(pt)
 
     def addComponent(self, baseGlyphName, transformation, identifier=None):
         t = []
@@ -46,14 +58,37 @@ class DigestPointPen(AbstractPointPen):
         - but without smooth info or drawing instructions.
         - For instance if you want to compare 2 glyphs in shape,
           but not interpolatability.
+
+        The result is cached until new points are added to the pen.
+        """
+        return self._getPointsOnly(needSort)[1]
+
+    def getDigestPointsOnlyHash(self, needSort=True):
         """
-        points = []
-        for item in self._data:
-            if isinstance(item, tuple) and isinstance(item[0], tuple):
-                points.append(item[0])
-        if needSort:
-            points.sort()
-        return tuple(points)
+        Return a hash of the points only digest.
+        Use this for fast equality tests between many glyphs,
+        the hash is cached along with the digest itself.
+        """
+        return self._getPointsOnly(needSort)[2]
+
+    def _getPointsOnly(self, needSort):
+        points = self._points
+        count = len(points)
+        cached = self._pointsOnlyCache.get(needSort)
+        if cached is not None and cached[0] == count:
+            return cached
+        if not needSort:
+            digest = tuple(points)
+        elif cached is not None:
+            # points are only ever appended: sort the new ones and let the
+            # sort merge the two sorted runs
+            newPoints = sorted(points[cached[0]:])
+            digest = tuple(sorted(cached[1] + tuple(newPoints)))
+        else:
+            digest = tuple(sorted(points))
+        cached = count, digest, hash(digest)
+        self._pointsOnlyCache[needSort] = cached
+        return cached
 
 
 class DigestPointStructurePen(DigestPointPen):
@@ -94,6 +129,46 @@ def _testDigestPointPen():
     ('beginPath', ((10, 10), 'move', True, None), ((-10, 100), 'line', False, None), 'endPath', 'beginPath', ((100, 100), 'line', False, None), ((100, 10), 'line', False, None), ((10, 10), 'line', False, None), 'endPath')
     >>> pen.getDigestPointsOnly()
     ((-10, 100), (10, 10), (10, 10), (100, 10), (100, 100))
+    >>> pen.getDigestPointsOnly(needSort=False)
+    ((10, 10), (-10, 100), (100, 100), (100, 10), (10, 10))
+    >>> pen.addComponent("a", (1, 0, 0, 1, 10, 10))
+    >>> pen.getDigestPointsOnly()
+    ((-10, 100), (10, 10), (10, 10), (100, 10), (100, 100))
+    """
+
+
+def _testDigestPointPenHash():
+    """
+    >>> pen1 = DigestPointPen()
+    >>> pen1.beginPath()
+    >>> pen1.addPoint((10, 10), "line")
+    >>> pen1.addPoint((-10, 100), "line")
+    >>> pen1.endPath()
+    >>> pen2 = DigestPointPen(ignoreSmoothAndName=True)
+    >>> pen2.beginPath()
+    >>> pen2.addPoint((-10, 100), "move")
+    >>> pen2.addPoint((10, 10), "line", name="a")
+    >>> pen2.endPath()
+    >>> pen1.getDigestPointsOnlyHash() == pen2.getDigestPointsOnlyHash()
+    True
+    >>> pen1.getDigestPointsOnlyHash(needSort=False) == pen2.getDigestPointsOnlyHash(needSort=False)
+    False
+    >>> pen2.beginPath()
+    >>> pen2.addPoint((0, 0), "line")
+    >>> pen2.endPath()
+    >>> pen1.getDigestPointsOnlyHash() == pen2.getDigestPointsOnlyHash()
+    False
+    >>> pen2.getDigestPointsOnly()
+    ((-10, 100), (0, 0), (10, 10))
+    >>> pen2.reset()
+    >>> pen2.getDigest(), pen2.getDigestPointsOnly()
+    ((), ())
+    >>> pen2.beginPath()
+    >>> pen2.addPoint((-10, 100), "move")
+    >>> pen2.addPoint((10, 10), "line", name="a")
+    >>> pen2.endPath()
+    >>> pen1.getDigestPointsOnlyHash() == pen2.getDigestPointsOnlyHash()
+    True
     """
 
 
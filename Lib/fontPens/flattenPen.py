@@ -1,5 +1,7 @@
 from fontTools.misc.bezierTools import calcQuadraticArcLength
-from fontTools.pens.basePen import BasePen
+from fontTools.misc.transform import Identity
+from fontTools.pens.basePen import BasePen, MissingComponentError, decomposeQuadraticSegment, decomposeSuperBezierSegment
+from fontTools.pens.pointPen import AbstractPointPen
 
 from fontPens.penTools import estimateCubicCurveLength, distance, interpolatePoint, getCubicPoint, getQuadraticPoint
 
@@ -12,16 +14,34 @@ class FlattenPen(BasePen):
     - approximateSegmentLength: the length you want the flattened segments to be (roughly).
     - segmentLines: whether to cut straight lines into segments as well.
     - filterDoubles: don't draw if a segment goes to the same coordinate.
+    - glyphSet: when given, components are drawn as the flattened outline of their base glyph.
+    - componentCache: a dict keeping the flattened base glyphs, share it between
+      the pens drawing the glyphs of a font to flatten each base glyph only once.
+    - keepComponents: draw components as components, even when a glyphSet is given.
+
+    Without a glyphSet, or with keepComponents, components are drawn as components.
     """
 
-    def __init__(self, otherPen, approximateSegmentLength=5, segmentLines=False, filterDoubles=True):
+    def __init__(self, otherPen, approximateSegmentLength=5, segmentLines=False, filterDoubles=True,
+                 glyphSet=None, componentCache=None, keepComponents=False):
         self.approximateSegmentLength = approximateSegmentLength
-        BasePen.__init__(self, {})
+        BasePen.__init__(self, glyphSet)
         self.otherPen = otherPen
         self.currentPt = None
         self.firstPt = None
         self.segmentLines = segmentLines
         self.filterDoubles = filterDoubles
+        if componentCache is None:
+            componentCache = {}
+        self.componentCache = componentCache
+        self.keepComponents = keepComponents
+
+    def reset(self):
+        """
+        Forget the current contour, to draw another glyph with this pen.
+        """
+        self.currentPt = None
+        self.firstPt = None
 
     def _moveTo(self, pt):
         self.otherPen.moveTo(pt)
@@ -29,56 +49,60 @@ class FlattenPen(BasePen):
         self.firstPt = pt
 
     def _lineTo(self, pt):
+        currentPt = self.currentPt
         if self.filterDoubles:
-            if pt == self.currentPt:
+            if pt == currentPt:
                 return
+        lineTo = self.otherPen.lineTo
         if not self.segmentLines:
-            self.otherPen.lineTo(pt)
+            lineTo(pt)
             self.currentPt = pt
             return
-        d = distance(self.currentPt, pt)
+        d = distance(currentPt, pt)
         maxSteps = int(round(d / self.approximateSegmentLength))
         if maxSteps < 1:
-            self.otherPen.lineTo(pt)
+            lineTo(pt)
             self.currentPt = pt
             return
         step = 1.0 / maxSteps
         for factor in range(1, maxSteps + 1):
-            self.otherPen.lineTo(interpolatePoint(self.currentPt, pt, factor * step))
+            lineTo(interpolatePoint(currentPt, pt, factor * step))
         self.currentPt = pt
 
     def _curveToOne(self, pt1, pt2, pt3):
-        falseCurve = (pt1 == self.currentPt) and (pt2 == pt3)
+        currentPt = self.currentPt
+        falseCurve = (pt1 == currentPt) and (pt2 == pt3)
         if falseCurve:
             self._lineTo(pt3)
             return
-        est = estimateCubicCurveLength(self.currentPt, pt1, pt2, pt3) / self.approximateSegmentLength
+        est = estimateCubicCurveLength(currentPt, pt1, pt2, pt3) / self.approximateSegmentLength
         maxSteps = int(round(est))
+        lineTo = self.otherPen.lineTo
         if maxSteps < 1:
-            self.otherPen.lineTo(pt3)
+            lineTo(pt3)
             self.currentPt = pt3
             return
         step = 1.0 / maxSteps
         for factor in range(1, maxSteps + 1):
-            pt = getCubicPoint(factor * step, self.currentPt, pt1, pt2, pt3)
-            self.otherPen.lineTo(pt)
+            lineTo(getCubicPoint(factor * step, currentPt, pt1, pt2, pt3))
         self.currentPt = pt3
 
     def _qCurveToOne(self, pt1, pt2):
-        falseCurve = (pt1 == self.currentPt) or (pt1 == pt2)
+        currentPt = self.currentPt
+        falseCurve = (pt1 == currentPt) or (pt1 == pt2)
         if falseCurve:
             self._lineTo(pt2)
             return
-        est = calcQuadraticArcLength(self.currentPt, pt1, pt2) / self.approximateSegmentLength
+        est = calcQuadraticArcLength(currentPt, pt1, pt2) / self.approximateSegmentLength
         maxSteps = int(round(est))
+        lineTo = self.otherPen.lineTo
         if maxSteps < 1:
-            self.otherPen.lineTo(pt2)
+            lineTo(pt2)
             self.currentPt = pt2
             return
         step = 1.0 / maxSteps
         for factor in range(1, maxSteps + 1):
-            pt = getQuadraticPoint(factor * step, self.currentPt, pt1, pt2)
-            self.otherPen.lineTo(pt)
+            lineTo(getQuadraticPoint(factor * step, currentPt, pt1, pt2))
         self.currentPt = pt2
 
     def _closePath(self):
@@ -91,7 +115,79 @@ class FlattenPen(BasePen):
         self.currentPt = None
 
     def addComponent(self, glyphName, transformation):
-        self.otherPen.addComponent(glyphName, transformation)
+        if self.glyphSet is None or self.keepComponents:
+            self.otherPen.addComponent(glyphName, transformation)
+        else:
+            _drawFlattenedComponent(self, glyphName, transformation)
+
+    def _cacheKey(self):
+        return ("FlattenPen", self.approximateSegmentLength, self.segmentLines, self.filterDoubles)
+
+    def _basePen(self, otherPen):
+        return FlattenPen(
+            otherPen, self.approximateSegmentLength, self.segmentLines, self.filterDoubles,
+            glyphSet=self.glyphSet, componentCache=self.componentCache)
+
+
+def _drawFlattenedComponent(pen, glyphName, transformation):
+    """
+    Draw a component into the output pen of pen, a FlattenPen or a SamplingPen,
+    as the flattened outline of its base glyph, transformed. The base glyph
+    is flattened once and kept in the component cache of the pen.
+
+    A scaled component gets the points of its flattened base glyph, scaled,
+    not the points of its scaled outline, flattened.
+    """
+    componentCache = pen.componentCache
+    key = (glyphName,) + pen._cacheKey()
+    if key in componentCache:
+        contours = componentCache[key]
+        if contours is None:
+            # the base glyph is being flattened, the component refers to itself
+            return
+    else:
+        try:
+            glyph = pen.glyphSet[glyphName]
+        except KeyError:
+            if not pen.skipMissingComponents:
+                raise MissingComponentError(glyphName)
+            pen.log.warning("glyph '%s' is missing from glyphSet; skipped" % glyphName)
+            return
+        from fontTools.pens.recordingPen import RecordingPen
+        recorder = RecordingPen()
+        componentCache[key] = None
+        try:
+            glyph.draw(pen._basePen(recorder))
+        except Exception:
+            del componentCache[key]
+            raise
+        # keep the contours as (points, closed) tuples
+        contours = []
+        points = None
+        for operator, operands in recorder.value:
+            if operator == "moveTo":
+                points = [operands[0]]
+            elif operator == "lineTo":
+                points.append(operands[0])
+            elif operator in ("closePath", "endPath"):
+                contours.append((tuple(points), operator == "closePath"))
+        contours = componentCache[key] = tuple(contours)
+    otherPen = pen.otherPen
+    moveTo = otherPen.moveTo
+    lineTo = otherPen.lineTo
+    identity = tuple(transformation) == Identity
+    if not identity:
+        xx, xy, yx, yy, dx, dy = transformation
+    for points, closed in contours:
+        if not identity:
+            points = [(xx * x + yx * y + dx, xy * x + yy * y + dy) for x, y in points]
+        moveTo(points[0])
+        for pt in points[1:]:
+            lineTo(pt)
+        if closed:
+            otherPen.closePath()
+        else:
+            otherPen.endPath()
 
 
 def flattenGlyph(aGlyph, threshold=10, segmentLines=True):
@@ -118,15 +214,27 @@ class SamplingPen(BasePen):
     - otherPen: a different segment pen object this filter should draw the results with.
     - steps: the number of steps for each curve segment.
     - filterDoubles: don't draw if a segment goes to the same coordinate.
+    - glyphSet, componentCache, keepComponents: as for FlattenPen.
     """
 
-    def __init__(self, otherPen, steps=10, filterDoubles=True):
-        BasePen.__init__(self, {})
+    def __init__(self, otherPen, steps=10, filterDoubles=True, glyphSet=None, componentCache=None, keepComponents=False):
+        BasePen.__init__(self, glyphSet)
         self.otherPen = otherPen
         self.currentPt = None
         self.firstPt = None
         self.steps = steps
         self.filterDoubles = filterDoubles
+        if componentCache is None:
+            componentCache = {}
+        self.componentCache = componentCache
+        self.keepComponents = keepComponents
+
+    def reset(self):
+        """
+        Forget the current contour, to draw another glyph with this pen.
+        """
+        self.currentPt = None
+        self.firstPt = None
 
     def _moveTo(self, pt):
         self.otherPen.moveTo(pt)
@@ -142,25 +250,29 @@ class SamplingPen(BasePen):
         return
 
     def _curveToOne(self, pt1, pt2, pt3):
-        falseCurve = (pt1 == self.currentPt) and (pt2 == pt3)
+        currentPt = self.currentPt
+        falseCurve = (pt1 == currentPt) and (pt2 == pt3)
         if falseCurve:
             self._lineTo(pt3)
             return
-        step = 1.0 / self.steps
-        for factor in range(1, self.steps + 1):
-            pt = getCubicPoint(factor * step, self.currentPt, pt1, pt2, pt3)
-            self.otherPen.lineTo(pt)
+        steps = self.steps
+        step = 1.0 / steps
+        lineTo = self.otherPen.lineTo
+        for factor in range(1, steps + 1):
+            lineTo(getCubicPoint(factor * step, currentPt, pt1, pt2, pt3))
         self.currentPt = pt3
 
     def _qCurveToOne(self, pt1, pt2):
-        falseCurve = (pt1 == self.currentPt) or (pt1 == pt2)
+        currentPt = self.currentPt
+        falseCurve = (pt1 == currentPt) or (pt1 == pt2)
         if falseCurve:
             self._lineTo(pt2)
             return
-        step = 1.0 / self.steps
-        for factor in range(1, self.steps + 1):
-            pt = getQuadraticPoint(factor * step, self.currentPt, pt1, pt2)
-            self.otherPen.lineTo(pt)
+        steps = self.steps
+        step = 1.0 / steps
+        lineTo = self.otherPen.lineTo
+        for factor in range(1, steps + 1):
+            lineTo(getQuadraticPoint(factor * step, currentPt, pt1, pt2))
         self.currentPt = pt2
 
     def _closePath(self):
@@ -173,7 +285,16 @@ class SamplingPen(BasePen):
         self.currentPt = None
 
     def addComponent(self, glyphName, transformation):
-        self.otherPen.addComponent(glyphName, transformation)
+        if self.glyphSet is None or self.keepComponents:
+            self.otherPen.addComponent(glyphName, transformation)
+        else:
+            _drawFlattenedComponent(self, glyphName, transformation)
+
+    def _cacheKey(self):
+        return ("SamplingPen", self.steps, self.filterDoubles)
+
+    def _basePen(self, otherPen):
+        return SamplingPen(otherPen, self.steps, self.filterDoubles, glyphSet=self.glyphSet, componentCache=self.componentCache)
 
 
 def samplingGlyph(aGlyph, steps=10):
@@ -190,6 +311,218 @@ def samplingGlyph(aGlyph, steps=10):
     recorder.replay(aGlyph.getPen())
     return aGlyph
 
+
+def _mergePointAttributes(output, index, smooth, name, kwargs):
+    # the point at index stays in place of a dropped point at the same coordinate
+    pt, segmentType, keptSmooth, keptName, keptKwargs = output[index]
+    if keptName is None:
+        keptName = name
+    if kwargs:
+        mergedKwargs = dict(kwargs)
+        mergedKwargs.update(keptKwargs)
+        keptKwargs = mergedKwargs
+    output[index] = (pt, segmentType, keptSmooth or smooth, keptName, keptKwargs)
+
+
+class _FlattenPointPenBase(AbstractPointPen):
+    """
+    Collects the points of a contour and draws the flattened contour into
+    otherPointPen when it ends. Subclasses return the points in between the
+    start and the end of a segment from _splitLine, _splitCurve and _splitQCurve.
+
+    The on-curve points keep their smooth flag, name, identifier and other
+    keyword arguments, the points added in between have none. When
+    filterDoubles drops a point, the point at the same coordinate that
+    stays takes the attributes it doesn't have itself. Open contours
+    stay open, closed contours stay closed and start at the same point.
+    """
+
+    def __init__(self, otherPointPen, filterDoubles=True):
+        self.otherPointPen = otherPointPen
+        self.filterDoubles = filterDoubles
+        self._points = None
+
+    def reset(self):
+        """
+        Forget the current contour, to draw another glyph with this pen.
+        """
+        self._points = None
+
+    def beginPath(self, identifier=None, **kwargs):
+        if identifier is not None:
+            kwargs["identifier"] = identifier
+        self._points = []
+        self.otherPointPen.beginPath(**kwargs)
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        if identifier is not None:
+            kwargs["identifier"] = identifier
+        self._points.append((tuple(pt), segmentType, smooth, name, kwargs))
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        if identifier is not None:
+            kwargs["identifier"] = identifier
+        self.otherPointPen.addComponent(baseGlyphName, transformation, **kwargs)
+
+    def endPath(self):
+        points = self._points
+        self._points = None
+        if points:
+            self._drawContour(points)
+        self.otherPointPen.endPath()
+
+    def _splitSegment(self, currentPt, offCurves, pt, segmentType):
+        if segmentType == "curve" and offCurves:
+            if len(offCurves) == 1:
+                # a curve with one off-curve point is a quadratic curve
+                return self._splitQCurve(currentPt, offCurves[0], pt)
+            result = []
+            for pt1, pt2, pt3 in decomposeSuperBezierSegment(offCurves + [pt]):
+                if result:
+                    result.append(currentPt)
+                result.extend(self._splitCurve(currentPt, pt1, pt2, pt3))
+                currentPt = pt3
+            return result
+        if segmentType == "qcurve" and offCurves:
+            result = []
+            for pt1, pt2 in decomposeQuadraticSegment(offCurves + [pt]):
+                if result:
+                    result.append(currentPt)
+                result.extend(self._splitQCurve(currentPt, pt1, pt2))
+                currentPt = pt2
+            return result
+        return self._splitLine(currentPt, pt)
+
+    def _drawContour(self, points):
+        if points[0][1] == "move":
+            closed = False
+        else:
+            closed = True
+            for index, point in enumerate(points):
+                if point[1] is not None:
+                    break
+            else:
+                # a quadratic contour without on-curve points
+                firstPt = points[0][0]
+                lastPt = points[-1][0]
+                impliedPt = (.5 * (firstPt[0] + lastPt[0]), .5 * (firstPt[1] + lastPt[1]))
+                points = points + [(impliedPt, "qcurve", False, None, {})]
+                index = len(points) - 1
+            # start at the first on-curve point, the points before it belong to the closing segment
+            points = points[index:] + points[:index]
+
+        output = []
+        firstPoint = points[0]
+        output.append((firstPoint[0], "move" if not closed else "line", firstPoint[2], firstPoint[3], firstPoint[4]))
+        currentPt = firstPoint[0]
+        filterDoubles = self.filterDoubles
+        offCurves = []
+        for pt, segmentType, smooth, name, kwargs in points[1:]:
+            if segmentType is None:
+                offCurves.append(pt)
+                continue
+            for splitPt in self._splitSegment(currentPt, offCurves, pt, segmentType):
+                if not filterDoubles or splitPt != output[-1][0]:
+                    output.append((splitPt, "line", False, None, {}))
+            offCurves = []
+            if filterDoubles and pt == output[-1][0]:
+                _mergePointAttributes(output, -1, smooth, name, kwargs)
+                continue
+            output.append((pt, "line", smooth, name, kwargs))
+            currentPt = pt
+        if closed:
+            firstPt = firstPoint[0]
+            for splitPt in self._splitSegment(currentPt, offCurves, firstPt, firstPoint[1]):
+                if not filterDoubles or splitPt != output[-1][0]:
+                    output.append((splitPt, "line", False, None, {}))
+            if filterDoubles and len(output) > 1 and output[-1][0] == firstPt:
+                pt, segmentType, smooth, name, kwargs = output.pop()
+                _mergePointAttributes(output, 0, smooth, name, kwargs)
+
+        addPoint = self.otherPointPen.addPoint
+        for pt, segmentType, smooth, name, kwargs in output:
+            addPoint(pt, segmentType, smooth, name, **kwargs)
+
+
+class FlattenPointPen(_FlattenPointPenBase):
+    """
+    The point pen version of FlattenPen, it processes the contours into a
+    series of straight lines by flattening the curves.
+
+    - otherPointPen: a different point pen object this filter should draw the results with.
+    - approximateSegmentLength: the length you want the flattened segments to be (roughly).
+    - segmentLines: whether to cut straight lines into segments as well.
+    - filterDoubles: don't draw a point at the same coordinate as the previous point.
+
+    Names, identifiers and other attributes of the on-curve points are kept.
+    """
+
+    def __init__(self, otherPointPen, approximateSegmentLength=5, segmentLines=False, filterDoubles=True):
+        _FlattenPointPenBase.__init__(self, otherPointPen, filterDoubles)
+        self.approximateSegmentLength = approximateSegmentLength
+        self.segmentLines = segmentLines
+
+    def _splitLine(self, currentPt, pt):
+        if not self.segmentLines:
+            return []
+        maxSteps = int(round(distance(currentPt, pt) / self.approximateSegmentLength))
+        if maxSteps < 1:
+            return []
+        step = 1.0 / maxSteps
+        return [interpolatePoint(currentPt, pt, factor * step) for factor in range(1, maxSteps)]
+
+    def _splitCurve(self, currentPt, pt1, pt2, pt3):
+        if (pt1 == currentPt) and (pt2 == pt3):
+            return self._splitLine(currentPt, pt3)
+        maxSteps = int(round(estimateCubicCurveLength(currentPt, pt1, pt2, pt3) / self.approximateSegmentLength))
+        if maxSteps < 1:
+            return []
+        step = 1.0 / maxSteps
+        return [getCubicPoint(factor * step, currentPt, pt1, pt2, pt3) for factor in range(1, maxSteps)]
+
+    def _splitQCurve(self, currentPt, pt1, pt2):
+        if (pt1 == currentPt) or (pt1 == pt2):
+            return self._splitLine(currentPt, pt2)
+        maxSteps = int(round(calcQuadraticArcLength(currentPt, pt1, pt2) / self.approximateSegmentLength))
+        if maxSteps < 1:
+            return []
+        step = 1.0 / maxSteps
+        return [getQuadraticPoint(factor * step, currentPt, pt1, pt2) for factor in range(1, maxSteps)]
+
+
+class SamplingPointPen(_FlattenPointPenBase):
+    """
+    The point pen version of SamplingPen, it draws each curve with the given number of steps.
+
+    - otherPointPen: a different point pen object this filter should draw the results with.
+    - steps: the number of steps for each curve segment.
+    - filterDoubles: don't draw a point at the same coordinate as the previous point.
+
+    Names, identifiers and other attributes of the on-curve points are kept.
+    """
+
+    def __init__(self, otherPointPen, steps=10, filterDoubles=True):
+        _FlattenPointPenBase.__init__(self, otherPointPen, filterDoubles)
+        self.steps = steps
+
+    def _splitLine(self, currentPt, pt):
+        return []
+
+    def _splitCurve(self, currentPt, pt1, pt2, pt3):
+        if (pt1 == currentPt) and (pt2 == pt3):
+            return []
+        steps = self.steps
+        step = 1.0 / steps
+        return [getCubicPoint(factor * step, currentPt, pt1, pt2, pt3) for factor in range(1, steps)]
+
+    def _splitQCurve(self, currentPt, pt1, pt2):
+        if (pt1 == currentPt) or (pt1 == pt2):
+            return []
+        steps = self.steps
+        step = 1.0 / steps
+        return [getQuadraticPoint(factor * step, currentPt, pt1, pt2) for factor in range(1, steps)]
+
+
 # =========
 # = tests =
 # =========
@@ -302,6 +635,104 @@ def _testFlattenGlyph():
     pen.closePath()
     """
 
+
+def _testFlattenPenComponents():
+    """
+    >>> from fontPens.printPen import PrintPen
+    >>> from fontTools.pens.recordingPen import RecordingPen, DecomposingRecordingPen
+    >>> glyphSet = {"base": _makeTestGlyphWithCurve()}
+    >>> componentCache = {}
+    >>> pen = FlattenPen(PrintPen(), approximateSegmentLength=200, glyphSet=glyphSet, componentCache=componentCache)
+    >>> pen.addComponent("base", (1, 0, 0, 1, 0, 0))
+    pen.moveTo((84, 37))
+    pen.lineTo((348, 37))
+    pen.lineTo((348, 300))
+    pen.lineTo((84, 300))
+    pen.lineTo((84, 37))
+    pen.closePath()
+    >>> pen.addComponent("base", (.5, 0, 0, .5, 10, 0))
+    pen.moveTo((52.0, 18.5))
+    pen.lineTo((184.0, 18.5))
+    pen.lineTo((184.0, 150.0))
+    pen.lineTo((52.0, 150.0))
+    pen.lineTo((52.0, 18.5))
+    pen.closePath()
+    >>> list(componentCache)
+    [('base', 'FlattenPen', 200, False, True)]
+
+    The cached base glyph gives the same result as the decomposed outline,
+    for components that aren't scaled.
+
+    >>> decomposer = DecomposingRecordingPen(glyphSet)
+    >>> decomposer.addComponent("base", (1, 0, 0, 1, 10, 20))
+    >>> decomposed = RecordingPen()
+    >>> decomposer.replay(SamplingPen(decomposed, steps=4))
+    >>> cached = RecordingPen()
+    >>> SamplingPen(cached, steps=4, glyphSet=glyphSet).addComponent("base", (1, 0, 0, 1, 10, 20))
+    >>> cached.value == decomposed.value
+    True
+
+    Components stay components without a glyph set or with keepComponents.
+
+    >>> FlattenPen(PrintPen(), glyphSet=glyphSet, keepComponents=True).addComponent("base", (1, 0, 0, 1, 10, 20))
+    pen.addComponent('base', (1, 0, 0, 1, 10, 20))
+    >>> FlattenPen(PrintPen(), glyphSet=glyphSet).addComponent("missing", (1, 0, 0, 1, 10, 20))
+    """
+
+
+def _testFlattenPointPen():
+    """
+    >>> from fontPens.printPointPen import PrintPointPen
+    >>> pen = FlattenPointPen(PrintPointPen(), approximateSegmentLength=150)
+    >>> pen.beginPath()
+    pen.beginPath()
+    >>> pen.addPoint((84, 37), "line")
+    >>> pen.addPoint((348, 37), "line", name="corner")
+    >>> pen.addPoint((348, 300), "line", identifier="point1")
+    >>> pen.addPoint((265, 350.0))
+    >>> pen.addPoint((177, 350.0))
+    >>> pen.addPoint((84, 300), "curve")
+    >>> pen.endPath()
+    pen.addPoint((84, 37), segmentType='line')
+    pen.addPoint((348, 37), segmentType='line', name='corner')
+    pen.addPoint((348, 300), segmentType='line', identifier='point1')
+    pen.addPoint((219.75, 337.5), segmentType='line')
+    pen.addPoint((84, 300), segmentType='line')
+    pen.endPath()
+
+    Open contours stay open.
+
+    >>> pen = SamplingPointPen(PrintPointPen(), steps=2)
+    >>> pen.beginPath(identifier="contour1")
+    pen.beginPath(identifier='contour1')
+    >>> pen.addPoint((0, 0), "move", name="start")
+    >>> pen.addPoint((0, 50))
+    >>> pen.addPoint((50, 100))
+    >>> pen.addPoint((100, 100), "curve", smooth=True)
+    >>> pen.endPath()
+    pen.addPoint((0, 0), segmentType='move', name='start')
+    pen.addPoint((31.25, 68.75), segmentType='line')
+    pen.addPoint((100, 100), segmentType='line', smooth=True)
+    pen.endPath()
+
+    A point dropped by filterDoubles leaves its attributes to the point that stays.
+
+    >>> pen = FlattenPointPen(PrintPointPen())
+    >>> pen.beginPath()
+    pen.beginPath()
+    >>> pen.addPoint((0, 0), "line")
+    >>> pen.addPoint((0, 100), "line", name="top")
+    >>> pen.addPoint((0, 100), "line", name="double", identifier="point2", smooth=True)
+    >>> pen.addPoint((100, 100), "line")
+    >>> pen.addPoint((0, 0), "line", name="end", identifier="point4")
+    >>> pen.endPath()
+    pen.addPoint((0, 0), segmentType='line', name='end', identifier='point4')
+    pen.addPoint((0, 100), segmentType='line', smooth=True, name='top', identifier='point2')
+    pen.addPoint((100, 100), segmentType='line')
+    pen.endPath()
+    """
+
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
@@ -0,0 +1,355 @@
+"""
+Draw .glif files straight into pens, without building glyph objects.
+
+    glyphSet = GlifGlyphSet(getLayerPath("Regular.ufo"))
+    for glyph in glyphSet.iterGlyphs():
+        pen = DigestPointPen()
+        glyph.drawPoints(pen)
+
+Only what the pens need is read from a .glif file: the name, the advance,
+the unicodes and the outline. Anchors, guidelines, images, notes and the
+glyph lib are skipped. Use fontTools.ufoLib or fontParts to read or write
+complete glyphs.
+"""
+import os
+import plistlib
+from xml.etree.ElementTree import fromstring
+
+
+_defaultLayerDirectory = "glyphs"
+
+# the component attributes in the order of the transformation
+_transformationAttributes = (
+    ("xScale", 1), ("xyScale", 0), ("yxScale", 0), ("yScale", 1), ("xOffset", 0), ("yOffset", 0),
+)
+
+
+def _number(value):
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def _drawContour(contour, pointPen, formatVersion):
+    points = [element for element in contour if element.tag == "point"]
+    if formatVersion < 2 and len(points) == 1 and points[0].get("type") == "move":
+        # an anchor in format 1
+        return
+    identifier = contour.get("identifier")
+    if identifier is None:
+        pointPen.beginPath()
+    else:
+        pointPen.beginPath(identifier=identifier)
+    addPoint = pointPen.addPoint
+    number = _number
+    for point in points:
+        attrib = point.attrib
+        get = attrib.get
+        segmentType = get("type")
+        if segmentType == "offcurve":
+            segmentType = None
+        pt = number(attrib["x"]), number(attrib["y"])
+        identifier = get("identifier")
+        if identifier is None:
+            addPoint(pt, segmentType, get("smooth") == "yes", get("name"))
+        else:
+            addPoint(pt, segmentType, get("smooth") == "yes", get("name"), identifier=identifier)
+    pointPen.endPath()
+
+
+def _drawComponent(component, pointPen):
+    attrib = component.attrib
+    transformation = tuple(
+        _number(attrib[attr]) if attr in attrib else default for attr, default in _transformationAttributes)
+    identifier = attrib.get("identifier")
+    if identifier is None:
+        pointPen.addComponent(attrib["base"], transformation)
+    else:
+        pointPen.addComponent(attrib["base"], transformation, identifier=identifier)
+
+
+class GlifGlyph(object):
+    """
+    A glyph read from .glif data, with the attributes the pens need.
+
+    - name: the glyph name.
+    - width, height: the advance.
+    - unicodes: a list of code points.
+
+    draw() and drawPoints() draw the outline, parsed once, into a segment
+    pen or a point pen.
+    """
+
+    __slots__ = ("name", "width", "height", "unicodes", "_outline", "_formatVersion")
+
+    def __init__(self, data):
+        root = fromstring(data)
+        if root.tag != "glyph":
+            raise ValueError("not a glif file, the root element is %r" % root.tag)
+        self.name = root.get("name")
+        self._formatVersion = int(root.get("format", "1").split(".")[0])
+        self.width = 0
+        self.height = 0
+        self.unicodes = []
+        self._outline = None
+        for element in root:
+            tag = element.tag
+            if tag == "outline":
+                self._outline = element
+            elif tag == "advance":
+                self.width = _number(element.get("width", "0"))
+                self.height = _number(element.get("height", "0"))
+            elif tag == "unicode":
+                value = int(element.get("hex"), 16)
+                if value not in self.unicodes:
+                    self.unicodes.append(value)
+
+    def __repr__(self):
+        return "<%s %r>" % (self.__class__.__name__, self.name)
+
+    def drawPoints(self, pointPen):
+        if self._outline is None:
+            return
+        formatVersion = self._formatVersion
+        for element in self._outline:
+            if element.tag == "contour":
+                _drawContour(element, pointPen, formatVersion)
+            elif element.tag == "component":
+                _drawComponent(element, pointPen)
+
+    def draw(self, pen):
+        from fontTools.pens.pointPen import PointToSegmentPen
+        self.drawPoints(PointToSegmentPen(pen))
+
+
+def drawGlif(data, pen=None, pointPen=None):
+    """
+    Draw the outline of .glif data into a segment pen or a point pen
+    and return the GlifGlyph.
+    """
+    glyph = GlifGlyph(data)
+    if pointPen is not None:
+        glyph.drawPoints(pointPen)
+    if pen is not None:
+        glyph.draw(pen)
+    return glyph
+
+
+def getLayerPath(ufoPath, layerName=None):
+    """
+    Return the path of the glyphs folder of a layer of a UFO,
+    the default layer when layerName is None.
+    """
+    layerContentsPath = os.path.join(ufoPath, "layercontents.plist")
+    if not os.path.exists(layerContentsPath):
+        # UFO 2 only has the default layer
+        if layerName is not None and layerName != "public.default":
+            raise KeyError(layerName)
+        return os.path.join(ufoPath, _defaultLayerDirectory)
+    with open(layerContentsPath, "rb") as f:
+        layerContents = plistlib.load(f)
+    for name, directory in layerContents:
+        if layerName is None:
+            if directory == _defaultLayerDirectory:
+                return os.path.join(ufoPath, directory)
+        elif name == layerName:
+            return os.path.join(ufoPath, directory)
+    raise KeyError(layerName)
+
+
+class GlifGlyphSet(object):
+    """
+    The glyphs in a layer folder of a UFO, read from their .glif files on
+    demand. It can be given as glyph set to the pens that draw components,
+    like MarginPen.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "contents.plist"), "rb") as f:
+            self.contents = plistlib.load(f)
+
+    def keys(self):
+        return list(self.contents.keys())
+
+    def __contains__(self, glyphName):
+        return glyphName in self.contents
+
+    def __len__(self):
+        return len(self.contents)
+
+    def __iter__(self):
+        return iter(self.contents)
+
+    def getGLIF(self, glyphName):
+        with open(os.path.join(self.path, self.contents[glyphName]), "rb") as f:
+            return f.read()
+
+    def __getitem__(self, glyphName):
+        return GlifGlyph(self.getGLIF(glyphName))
+
+    def get(self, glyphName, default=None):
+        if glyphName not in self.contents:
+            return default
+        return self[glyphName]
+
+    def readGlyph(self, glyphName, glyphObject=None, pointPen=None):
+        """
+        Like fontTools.ufoLib.glifLib.GlyphSet.readGlyph(): set the name,
+        width, height and unicodes of glyphObject and draw into pointPen.
+        """
+        glyph = self[glyphName]
+        if glyphObject is not None:
+            for attr in ("name", "width", "height", "unicodes"):
+                setattr(glyphObject, attr, getattr(glyph, attr))
+        if pointPen is not None:
+            glyph.drawPoints(pointPen)
+
+    def iterGlyphs(self, glyphNames=None):
+        """
+        Yield the glyphs of glyphNames, all glyphs when omitted, one at a time.
+        """
+        if glyphNames is None:
+            glyphNames = self.contents.keys()
+        for glyphName in glyphNames:
+            yield self[glyphName]
+
+
+def _mapChunk(job):
+    function, path, glyphNames = job
+    glyphSet = GlifGlyphSet(path)
+    return [(glyphName, function(glyphSet[glyphName], glyphSet)) for glyphName in glyphNames]
+
+
+def mapGlifGlyphs(function, path, glyphNames=None, workers=None, chunkSize=64):
+    """
+    Call function(glyph, glyphSet) for the glyphs of glyphNames in the
+    layer folder path, all glyphs when omitted, and yield (glyphName, result)
+    tuples in order.
+
+    The .glif files are read and the function is called in a pool of worker
+    processes, function must be importable from the workers. With workers=1
+    all is done in this process.
+    """
+    if glyphNames is None:
+        glyphNames = GlifGlyphSet(path).keys()
+    glyphNames = list(glyphNames)
+    jobs = [(function, path, glyphNames[i:i + chunkSize]) for i in range(0, len(glyphNames), chunkSize)]
+    if workers == 1:
+        for job in jobs:
+            for result in _mapChunk(job):
+                yield result
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(_mapChunk, jobs):
+            for result in results:
+                yield result
+
+
+# =========
+# = tests =
+# =========
+
+_testGlif = """<?xml version="1.0" encoding="UTF-8"?>
+<glyph name="a" format="2">
+  <advance width="400"/>
+  <unicode hex="0061"/>
+  <anchor x="200" y="400" name="top"/>
+  <outline>
+    <contour identifier="contour1">
+      <point x="100" y="0" type="line"/>
+      <point x="300" y="0" type="line" name="corner"/>
+      <point x="300" y="200"/>
+      <point x="300" y="300"/>
+      <point x="200" y="400.5" type="curve" smooth="yes" identifier="point1"/>
+    </contour>
+    <component base="b" xOffset="10" identifier="component1"/>
+  </outline>
+  <lib>
+    <dict>
+      <key>com.example</key>
+      <string>skipped</string>
+    </dict>
+  </lib>
+</glyph>
+"""
+
+
+def _testDrawGlif():
+    """
+    >>> from fontTools.pens.pointPen import PointToSegmentPen
+    >>> from fontTools.pens.recordingPen import RecordingPen
+    >>> from fontTools.ufoLib.glifLib import readGlyphFromString
+    >>> from fontPens.recordingPointPen import RecordingPointPen
+    >>> recorder = RecordingPointPen()
+    >>> glyph = drawGlif(_testGlif, pointPen=recorder)
+    >>> glyph, glyph.width, glyph.unicodes
+    (<GlifGlyph 'a'>, 400, [97])
+    >>> for operator, args, kwargs in recorder.value:
+    ...     print(operator, args, sorted(kwargs.items()))
+    beginPath () [('identifier', 'contour1')]
+    addPoint ((100, 0), 'line', False, None) []
+    addPoint ((300, 0), 'line', False, 'corner') []
+    addPoint ((300, 200), None, False, None) []
+    addPoint ((300, 300), None, False, None) []
+    addPoint ((200, 400.5), 'curve', True, None) [('identifier', 'point1')]
+    endPath () []
+    addComponent ('b', (1, 0, 0, 1, 10, 0)) [('identifier', 'component1')]
+
+    The outline is the same as read by fontTools.
+
+    >>> pen = RecordingPen()
+    >>> glyph.draw(pen)
+    >>> otherPen = RecordingPen()
+    >>> readGlyphFromString(_testGlif, pointPen=PointToSegmentPen(otherPen))
+    >>> pen.value == otherPen.value
+    True
+    """
+
+
+def _testGlifGlyphSet():
+    """
+    >>> import shutil, tempfile
+    >>> from fontPens.batch import _makeTestUFO
+    >>> from fontPens.marginPen import MarginPen
+    >>> tempDir = tempfile.mkdtemp()
+    >>> ufoPath = os.path.join(tempDir, "Test.ufo")
+    >>> _makeTestUFO(ufoPath)
+    >>> glyphSet = GlifGlyphSet(getLayerPath(ufoPath))
+    >>> sorted(glyphSet.keys()), "a" in glyphSet
+    (['a', 'b'], True)
+    >>> [(glyph.name, glyph.width) for glyph in glyphSet.iterGlyphs(["b", "a"])]
+    [('b', 400), ('a', 400)]
+
+    Components are drawn from the glyph set.
+
+    >>> pen = MarginPen(glyphSet, 200)
+    >>> glyphSet["b"].draw(pen)
+    >>> pen.getMargins()
+    (110.0, 303.4096)
+    >>> getLayerPath(ufoPath, "background")
+    Traceback (most recent call last):
+        ...
+    KeyError: 'background'
+
+    In worker processes:
+
+    >>> results = mapGlifGlyphs(_countPoints, glyphSet.path, workers=2, chunkSize=1)
+    >>> sorted(results)
+    [('a', 6), ('b', 0)]
+    >>> shutil.rmtree(tempDir)
+    """
+
+
+def _countPoints(glyph, glyphSet):
+    from fontTools.pens.recordingPen import RecordingPointPen
+    recorder = RecordingPointPen()
+    glyph.drawPoints(recorder)
+    return sum(1 for operator, args, kwargs in recorder.value if operator == "addPoint")
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
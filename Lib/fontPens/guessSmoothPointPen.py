@@ -1,7 +1,131 @@
 import math
+from array import array
+
 from fontTools.pens.pointPen import AbstractPointPen
 
 
+_segmentTypes = (None, "move", "line", "curve", "qcurve")
+_segmentTypeCodes = {segmentType: code for code, segmentType in enumerate(_segmentTypes)}
+# the code of any other segment type, kept on the side
+_OTHER = len(_segmentTypes)
+
+
+def _smoothTolerance(error):
+    """
+    Precompute the tolerance for the smoothness test: two vectors are within
+    `error` radians of each other when their dot product is larger than
+    cos(error) times the product of their lengths. Returned as the squared
+    cosine and its sign, so the test can be done without sqrt or trig calls.
+    """
+    cosError = math.cos(error)
+    return cosError * cosError, cosError >= 0
+
+
+def _guessSmoothFlags(coordinates, segmentTypes, isOpen, tolerance, flags):
+    # sets the smooth flags in place, flags must be as long as segmentTypes
+    nPoints = len(segmentTypes)
+    if isOpen:
+        indices = range(1, nPoints - 1)
+    elif nPoints > 1:
+        # Closed path. To avoid having to mod the contour index, we
+        # simply abuse Python's negative index feature, and start at -1
+        indices = range(-1, nPoints - 1)
+    else:
+        # closed path containing 1 point (!), ignore.
+        return
+    cosError2, cosErrorPositive = tolerance
+    for i in indices:
+        if not segmentTypes[i]:
+            continue
+        prev = i - 1
+        next = i + 1
+        if segmentTypes[prev] and segmentTypes[next]:
+            continue
+        # At least one of our neighbors is an off-curve point
+        x = coordinates[2 * i]
+        y = coordinates[2 * i + 1]
+        dx1 = x - coordinates[2 * prev]
+        dy1 = y - coordinates[2 * prev + 1]
+        dx2 = coordinates[2 * next] - x
+        dy2 = coordinates[2 * next + 1] - y
+        if not (dx1 or dy1) or not (dx2 or dy2):
+            continue
+        dot = dx1 * dx2 + dy1 * dy2
+        lengths2 = (dx1 * dx1 + dy1 * dy1) * (dx2 * dx2 + dy2 * dy2)
+        if cosErrorPositive:
+            smooth = dot > 0 and dot * dot > cosError2 * lengths2
+        else:
+            smooth = dot >= 0 or dot * dot < cosError2 * lengths2
+        if smooth:
+            flags[i] = True
+
+
+def guessSmoothFlags(coordinates, segmentTypes, isOpen=False, error=0.05):
+    """
+    Classify the on-curve points of a whole contour at once, return a list
+    with a smooth flag for every point.
+
+    - coordinates: a flat sequence of x, y values for all points of the contour,
+      for instance an array('d').
+    - segmentTypes: a sequence with a segment type for every point,
+      None (or any false value) for off-curve points.
+    - isOpen: whether the contour is open, ie. starts with a "move" point.
+    - error: the maximum angle in radians between the incoming and outgoing
+      direction for a point to be considered smooth.
+    """
+    flags = [False] * len(segmentTypes)
+    _guessSmoothFlags(coordinates, segmentTypes, isOpen, _smoothTolerance(error), flags)
+    return flags
+
+
+class _ContourBuffer(object):
+    """
+    Structure-of-arrays buffer for the points of a single contour:
+    coordinates in a flat float array, segment types as small codes and
+    names, extra keyword arguments and unusual segment types only for the
+    points that have them.
+
+    The original point objects are kept as well, they are passed on
+    unchanged so ints stay ints.
+    """
+
+    __slots__ = ("points", "coordinates", "segmentTypes", "otherSegmentTypes", "names", "kwargs")
+
+    def __init__(self):
+        self.points = []
+        self.coordinates = array("d")
+        self.segmentTypes = bytearray()
+        self.otherSegmentTypes = {}
+        self.names = {}
+        self.kwargs = {}
+
+    def __len__(self):
+        return len(self.segmentTypes)
+
+    def append(self, pt, segmentType, name, kwargs):
+        index = len(self.segmentTypes)
+        self.points.append(pt)
+        self.coordinates.extend(pt)
+        code = _segmentTypeCodes.get(segmentType)
+        if code is None:
+            # an on-curve point for the smoothness test, like any segment type
+            code = _OTHER
+            self.otherSegmentTypes[index] = segmentType
+        self.segmentTypes.append(code)
+        if name is not None:
+            self.names[index] = name
+        if kwargs:
+            self.kwargs[index] = kwargs
+
+    def clear(self):
+        del self.points[:]
+        del self.coordinates[:]
+        del self.segmentTypes[:]
+        self.otherSegmentTypes.clear()
+        self.names.clear()
+        self.kwargs.clear()
+
+
 class GuessSmoothPointPen(AbstractPointPen):
     """
     Filtering PointPen that tries to determine whether an on-curve point
@@ -11,61 +135,59 @@ class GuessSmoothPointPen(AbstractPointPen):
     def __init__(self, outPen, error=0.05):
         self._outPen = outPen
         self._error = error
-        self._points = None
+        self._tolerance = _smoothTolerance(error)
+        # the buffer is reused for every contour
+        self._buffer = _ContourBuffer()
+        self._contour = None
+
+    def reset(self):
+        """
+        Drop an unfinished contour, to draw another glyph with this pen.
+        """
+        self._buffer.clear()
+        self._contour = None
 
     def _flushContour(self):
-        points = self._points
-        nPoints = len(points)
+        contour = self._contour
+        nPoints = len(contour)
         if not nPoints:
             return
-        if points[0][1] == "move":
-            # Open path.
-            indices = range(1, nPoints - 1)
-        elif nPoints > 1:
-            # Closed path. To avoid having to mod the contour index, we
-            # simply abuse Python's negative index feature, and start at -1
-            indices = range(-1, nPoints - 1)
-        else:
-            # closed path containing 1 point (!), ignore.
-            indices = []
-        for i in indices:
-            pt, segmentType, dummy, name, kwargs = points[i]
-            if segmentType is None:
-                continue
-            prev = i - 1
-            next = i + 1
-            if points[prev][1] is not None and points[next][1] is not None:
-                continue
-            # At least one of our neighbors is an off-curve point
-            pt = points[i][0]
-            prevPt = points[prev][0]
-            nextPt = points[next][0]
-            if pt != prevPt and pt != nextPt:
-                dx1, dy1 = pt[0] - prevPt[0], pt[1] - prevPt[1]
-                dx2, dy2 = nextPt[0] - pt[0], nextPt[1] - pt[1]
-                a1 = math.atan2(dx1, dy1)
-                a2 = math.atan2(dx2, dy2)
-                if abs(a1 - a2) < self._error:
-                    points[i] = pt, segmentType, True, name, kwargs
-
-        for pt, segmentType, smooth, name, kwargs in points:
-            self._outPen.addPoint(pt, segmentType, smooth, name, **kwargs)
+        segmentTypes = contour.segmentTypes
+        smooth = bytearray(nPoints)
+        isOpen = segmentTypes[0] == _segmentTypeCodes["move"]
+        _guessSmoothFlags(contour.coordinates, segmentTypes, isOpen, self._tolerance, smooth)
+        addPoint = self._outPen.addPoint
+        points = contour.points
+        otherSegmentTypes = contour.otherSegmentTypes
+        names = contour.names
+        kwargs = contour.kwargs
+        for i in range(nPoints):
+            code = segmentTypes[i]
+            if code == _OTHER:
+                segmentType = otherSegmentTypes[i]
+            else:
+                segmentType = _segmentTypes[code]
+            if i in kwargs:
+                addPoint(points[i], segmentType, bool(smooth[i]), names.get(i), **kwargs[i])
+            else:
+                addPoint(points[i], segmentType, bool(smooth[i]), names.get(i))
 
     def beginPath(self, identifier=None):
-        assert self._points is None
-        self._points = []
+        assert self._contour is None
+        self._contour = self._buffer
         self._outPen.beginPath(identifier)
 
     def endPath(self):
         self._flushContour()
         self._outPen.endPath()
-        self._points = None
+        self._contour.clear()
+        self._contour = None
 
     def addPoint(self, pt, segmentType=None, smooth=False, name=None, **kwargs):
-        self._points.append((pt, segmentType, False, name, kwargs))
+        self._contour.append(pt, segmentType, name, kwargs)
 
     def addComponent(self, glyphName, transformation, identifier=None):
-        assert self._points is None
+        assert self._contour is None
         self._outPen.addComponent(glyphName, transformation, identifier)
 
 
@@ -106,6 +228,72 @@ def _testGuessSmoothPointPen():
 
     >>> pen.addComponent("a", (1, 0, 0, 1, 10, 10), "xyz987")
     pen.addComponent('a', (1, 0, 0, 1, 10, 10), identifier='xyz987')
+
+    >>> pen.beginPath()
+    pen.beginPath()
+    >>> pen.addPoint((0, 0), "line", name="start", identifier="p1")
+    >>> pen.addPoint((0, 100), "line", smooth=True)
+    >>> pen.endPath()
+    pen.addPoint((0, 0), segmentType='line', name='start', identifier='p1')
+    pen.addPoint((0, 100), segmentType='line')
+    pen.endPath()
+
+    Other segment types are passed on as they are.
+
+    >>> pen.beginPath()
+    pen.beginPath()
+    >>> pen.addPoint((0, 0), "line")
+    >>> pen.addPoint((0, 100), "spline")
+    >>> pen.addPoint((0, 200))
+    >>> pen.endPath()
+    pen.addPoint((0, 0), segmentType='line')
+    pen.addPoint((0, 100), segmentType='spline', smooth=True)
+    pen.addPoint((0, 200))
+    pen.endPath()
+    """
+
+
+def _testGuessSmoothPointPenClosed():
+    """
+    >>> from fontPens.printPointPen import PrintPointPen
+    >>> pen = GuessSmoothPointPen(PrintPointPen())
+
+    The first point of a closed contour wraps around to the last one,
+    the smoothness test works across the +/- pi direction boundary.
+
+    >>> pen.beginPath()
+    pen.beginPath()
+    >>> pen.addPoint((0, 0), "curve")
+    >>> pen.addPoint((-1, -100))
+    >>> pen.addPoint((-100, -100))
+    >>> pen.addPoint((-100, 0), "curve")
+    >>> pen.addPoint((-100, 100))
+    >>> pen.addPoint((-1, 100))
+    >>> pen.endPath()
+    pen.addPoint((0, 0), segmentType='curve', smooth=True)
+    pen.addPoint((-1, -100))
+    pen.addPoint((-100, -100))
+    pen.addPoint((-100, 0), segmentType='curve', smooth=True)
+    pen.addPoint((-100, 100))
+    pen.addPoint((-1, 100))
+    pen.endPath()
+    """
+
+
+def _testGuessSmoothFlags():
+    """
+    >>> from array import array
+    >>> coordinates = array("d", [10, 100, 10, 200, 8, 300, 10, 400, 10, 500])
+    >>> guessSmoothFlags(coordinates, ["move", None, None, "curve", None], isOpen=True)
+    [False, False, False, True, False]
+    >>> guessSmoothFlags(coordinates, ["move", None, None, "curve", None], isOpen=True, error=0.01)
+    [False, False, False, False, False]
+    >>> guessSmoothFlags(coordinates, ["line", None, None, "curve", None])
+    [False, False, False, True, False]
+    >>> guessSmoothFlags(array("d", [0, 0, 10, 0, 0, 10]), ["curve", None, None], error=2)
+    [True, False, False]
+    >>> guessSmoothFlags(array("d", [0, 0]), ["curve"])
+    [False]
     """
 
 
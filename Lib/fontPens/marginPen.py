@@ -17,12 +17,19 @@ class MarginPen(BasePen):
     def __init__(self, glyphSet, value, isHorizontal=True):
         BasePen.__init__(self, glyphSet)
         self.value = value
-        self.hits = {}
         self.filterDoubles = True
+        self.isHorizontal = isHorizontal
+        self.reset()
+
+    def reset(self):
+        """
+        Forget all hits, to measure another glyph with this pen.
+        Set value and isHorizontal to measure somewhere else.
+        """
+        self.hits = {}
         self.contourIndex = None
         self.startPt = None
         self.currentPt = None
-        self.isHorizontal = isHorizontal
 
     def _moveTo(self, pt):
         self.currentPt = pt
@@ -33,55 +40,49 @@ class MarginPen(BasePen):
             self.contourIndex += 1
 
     def _lineTo(self, pt):
+        currentPt = self.currentPt
         if self.filterDoubles:
-            if pt == self.currentPt:
+            if pt == currentPt:
                 return
-        hits = splitLine(self.currentPt, pt, self.value, self.isHorizontal)
+        value = self.value
+        isHorizontal = self.isHorizontal
+        hits = splitLine(currentPt, pt, value, isHorizontal)
         if len(hits) > 1:
             # result will be 2 tuples of 2 coordinates
             # first two points: start to intersect
             # second two points: intersect to end
             # so, second point in first tuple is the intersect
             # then, the first coordinate of that point is the x.
-            if self.contourIndex not in self.hits:
-                self.hits[self.contourIndex] = []
-            if self.isHorizontal:
-                self.hits[self.contourIndex].append(round(hits[0][-1][0], 4))
+            contourHits = self.hits.setdefault(self.contourIndex, [])
+            if isHorizontal:
+                contourHits.append(round(hits[0][-1][0], 4))
             else:
-                self.hits[self.contourIndex].append(round(hits[0][-1][1], 4))
-        if self.isHorizontal and pt[1] == self.value:
+                contourHits.append(round(hits[0][-1][1], 4))
+        if isHorizontal and pt[1] == value:
             # it could happen
-            if self.contourIndex not in self.hits:
-                self.hits[self.contourIndex] = []
-            self.hits[self.contourIndex].append(pt[0])
-        elif (not self.isHorizontal) and (pt[0] == self.value):
+            self.hits.setdefault(self.contourIndex, []).append(pt[0])
+        elif (not isHorizontal) and (pt[0] == value):
             # it could happen
-            if self.contourIndex not in self.hits:
-                self.hits[self.contourIndex] = []
-            self.hits[self.contourIndex].append(pt[1])
+            self.hits.setdefault(self.contourIndex, []).append(pt[1])
         self.currentPt = pt
 
     def _curveToOne(self, pt1, pt2, pt3):
-        hits = splitCubic(self.currentPt, pt1, pt2, pt3, self.value, self.isHorizontal)
-        for i in range(len(hits) - 1):
+        value = self.value
+        isHorizontal = self.isHorizontal
+        hits = splitCubic(self.currentPt, pt1, pt2, pt3, value, isHorizontal)
+        if len(hits) > 1:
             # a number of intersections is possible. Just take the
             # last point of each segment.
-            if self.contourIndex not in self.hits:
-                self.hits[self.contourIndex] = []
-            if self.isHorizontal:
-                self.hits[self.contourIndex].append(round(hits[i][-1][0], 4))
-            else:
-                self.hits[self.contourIndex].append(round(hits[i][-1][1], 4))
-        if self.isHorizontal and pt3[1] == self.value:
+            contourHits = self.hits.setdefault(self.contourIndex, [])
+            coordinateIndex = 0 if isHorizontal else 1
+            for i in range(len(hits) - 1):
+                contourHits.append(round(hits[i][-1][coordinateIndex], 4))
+        if isHorizontal and pt3[1] == value:
             # it could happen
-            if self.contourIndex not in self.hits:
-                self.hits[self.contourIndex] = []
-            self.hits[self.contourIndex].append(pt3[0])
-        if (not self.isHorizontal) and (pt3[0] == self.value):
+            self.hits.setdefault(self.contourIndex, []).append(pt3[0])
+        if (not isHorizontal) and (pt3[0] == value):
             # it could happen
-            if self.contourIndex not in self.hits:
-                self.hits[self.contourIndex] = []
-            self.hits[self.contourIndex].append(pt3[1])
+            self.hits.setdefault(self.contourIndex, []).append(pt3[1])
         self.currentPt = pt3
 
     def _closePath(self):
@@ -157,6 +158,23 @@ def _testMarginPen():
     """
 
 
+def _testMarginPenReset():
+    """
+    >>> glyph = _makeTestGlyph()
+    >>> pen = MarginPen(dict(), 200, isHorizontal=True)
+    >>> glyph.draw(pen)
+    >>> pen.reset()
+    >>> pen.getAll()
+    []
+    >>> pen.value = 500
+    >>> glyph.draw(pen)
+    >>> pen.getAll()
+    [114.9861, 900.0]
+    >>> pen.getContourMargins()
+    {0: [114.9861, 900.0]}
+    """
+
+
 def _makeTestFont():
     # make a simple glyph that we can test the pens with.
     from fontParts.fontshell import RFont
@@ -0,0 +1,429 @@
+"""
+A uniform grid over the flattened segments of a glyph, for distance and hit queries.
+
+    index = indexGlyph(glyph, glyphSet=font)
+    index.distance((250, 300))
+    index.minimumDistance(otherIndex, offset=(glyph.width + kerning, 0), stopDistance=20)
+
+Each segment is kept in the grid cells its bounding box covers, a query
+only looks at the segments in the cells around it.
+"""
+from math import floor, hypot
+
+from fontTools.pens.basePen import BasePen
+
+from fontPens.flattenPen import FlattenPen
+
+
+class _SegmentCollector(BasePen):
+    """
+    Collects the straight segments drawn by a FlattenPen.
+    """
+
+    def __init__(self):
+        BasePen.__init__(self, None)
+        self.segments = []
+        self.currentPt = None
+        self.firstPt = None
+
+    def _moveTo(self, pt):
+        self.currentPt = self.firstPt = tuple(pt)
+
+    def _lineTo(self, pt):
+        pt = tuple(pt)
+        if pt != self.currentPt:
+            self.segments.append((self.currentPt, pt))
+        self.currentPt = pt
+
+    def _closePath(self):
+        if self.currentPt != self.firstPt:
+            self.segments.append((self.currentPt, self.firstPt))
+        self.currentPt = None
+
+    def _endPath(self):
+        self.currentPt = None
+
+    def addComponent(self, glyphName, transformation):
+        # without a glyph set for the FlattenPen components can't be drawn
+        pass
+
+
+def _pointSegmentDistance(x, y, segment):
+    (x0, y0), (x1, y1) = segment
+    dx = x1 - x0
+    dy = y1 - y0
+    length = dx * dx + dy * dy
+    if length:
+        t = ((x - x0) * dx + (y - y0) * dy) / length
+        if t < 0:
+            t = 0
+        elif t > 1:
+            t = 1
+        cx = x0 + t * dx
+        cy = y0 + t * dy
+    else:
+        cx, cy = x0, y0
+    return hypot(x - cx, y - cy), (cx, cy)
+
+
+def _cross(ox, oy, ax, ay, bx, by):
+    return (ax - ox) * (by - oy) - (ay - oy) * (bx - ox)
+
+
+def _segmentsIntersect(segment, otherSegment):
+    (ax, ay), (bx, by) = segment
+    (cx, cy), (dx, dy) = otherSegment
+    if max(ax, bx) < min(cx, dx) or max(cx, dx) < min(ax, bx):
+        return False
+    if max(ay, by) < min(cy, dy) or max(cy, dy) < min(ay, by):
+        return False
+    d1 = _cross(cx, cy, dx, dy, ax, ay)
+    d2 = _cross(cx, cy, dx, dy, bx, by)
+    d3 = _cross(ax, ay, bx, by, cx, cy)
+    d4 = _cross(ax, ay, bx, by, dx, dy)
+    if ((d1 > 0 and d2 < 0) or (d1 < 0 and d2 > 0)) and ((d3 > 0 and d4 < 0) or (d3 < 0 and d4 > 0)):
+        return True
+    # touching or collinear, the bounding boxes overlap
+    return (d1 == 0 or d2 == 0 or d3 == 0 or d4 == 0) and (
+        (d1 == 0 and d2 == 0) or
+        _pointSegmentDistance(ax, ay, otherSegment)[0] == 0 or
+        _pointSegmentDistance(bx, by, otherSegment)[0] == 0 or
+        _pointSegmentDistance(cx, cy, segment)[0] == 0 or
+        _pointSegmentDistance(dx, dy, segment)[0] == 0)
+
+
+def _segmentDistance(segment, otherSegment):
+    if _segmentsIntersect(segment, otherSegment):
+        return 0.0
+    (ax, ay), (bx, by) = segment
+    (cx, cy), (dx, dy) = otherSegment
+    return min(
+        _pointSegmentDistance(ax, ay, otherSegment)[0],
+        _pointSegmentDistance(bx, by, otherSegment)[0],
+        _pointSegmentDistance(cx, cy, segment)[0],
+        _pointSegmentDistance(dx, dy, segment)[0],
+    )
+
+
+def _segmentOverlapsBox(segment, box):
+    # Liang-Barsky clipping of the segment against the box
+    (x0, y0), (x1, y1) = segment
+    xMin, yMin, xMax, yMax = box
+    dx = x1 - x0
+    dy = y1 - y0
+    t0 = 0.0
+    t1 = 1.0
+    for p, q in ((-dx, x0 - xMin), (dx, xMax - x0), (-dy, y0 - yMin), (dy, yMax - y0)):
+        if p == 0:
+            if q < 0:
+                return False
+            continue
+        t = q / p
+        if p < 0:
+            if t > t1:
+                return False
+            if t > t0:
+                t0 = t
+        else:
+            if t < t0:
+                return False
+            if t < t1:
+                t1 = t
+    return True
+
+
+def _boxDistance(box, otherBox):
+    xMin, yMin, xMax, yMax = box
+    otherXMin, otherYMin, otherXMax, otherYMax = otherBox
+    dx = max(otherXMin - xMax, xMin - otherXMax, 0)
+    dy = max(otherYMin - yMax, yMin - otherYMax, 0)
+    return hypot(dx, dy)
+
+
+def _segmentBox(segment):
+    (x0, y0), (x1, y1) = segment
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+class OutlineIndex(object):
+    """
+    A uniform grid over a list of straight segments, ((x0, y0), (x1, y1)) tuples.
+
+    - cellSize: the size of the grid cells, by default four times the
+      average segment length.
+
+    All queries return None for an index without segments.
+    """
+
+    def __init__(self, segments, cellSize=None):
+        self.segments = list(segments)
+        self.bounds = None
+        self._cells = {}
+        if not self.segments:
+            self.cellSize = cellSize
+            return
+        xs = [x for segment in self.segments for x, y in segment]
+        ys = [y for segment in self.segments for x, y in segment]
+        self.bounds = min(xs), min(ys), max(xs), max(ys)
+        if cellSize is None:
+            averageLength = sum(hypot(x1 - x0, y1 - y0) for (x0, y0), (x1, y1) in self.segments) / len(self.segments)
+            cellSize = 4 * averageLength
+            if not cellSize:
+                xMin, yMin, xMax, yMax = self.bounds
+                cellSize = max(xMax - xMin, yMax - yMin, 1)
+        self.cellSize = cellSize
+        cells = self._cells
+        for index, segment in enumerate(self.segments):
+            iMin, jMin, iMax, jMax = self._cellRange(_segmentBox(segment))
+            for i in range(iMin, iMax + 1):
+                for j in range(jMin, jMax + 1):
+                    cell = cells.get((i, j))
+                    if cell is None:
+                        cells[i, j] = [index]
+                    else:
+                        cell.append(index)
+        self._gridRange = self._cellRange(self.bounds)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def _cell(self, x, y):
+        cellSize = self.cellSize
+        return int(floor(x / cellSize)), int(floor(y / cellSize))
+
+    def _cellRange(self, box):
+        xMin, yMin, xMax, yMax = box
+        iMin, jMin = self._cell(xMin, yMin)
+        iMax, jMax = self._cell(xMax, yMax)
+        return iMin, jMin, iMax, jMax
+
+    def _candidates(self, box):
+        # the indexes of the segments in the cells the box covers, each once
+        cells = self._cells
+        gridIMin, gridJMin, gridIMax, gridJMax = self._gridRange
+        iMin, jMin, iMax, jMax = self._cellRange(box)
+        found = set()
+        for i in range(max(iMin, gridIMin), min(iMax, gridIMax) + 1):
+            for j in range(max(jMin, gridJMin), min(jMax, gridJMax) + 1):
+                cell = cells.get((i, j))
+                if cell is not None:
+                    found.update(cell)
+        return found
+
+    def _ring(self, ci, cj, r):
+        # the occupied cells at Chebyshev distance r of cell (ci, cj)
+        cells = self._cells
+        gridIMin, gridJMin, gridIMax, gridJMax = self._gridRange
+        if r == 0:
+            cell = cells.get((ci, cj))
+            if cell is not None:
+                yield cell
+            return
+        iMin = max(ci - r, gridIMin)
+        iMax = min(ci + r, gridIMax)
+        for j in (cj - r, cj + r):
+            if gridJMin <= j <= gridJMax:
+                for i in range(iMin, iMax + 1):
+                    cell = cells.get((i, j))
+                    if cell is not None:
+                        yield cell
+        jMin = max(cj - r + 1, gridJMin)
+        jMax = min(cj + r - 1, gridJMax)
+        for i in (ci - r, ci + r):
+            if gridIMin <= i <= gridIMax:
+                for j in range(jMin, jMax + 1):
+                    cell = cells.get((i, j))
+                    if cell is not None:
+                        yield cell
+
+    def nearestSegment(self, pt, maxDistance=None):
+        """
+        Return the (distance, segment index, nearest point) of the segment
+        nearest to pt, or None when no segment is closer than maxDistance.
+        """
+        if not self.segments:
+            return None
+        x, y = pt
+        ci, cj = self._cell(x, y)
+        gridIMin, gridJMin, gridIMax, gridJMax = self._gridRange
+        # the first ring touching the grid and the ring covering all of it
+        r = max(0, gridIMin - ci, ci - gridIMax, gridJMin - cj, cj - gridJMax)
+        lastRing = max(abs(ci - gridIMin), abs(ci - gridIMax), abs(cj - gridJMin), abs(cj - gridJMax))
+        cellSize = self.cellSize
+        segments = self.segments
+        best = None
+        seen = set()
+        while r <= lastRing:
+            # the cells of this ring are at least r - 1 cells away
+            if best is not None and best[0] <= (r - 1) * cellSize:
+                break
+            if maxDistance is not None and (r - 1) * cellSize > maxDistance:
+                break
+            for cell in self._ring(ci, cj, r):
+                for index in cell:
+                    if index in seen:
+                        continue
+                    seen.add(index)
+                    d, nearest = _pointSegmentDistance(x, y, segments[index])
+                    if best is None or d < best[0]:
+                        best = (d, index, nearest)
+            r += 1
+        if best is not None and maxDistance is not None and best[0] > maxDistance:
+            return None
+        return best
+
+    def distance(self, pt, maxDistance=None):
+        """
+        Return the distance from pt to the outline, or None when the
+        outline is farther than maxDistance.
+        """
+        nearest = self.nearestSegment(pt, maxDistance)
+        if nearest is None:
+            return None
+        return nearest[0]
+
+    def segmentsInBox(self, box):
+        """
+        Return the sorted indexes of the segments overlapping box, a (xMin, yMin, xMax, yMax) tuple.
+        """
+        if not self.segments:
+            return []
+        segments = self.segments
+        return sorted(index for index in self._candidates(box) if _segmentOverlapsBox(segments[index], box))
+
+    def overlapsBox(self, box):
+        """
+        Return whether any segment overlaps box.
+        """
+        if not self.segments:
+            return False
+        segments = self.segments
+        return any(_segmentOverlapsBox(segments[index], box) for index in self._candidates(box))
+
+    def minimumDistance(self, other, offset=(0, 0), maxDistance=None, stopDistance=None):
+        """
+        Return the minimum distance between the outline and the outline of
+        other, another OutlineIndex, moved by offset.
+
+        - maxDistance: only look this far, return None when the outlines are farther apart.
+        - stopDistance: return as soon as a distance at or below this is
+          found, to check for collisions. The result is then at most
+          stopDistance, not necessarily the minimum.
+        """
+        if not self.segments or not other.segments:
+            return None
+        ox, oy = offset
+        otherXMin, otherYMin, otherXMax, otherYMax = other.bounds
+        otherBounds = otherXMin + ox, otherYMin + oy, otherXMax + ox, otherYMax + oy
+        if maxDistance is not None and _boxDistance(self.bounds, otherBounds) > maxDistance:
+            return None
+        best = maxDistance
+        found = None
+        otherSegments = other.segments
+        # the segments closest to the other outline first, for an early small distance
+        order = sorted(
+            (_boxDistance(_segmentBox(segment), otherBounds), segment) for segment in self.segments)
+        for boxDistance, segment in order:
+            if best is not None and boxDistance > best:
+                break
+            (x0, y0), (x1, y1) = segment
+            # the segment in the coordinates of other
+            local = ((x0 - ox, y0 - oy), (x1 - ox, y1 - oy))
+            if best is None:
+                nearest = other.nearestSegment(local[0])
+                best = nearest[0]
+                found = best
+            xMin, yMin, xMax, yMax = _segmentBox(local)
+            box = xMin - best, yMin - best, xMax + best, yMax + best
+            for index in other._candidates(box):
+                d = _segmentDistance(local, otherSegments[index])
+                if d <= best:
+                    best = found = d
+                    if stopDistance is not None and d <= stopDistance:
+                        return d
+        return found
+
+
+def indexGlyph(glyph, approximateSegmentLength=5, glyphSet=None, componentCache=None, cellSize=None):
+    """
+    Flatten glyph with a FlattenPen and return an OutlineIndex of its segments.
+    Components are only drawn when glyphSet is given.
+    """
+    collector = _SegmentCollector()
+    glyph.draw(FlattenPen(
+        collector, approximateSegmentLength=approximateSegmentLength, segmentLines=False,
+        glyphSet=glyphSet, componentCache=componentCache))
+    return OutlineIndex(collector.segments, cellSize=cellSize)
+
+
+# =========
+# = tests =
+# =========
+
+def _makeTestGlyph():
+    from fontParts.fontshell import RGlyph
+    testGlyph = RGlyph()
+    testGlyph.name = "testGlyph"
+    testGlyph.width = 500
+    pen = testGlyph.getPen()
+    pen.moveTo((100, 0))
+    pen.lineTo((300, 0))
+    pen.curveTo((300, 200), (300, 300), (200, 400))
+    pen.lineTo((100, 400))
+    pen.closePath()
+    return testGlyph
+
+
+def _bruteForceDistance(segments, pt):
+    return min(_pointSegmentDistance(pt[0], pt[1], segment)[0] for segment in segments)
+
+
+def _testOutlineIndex():
+    """
+    >>> glyph = _makeTestGlyph()
+    >>> index = indexGlyph(glyph, approximateSegmentLength=20)
+    >>> len(index), index.bounds
+    (24, (100, 0, 300, 400))
+    >>> index.distance((50, 200))
+    50.0
+    >>> distance, segmentIndex, nearest = index.nearestSegment((200, -30))
+    >>> distance, index.segments[segmentIndex], nearest
+    (30.0, ((100, 0), (300, 0)), (200.0, 0.0))
+    >>> index.distance((2000, 2000), maxDistance=100) is None
+    True
+
+    The grid gives the same distances as looking at all segments.
+
+    >>> import random
+    >>> rng = random.Random(1)
+    >>> points = [(rng.uniform(-500, 900), rng.uniform(-500, 900)) for i in range(200)]
+    >>> all(abs(index.distance(pt) - _bruteForceDistance(index.segments, pt)) < 1e-9 for pt in points)
+    True
+
+    >>> index.segmentsInBox((90, -10, 110, 10))
+    [0, 23]
+    >>> index.overlapsBox((150, 150, 200, 200)), index.overlapsBox((290, 100, 310, 120))
+    (False, True)
+    """
+
+
+def _testMinimumDistance():
+    """
+    >>> glyph = _makeTestGlyph()
+    >>> index = indexGlyph(glyph, approximateSegmentLength=20)
+    >>> index.minimumDistance(index, offset=(250, 0))
+    50.0
+    >>> index.minimumDistance(index, offset=(150, 0))
+    0.0
+    >>> index.minimumDistance(index, offset=(250, 0), maxDistance=20) is None
+    True
+    >>> index.minimumDistance(index, offset=(250, 0), stopDistance=60) <= 60
+    True
+    >>> index.minimumDistance(OutlineIndex([])) is None
+    True
+    """
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
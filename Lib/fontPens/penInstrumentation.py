@@ -0,0 +1,369 @@
+from time import perf_counter
+
+from fontTools.pens.basePen import AbstractPen
+from fontTools.pens.pointPen import AbstractPointPen
+
+from fontPens.digestPointPen import DigestPointPen
+
+
+# the attributes filter pens keep their output pen in
+_outPenAttributes = ("otherPen", "otherPointPen", "_outPen")
+
+
+class PenStatistics(object):
+    """
+    The counters of one instrumented pen instance.
+
+    - eventsIn, eventsOut: the number of calls per pen method.
+    - pointsIn, pointsOut, contoursIn, contoursOut, componentsIn, componentsOut:
+      the number of points, contours and components drawn into and by the pen.
+    - totalTime: the time spent in the pen methods, including the output pens.
+    - time: the time spent in the pen itself, excluding the output pens.
+    - cacheHits, cacheMisses: for pens caching results, like DigestPointPen.
+    """
+
+    def __init__(self, pen):
+        self.penClass = pen.__class__.__name__
+        self.eventsIn = {}
+        self.eventsOut = {}
+        self.pointsIn = self.pointsOut = 0
+        self.contoursIn = self.contoursOut = 0
+        self.componentsIn = self.componentsOut = 0
+        self.totalTime = 0.0
+        self.outputTime = 0.0
+        self.cacheHits = self.cacheMisses = 0
+
+    @property
+    def time(self):
+        return self.totalTime - self.outputTime
+
+    def asDict(self):
+        return dict(
+            penClass=self.penClass,
+            eventsIn=dict(self.eventsIn),
+            eventsOut=dict(self.eventsOut),
+            pointsIn=self.pointsIn,
+            pointsOut=self.pointsOut,
+            contoursIn=self.contoursIn,
+            contoursOut=self.contoursOut,
+            componentsIn=self.componentsIn,
+            componentsOut=self.componentsOut,
+            time=self.time,
+            totalTime=self.totalTime,
+            cacheHits=self.cacheHits,
+            cacheMisses=self.cacheMisses,
+        )
+
+
+def _countEvent(source, target, event, points, contours, components):
+    if source is not None:
+        events = source.eventsOut
+        events[event] = events.get(event, 0) + 1
+        source.pointsOut += points
+        source.contoursOut += contours
+        source.componentsOut += components
+    if target is not None:
+        events = target.eventsIn
+        events[event] = events.get(event, 0) + 1
+        target.pointsIn += points
+        target.contoursIn += contours
+        target.componentsIn += components
+
+
+class _Link(object):
+    """
+    Sits between two pens of a chain, counts the events going through
+    and times the calls into the target pen.
+    """
+
+    def __init__(self, pen, source, target):
+        self._pen = pen
+        self._source = source
+        self._target = target
+
+    def _call(self, event, points, contours, components, args, kwargs):
+        source = self._source
+        target = self._target
+        _countEvent(source, target, event, points, contours, components)
+        start = perf_counter()
+        try:
+            return getattr(self._pen, event)(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            if target is not None:
+                target.totalTime += elapsed
+            if source is not None:
+                source.outputTime += elapsed
+
+    def __getattr__(self, attr):
+        # everything else, like getDigest(), goes straight to the pen
+        return getattr(self._pen, attr)
+
+
+class _InstrumentedPen(_Link, AbstractPen):
+
+    def moveTo(self, pt):
+        self._call("moveTo", 1, 0, 0, (pt,), {})
+
+    def lineTo(self, pt):
+        self._call("lineTo", 1, 0, 0, (pt,), {})
+
+    def curveTo(self, *points):
+        self._call("curveTo", len(points), 0, 0, points, {})
+
+    def qCurveTo(self, *points):
+        pointCount = len(points)
+        if points and points[-1] is None:
+            pointCount -= 1
+        self._call("qCurveTo", pointCount, 0, 0, points, {})
+
+    def closePath(self):
+        self._call("closePath", 0, 1, 0, (), {})
+
+    def endPath(self):
+        self._call("endPath", 0, 1, 0, (), {})
+
+    def addComponent(self, glyphName, transformation, **kwargs):
+        self._call("addComponent", 0, 0, 1, (glyphName, transformation), kwargs)
+
+
+class _InstrumentedPointPen(_Link, AbstractPointPen):
+
+    def beginPath(self, *args, **kwargs):
+        self._call("beginPath", 0, 1, 0, args, kwargs)
+
+    def endPath(self):
+        self._call("endPath", 0, 0, 0, (), {})
+
+    def addPoint(self, *args, **kwargs):
+        self._call("addPoint", 1, 0, 0, args, kwargs)
+
+    def addComponent(self, *args, **kwargs):
+        self._call("addComponent", 0, 0, 1, args, kwargs)
+
+
+class _InstrumentedDigestPointPen(_InstrumentedPointPen):
+
+    def _isCached(self, needSort):
+        pen = self._pen
+        cached = pen._pointsOnlyCache.get(needSort)
+        return cached is not None and cached[0] == len(pen._points)
+
+    def _countCache(self, needSort):
+        if self._isCached(needSort):
+            self._target.cacheHits += 1
+        else:
+            self._target.cacheMisses += 1
+
+    def getDigestPointsOnly(self, needSort=True):
+        self._countCache(needSort)
+        return self._pen.getDigestPointsOnly(needSort)
+
+    def getDigestPointsOnlyHash(self, needSort=True):
+        self._countCache(needSort)
+        return self._pen.getDigestPointsOnlyHash(needSort)
+
+
+def _isPointPen(pen):
+    if isinstance(pen, AbstractPointPen):
+        return True
+    if isinstance(pen, AbstractPen):
+        return False
+    return hasattr(pen, "addPoint")
+
+
+def _makeLink(pen, source, target):
+    if target is not None and isinstance(pen, DigestPointPen):
+        return _InstrumentedDigestPointPen(pen, source, target)
+    if _isPointPen(pen):
+        return _InstrumentedPointPen(pen, source, target)
+    return _InstrumentedPen(pen, source, target)
+
+
+class Instrumentation(object):
+    """
+    Opt-in counters and timers for the pens of a chain of filter pens.
+
+        instrumentation = Instrumentation()
+        pen = instrumentation.instrument(FlattenPen(ThresholdPen(recorder)))
+        glyph.draw(pen)
+        report = instrumentation.report()
+
+    instrument() follows the chain through the output pen attributes of
+    the filter pens and puts a counting link between each pair of pens,
+    the output pens of the pens in the chain are replaced by these links.
+    The pens that were not passed through instrument() run untouched,
+    there is no cost when the instrumentation is not used.
+
+    callback, if given, is called with the report when the instrumentation
+    is closed, directly or at the end of a with statement.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.statistics = []
+
+    def _addStatistics(self, pen):
+        statistics = PenStatistics(pen)
+        self.statistics.append(statistics)
+        return statistics
+
+    def instrument(self, pen):
+        """
+        Instrument pen and all the pens it draws into, return the pen to draw into.
+        """
+        if isinstance(pen, _Link):
+            return pen
+        target = self._addStatistics(pen)
+        first = _makeLink(pen, None, target)
+        while True:
+            for attr in _outPenAttributes:
+                outPen = getattr(pen, attr, None)
+                if outPen is not None:
+                    break
+            else:
+                break
+            if isinstance(outPen, _Link):
+                # already instrumented from here on
+                outPen._source = target
+                break
+            isFilterPen = any(hasattr(outPen, attr) for attr in _outPenAttributes)
+            if isFilterPen or type(outPen).__module__.startswith("fontPens."):
+                outTarget = self._addStatistics(outPen)
+            else:
+                # pens from elsewhere at the end of the chain are only
+                # counted as the output of the last pen
+                outTarget = None
+            setattr(pen, attr, _makeLink(outPen, target, outTarget))
+            if not isFilterPen:
+                break
+            pen = outPen
+            target = outTarget
+        return first
+
+    def report(self, groupByClass=False):
+        """
+        Return the statistics as a list of dicts, one per pen instance in
+        the order the pens were instrumented, or one per pen class when
+        groupByClass is True, with the counters of all instances added up.
+        """
+        report = [statistics.asDict() for statistics in self.statistics]
+        if not groupByClass:
+            return report
+        grouped = {}
+        order = []
+        for item in report:
+            penClass = item["penClass"]
+            total = grouped.get(penClass)
+            if total is None:
+                total = grouped[penClass] = dict(item, instances=1)
+                total["eventsIn"] = dict(item["eventsIn"])
+                total["eventsOut"] = dict(item["eventsOut"])
+                order.append(penClass)
+                continue
+            total["instances"] += 1
+            for key, value in item.items():
+                if key == "penClass":
+                    continue
+                if isinstance(value, dict):
+                    events = total[key]
+                    for event, count in value.items():
+                        events[event] = events.get(event, 0) + count
+                else:
+                    total[key] += value
+        return [grouped[penClass] for penClass in order]
+
+    def close(self):
+        if self.callback is not None:
+            self.callback(self.report())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def instrumentPen(pen, instrumentation=None):
+    """
+    Return pen instrumented by instrumentation, or pen itself when instrumentation is None.
+    """
+    if instrumentation is None:
+        return pen
+    return instrumentation.instrument(pen)
+
+
+# =========
+# = tests =
+# =========
+
+def _makeTestGlyph():
+    from fontParts.fontshell import RGlyph
+    testGlyph = RGlyph()
+    testGlyph.name = "testGlyph"
+    testGlyph.width = 500
+    pen = testGlyph.getPen()
+    pen.moveTo((10, 10))
+    pen.lineTo((10, 30))
+    pen.lineTo((31, 30))
+    pen.lineTo((31, 10))
+    pen.curveTo((30, 0), (20, 0), (10, 10))
+    pen.closePath()
+    return testGlyph
+
+
+def _testInstrumentation():
+    """
+    >>> from fontTools.pens.recordingPen import RecordingPen
+    >>> from fontPens.flattenPen import FlattenPen
+    >>> from fontPens.thresholdPen import ThresholdPen
+    >>> glyph = _makeTestGlyph()
+    >>> recorder = RecordingPen()
+    >>> reports = []
+    >>> with Instrumentation(callback=reports.append) as instrumentation:
+    ...     pen = instrumentation.instrument(FlattenPen(ThresholdPen(recorder, threshold=5), approximateSegmentLength=5))
+    ...     glyph.draw(pen)
+    >>> flatten, threshold = reports[0]
+    >>> flatten["penClass"], flatten["pointsIn"], flatten["pointsOut"], flatten["contoursOut"]
+    ('FlattenPen', 7, 10, 1)
+    >>> flatten["eventsIn"] == {"moveTo": 1, "lineTo": 3, "curveTo": 1, "closePath": 1}
+    True
+    >>> threshold["penClass"], threshold["pointsIn"], threshold["pointsOut"]
+    ('ThresholdPen', 10, 8)
+    >>> len(recorder.value)
+    9
+    >>> flatten["totalTime"] >= flatten["time"] >= 0
+    True
+
+    Drawing without instrumentation gives the same result.
+
+    >>> plain = RecordingPen()
+    >>> glyph.draw(instrumentPen(FlattenPen(ThresholdPen(plain, threshold=5), approximateSegmentLength=5)))
+    >>> plain.value == recorder.value
+    True
+    """
+
+
+def _testInstrumentationPointPens():
+    """
+    >>> from fontPens.guessSmoothPointPen import GuessSmoothPointPen
+    >>> glyph = _makeTestGlyph()
+    >>> instrumentation = Instrumentation()
+    >>> for i in range(2):
+    ...     digestPen = instrumentation.instrument(DigestPointPen())
+    ...     pen = instrumentation.instrument(GuessSmoothPointPen(digestPen))
+    ...     glyph.drawPoints(pen)
+    ...     digestPen.getDigestPointsOnly() == digestPen.getDigestPointsOnly()
+    True
+    True
+    >>> digest, guessSmooth = instrumentation.report(groupByClass=True)
+    >>> guessSmooth["penClass"], guessSmooth["instances"], guessSmooth["pointsIn"], guessSmooth["eventsOut"]["addPoint"]
+    ('GuessSmoothPointPen', 2, 12, 12)
+    >>> digest["penClass"], digest["contoursIn"], digest["cacheMisses"], digest["cacheHits"]
+    ('DigestPointPen', 2, 2, 2)
+    """
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
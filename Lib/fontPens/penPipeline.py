@@ -0,0 +1,252 @@
+from fontTools.pens.basePen import AbstractPen
+from fontTools.pens.transformPen import TransformPen
+
+from fontPens.flattenPen import FlattenPen, SamplingPen
+from fontPens.penTools import distance
+from fontPens.spikePen import SpikePen, spikeContour
+from fontPens.thresholdPen import ThresholdPen
+
+
+class _ThresholdStage(object):
+
+    def __init__(self, threshold=10):
+        self.threshold = threshold
+
+    def __call__(self, points, closed):
+        threshold = self.threshold
+        lastPt = points[0]
+        result = [lastPt]
+        for pt in points[1:]:
+            if threshold <= distance(pt, lastPt):
+                result.append(pt)
+                lastPt = pt
+        return [(result, closed)]
+
+
+class _SpikeStage(object):
+
+    def __init__(self, segmentLength=20, spikeLength=40, patternFunc=None, pattern=None, patternKey=None):
+        self.spikeLength = spikeLength
+        self.patternFunc = patternFunc
+        self.pattern = pattern
+        self.patternKey = patternKey
+        self._contourIndex = -1
+
+    def __call__(self, points, closed):
+        self._contourIndex += 1
+        if closed:
+            # SpikePen drops the closing point
+            points = points[:-1]
+        return [(spikeContour(points, self.spikeLength, closed, self.patternFunc, self.pattern, (self.patternKey, self._contourIndex)), closed)]
+
+
+class _TransformStage(object):
+
+    def __init__(self, transformation):
+        if not hasattr(transformation, "transformPoint"):
+            from fontTools.misc.transform import Transform
+            transformation = Transform(*transformation)
+        self._transformPoint = transformation.transformPoint
+
+    def __call__(self, points, closed):
+        transformPoint = self._transformPoint
+        return [([transformPoint(pt) for pt in points], closed)]
+
+
+# pens that only draw moveTo, lineTo, closePath and endPath
+_polylinePens = (FlattenPen, SamplingPen)
+
+# pens that can run on a whole polyline contour at once
+_fusedStages = {
+    ThresholdPen: _ThresholdStage,
+    SpikePen: _SpikeStage,
+    TransformPen: _TransformStage,
+}
+
+
+class _PolylineStages(AbstractPen):
+    """
+    Collects the polyline contours drawn by a FlattenPen or SamplingPen,
+    runs them through the fused stages in one go and draws the result.
+    """
+
+    def __init__(self, outPen, stages, componentPen):
+        self._outPen = outPen
+        self._stages = stages
+        self._componentPen = componentPen
+        self._points = None
+
+    def moveTo(self, pt):
+        self._points = [pt]
+
+    def lineTo(self, pt):
+        self._points.append(pt)
+
+    def _flush(self, closed):
+        points = self._points
+        self._points = None
+        contours = [(points or [], closed)]
+        for stage in self._stages:
+            # a stage may draw a contour as several
+            contours = [
+                contour for points, closed in contours
+                for contour in (stage(points, closed) if points else [(points, closed)])
+            ]
+        outPen = self._outPen
+        for points, closed in contours:
+            if points:
+                outPen.moveTo(points[0])
+                lineTo = outPen.lineTo
+                for pt in points[1:]:
+                    lineTo(pt)
+            if closed:
+                outPen.closePath()
+            else:
+                outPen.endPath()
+
+    def closePath(self):
+        self._flush(closed=True)
+
+    def endPath(self):
+        self._flush(closed=False)
+
+    def addComponent(self, glyphName, transformation):
+        # components go through the stages as normal pens
+        self._componentPen.addComponent(glyphName, transformation)
+
+
+def _normalizeStage(stage):
+    if isinstance(stage, tuple):
+        penClass, kwargs = stage
+        return penClass, dict(kwargs)
+    return stage, {}
+
+
+def buildPenPipeline(stages, outPen, fuse=True):
+    """
+    Build a chain of filter pens drawing into outPen and return the first pen.
+
+    stages is a list of pen classes or (pen class, keyword arguments) tuples,
+    in drawing order, for instance:
+
+        pen = buildPenPipeline([
+            (FlattenPen, dict(approximateSegmentLength=10, segmentLines=True)),
+            (ThresholdPen, dict(threshold=10)),
+            (SpikePen, dict(spikeLength=40)),
+            (TransformPen, dict(transformation=(1, 0, .2, 1, 0, 0))),
+        ], recorder)
+        glyph.draw(pen)
+
+    ThresholdPen, SpikePen and fontTools' TransformPen stages that follow a
+    FlattenPen or SamplingPen are fused: they run on each flattened contour
+    as a list of points instead of pen call by pen call. All other stages
+    are used as normal pens. The output is the same as that of the unfused
+    chain, which is built when fuse is False.
+    """
+    stages = [_normalizeStage(stage) for stage in stages]
+    pen = outPen
+    i = len(stages)
+    while i:
+        i -= 1
+        penClass, kwargs = stages[i]
+        if fuse and penClass in _fusedStages:
+            # find the start of this run of fusable stages
+            start = i
+            while start and stages[start - 1][0] in _fusedStages:
+                start -= 1
+            if start and stages[start - 1][0] in _polylinePens:
+                fused = stages[start:i + 1]
+                componentPen = pen
+                for fusedClass, fusedKwargs in reversed(fused):
+                    componentPen = fusedClass(componentPen, **fusedKwargs)
+                collector = _PolylineStages(pen, [_fusedStages[fusedClass](**fusedKwargs) for fusedClass, fusedKwargs in fused], componentPen)
+                flattenClass, flattenKwargs = stages[start - 1]
+                pen = flattenClass(collector, **flattenKwargs)
+                i = start - 1
+                continue
+        pen = penClass(pen, **kwargs)
+    return pen
+
+
+# =========
+# = tests =
+# =========
+
+def _makeTestGlyph():
+    from fontParts.fontshell import RGlyph
+    testGlyph = RGlyph()
+    testGlyph.name = "testGlyph"
+    testGlyph.width = 500
+    pen = testGlyph.getPen()
+    pen.moveTo((84, 37))
+    pen.lineTo((348, 37))
+    pen.lineTo((348, 300))
+    pen.curveTo((265, 350.0), (177, 350.0), (84, 300))
+    pen.closePath()
+    pen.moveTo((100, 100))
+    pen.qCurveTo((150, 200), (200, 100))
+    pen.lineTo((202, 100))
+    pen.endPath()
+    return testGlyph
+
+
+def _testBuildPenPipeline():
+    """
+    >>> from fontTools.pens.recordingPen import RecordingPen
+    >>> from fontPens.spikePen import NoisePattern
+    >>> glyph = _makeTestGlyph()
+    >>> stages = [
+    ...     (FlattenPen, dict(approximateSegmentLength=10, segmentLines=True)),
+    ...     (ThresholdPen, dict(threshold=8)),
+    ...     (SpikePen, dict(spikeLength=20, pattern=NoisePattern(seed=1), patternKey="a")),
+    ...     (TransformPen, dict(transformation=(1, 0, .2, 1, 0, 0))),
+    ... ]
+    >>> fusedRecorder = RecordingPen()
+    >>> pen = buildPenPipeline(stages, fusedRecorder)
+    >>> type(pen.otherPen).__name__
+    '_PolylineStages'
+    >>> glyph.draw(pen)
+    >>> recorder = RecordingPen()
+    >>> glyph.draw(buildPenPipeline(stages, recorder, fuse=False))
+    >>> fusedRecorder.value == recorder.value
+    True
+    >>> len(recorder.value)
+    121
+
+    Long contours, which don't fit in the window of SpikePen, too.
+
+    >>> stages[0] = (FlattenPen, dict(approximateSegmentLength=.5, segmentLines=True))
+    >>> stages[1] = (ThresholdPen, dict(threshold=.1))
+    >>> fusedRecorder = RecordingPen()
+    >>> glyph.draw(buildPenPipeline(stages, fusedRecorder))
+    >>> recorder = RecordingPen()
+    >>> glyph.draw(buildPenPipeline(stages, recorder, fuse=False))
+    >>> fusedRecorder.value == recorder.value
+    True
+    >>> operators = [operator for operator, args in recorder.value]
+    >>> operators.count("moveTo"), operators.index("closePath") > 256
+    (2, True)
+
+    Stages that can't be fused are drawn as normal pens.
+
+    >>> stages = [
+    ...     (ThresholdPen, dict(threshold=8)),
+    ...     (SamplingPen, dict(steps=4)),
+    ...     (SpikePen, dict(spikeLength=20)),
+    ...     ThresholdPen,
+    ... ]
+    >>> fusedRecorder = RecordingPen()
+    >>> pen = buildPenPipeline(stages, fusedRecorder)
+    >>> type(pen).__name__
+    'ThresholdPen'
+    >>> glyph.draw(pen)
+    >>> recorder = RecordingPen()
+    >>> glyph.draw(buildPenPipeline(stages, recorder, fuse=False))
+    >>> fusedRecorder.value == recorder.value
+    True
+    """
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
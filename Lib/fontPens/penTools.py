@@ -1,7 +1,5 @@
 import math
 
-from fontTools.misc.bezierTools import calcQuadraticArcLengthC
-
 
 def distance(pt1, pt2):
     """
@@ -1,39 +1,132 @@
+import sys
+
 from fontTools.pens.basePen import AbstractPen
 
 
-class PrintPen(AbstractPen):
+class _LinePrinter(object):
+    """
+    Output for the print pens: prints to stdout or writes to a stream,
+    optionally buffering up to `bufferSize` lines or joining all steps of
+    a contour on one line.
+    """
+
+    def __init__(self, stream=None, bufferSize=0, compact=False):
+        self.stream = stream
+        self.bufferSize = bufferSize
+        self.compact = compact
+        self._lines = []
+        self._contour = []
+
+    def reset(self):
+        """
+        Drop an unfinished compact contour, to draw another glyph with this pen.
+        Buffered lines are kept, call flush() to write them.
+        """
+        self._contour = []
+
+    def _write(self, text, beginContour=False, endContour=False):
+        if self.compact and (beginContour or self._contour):
+            self._contour.append(text)
+            if not endContour:
+                return
+            text = "; ".join(self._contour)
+            self._contour = []
+        if not self.bufferSize:
+            stream = self.stream if self.stream is not None else sys.stdout
+            stream.write(text + "\n")
+            return
+        self._lines.append(text)
+        if len(self._lines) >= self.bufferSize:
+            self.flush()
+
+    def comment(self, text):
+        """
+        Write a "# text" line, in order with the steps.
+        """
+        self._write("# %s" % text)
+
+    def flush(self):
+        """
+        Write all buffered lines.
+        """
+        if self._lines:
+            stream = self.stream if self.stream is not None else sys.stdout
+            self._lines.append("")
+            stream.write("\n".join(self._lines))
+            self._lines = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+
+class PrintPen(_LinePrinter, AbstractPen):
     """
     A SegmentPen that prints every step.
+
+    - stream: a text stream to write to instead of stdout.
+    - bufferSize: the number of lines to collect before writing them,
+      call flush() or use the pen as a context manager to write the rest.
+    - compact: write every contour on a single line.
     """
 
     def moveTo(self, pt):
-        print("pen.moveTo(%s)" % (tuple(pt),))
+        self._write("pen.moveTo(%s)" % (tuple(pt),), beginContour=True)
 
     def lineTo(self, pt):
-        print("pen.lineTo(%s)" % (tuple(pt),))
+        self._write("pen.lineTo(%s)" % (tuple(pt),))
 
     def curveTo(self, *pts):
         args = self._pointArgsRepr(pts)
-        print("pen.curveTo(%s)" % args)
+        self._write("pen.curveTo(%s)" % args)
 
     def qCurveTo(self, *pts):
         args = self._pointArgsRepr(pts)
-        print("pen.qCurveTo(%s)" % args)
+        self._write("pen.qCurveTo(%s)" % args, beginContour=True)
 
     def closePath(self):
-        print("pen.closePath()")
+        self._write("pen.closePath()", endContour=True)
 
     def endPath(self):
-        print("pen.endPath()")
+        self._write("pen.endPath()", endContour=True)
 
     def addComponent(self, baseGlyphName, transformation):
-        print("pen.addComponent('%s', %s)" % (baseGlyphName, tuple(transformation)))
+        self._write("pen.addComponent('%s', %s)" % (baseGlyphName, tuple(transformation)))
 
     @staticmethod
     def _pointArgsRepr(pts):
         return ", ".join("None" if pt is None else str(tuple(pt)) for pt in pts)
 
 
+def dumpGlyphs(glyphs, stream, pointPen=False, compact=False, bufferSize=1000):
+    """
+    Write the outlines of many glyphs, preceded by their names, with a single
+    PrintPen or PrintPointPen. glyphs can be a font, a layer or a list of
+    glyphs, stream a text stream or a path. Fonts and layers are written
+    in the order of their sorted glyph names.
+    """
+    if hasattr(glyphs, "keys"):
+        glyphs = [glyphs[glyphName] for glyphName in sorted(glyphs.keys())]
+    if not hasattr(stream, "write"):
+        with open(stream, "w") as f:
+            dumpGlyphs(glyphs, f, pointPen=pointPen, compact=compact, bufferSize=bufferSize)
+        return
+    if pointPen:
+        from fontPens.printPointPen import PrintPointPen
+        pen = PrintPointPen(stream, bufferSize=bufferSize, compact=compact)
+    else:
+        pen = PrintPen(stream, bufferSize=bufferSize, compact=compact)
+    with pen:
+        for glyph in glyphs:
+            pen.comment(glyph.name)
+            if pointPen:
+                glyph.drawPoints(pen)
+            else:
+                glyph.draw(pen)
+
+
 def _testPrintPen():
     """
     >>> pen = PrintPen()
@@ -57,6 +150,8 @@ def _testPrintPen():
     pen.curveTo((1, 1), (2, 2), (3, 3), None)
     >>> pen.qCurveTo((1, 1), (2, 2), (3, 3), None)
     pen.qCurveTo((1, 1), (2, 2), (3, 3), None)
+    >>> pen.comment("a")
+    # a
     """
 
 
@@ -86,6 +181,74 @@ def _testPrintPen_nonTuplePoints():
     """
 
 
+def _testPrintPenStream():
+    """
+    >>> from io import StringIO
+    >>> stream = StringIO()
+    >>> pen = PrintPen(stream, bufferSize=3)
+    >>> pen.moveTo((10, 10))
+    >>> pen.lineTo((20, 20))
+    >>> stream.getvalue()
+    ''
+    >>> pen.qCurveTo((1, 1), None)
+    >>> print(stream.getvalue())
+    pen.moveTo((10, 10))
+    pen.lineTo((20, 20))
+    pen.qCurveTo((1, 1), None)
+    <BLANKLINE>
+    >>> pen.closePath()
+    >>> pen.flush()
+    >>> stream.getvalue().splitlines()[-1]
+    'pen.closePath()'
+
+    >>> stream = StringIO()
+    >>> with PrintPen(stream, bufferSize=100, compact=True) as pen:
+    ...     pen.moveTo((10, 10))
+    ...     pen.curveTo((1, 1), (2, 2), (3, 3))
+    ...     pen.closePath()
+    ...     pen.addComponent("a", (1, 0, 0, 1, 10, 10))
+    >>> print(stream.getvalue())
+    pen.moveTo((10, 10)); pen.curveTo((1, 1), (2, 2), (3, 3)); pen.closePath()
+    pen.addComponent('a', (1, 0, 0, 1, 10, 10))
+    <BLANKLINE>
+    """
+
+
+def _testDumpGlyphs():
+    """
+    >>> from io import StringIO
+    >>> from fontParts.fontshell import RFont
+    >>> font = RFont()
+    >>> for glyphName in ("b", "a"):
+    ...     glyph = font.newGlyph(glyphName)
+    ...     pen = glyph.getPen()
+    ...     pen.moveTo((0, 0))
+    ...     pen.lineTo((0, 100))
+    ...     pen.lineTo((100, 100))
+    ...     pen.closePath()
+    >>> component = font["b"].appendComponent("a")
+    >>> stream = StringIO()
+    >>> dumpGlyphs(font, stream, compact=True)
+    >>> print(stream.getvalue())
+    # a
+    pen.moveTo((0, 0)); pen.lineTo((0, 100)); pen.lineTo((100, 100)); pen.closePath()
+    # b
+    pen.moveTo((0, 0)); pen.lineTo((0, 100)); pen.lineTo((100, 100)); pen.closePath()
+    pen.addComponent('a', (1.0, 0.0, 0.0, 1.0, 0.0, 0.0))
+    <BLANKLINE>
+    >>> stream = StringIO()
+    >>> dumpGlyphs([font["a"]], stream, pointPen=True)
+    >>> print(stream.getvalue())
+    # a
+    pen.beginPath()
+    pen.addPoint((0, 0), segmentType='line')
+    pen.addPoint((0, 100), segmentType='line')
+    pen.addPoint((100, 100), segmentType='line')
+    pen.endPath()
+    <BLANKLINE>
+    """
+
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
@@ -1,24 +1,36 @@
 from fontTools.pens.pointPen import AbstractPointPen
 
+from fontPens.printPen import _LinePrinter
 
-class PrintPointPen(AbstractPointPen):
+
+class PrintPointPen(_LinePrinter, AbstractPointPen):
     """
     A PointPen that prints every step.
+
+    - stream: a text stream to write to instead of stdout.
+    - bufferSize: the number of lines to collect before writing them,
+      call flush() or use the pen as a context manager to write the rest.
+    - compact: write every contour on a single line.
     """
 
-    def __init__(self):
+    def __init__(self, stream=None, bufferSize=0, compact=False):
+        super(PrintPointPen, self).__init__(stream, bufferSize, compact)
+        self.havePath = False
+
+    def reset(self):
+        super(PrintPointPen, self).reset()
         self.havePath = False
 
     def beginPath(self, identifier=None):
         self.havePath = True
         if identifier is not None:
-            print("pen.beginPath(identifier=%r)" % identifier)
+            self._write("pen.beginPath(identifier=%r)" % identifier, beginContour=True)
         else:
-            print("pen.beginPath()")
+            self._write("pen.beginPath()", beginContour=True)
 
     def endPath(self):
         self.havePath = False
-        print("pen.endPath()")
+        self._write("pen.endPath()", endContour=True)
 
     def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
         assert self.havePath
@@ -33,14 +45,14 @@ class PrintPointPen(AbstractPointPen):
             args.append("identifier='%s'" % identifier)
         if kwargs:
             args.append("**%s" % kwargs)
-        print("pen.addPoint(%s)" % ", ".join(args))
+        self._write("pen.addPoint(%s)" % ", ".join(args))
 
     def addComponent(self, baseGlyphName, transformation, identifier=None):
         assert not self.havePath
         args = "'%s', %r" % (baseGlyphName, transformation)
         if identifier is not None:
             args += ", identifier='%s'" % identifier
-        print("pen.addComponent(%s)" % args)
+        self._write("pen.addComponent(%s)" % args)
 
 
 def _testPrintPointPen():
@@ -65,6 +77,23 @@ def _testPrintPointPen():
     """
 
 
+def _testPrintPointPenCompact():
+    """
+    >>> from io import StringIO
+    >>> stream = StringIO()
+    >>> with PrintPointPen(stream, bufferSize=10, compact=True) as pen:
+    ...     pen.beginPath()
+    ...     pen.addPoint((10, 10), "line", name="a")
+    ...     pen.addPoint((20, 10), "line")
+    ...     pen.endPath()
+    ...     pen.addComponent("a", (1, 0, 0, 1, 10, 10))
+    >>> print(stream.getvalue())
+    pen.beginPath(); pen.addPoint((10, 10), segmentType='line', name='a'); pen.addPoint((20, 10), segmentType='line'); pen.endPath()
+    pen.addComponent('a', (1, 0, 0, 1, 10, 10))
+    <BLANKLINE>
+    """
+
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
@@ -0,0 +1,458 @@
+"""
+A compact, versioned binary format for point and segment recordings.
+
+A single recording is packed into a self-contained blob with
+packRecording() and read back with unpackRecording(). A recording file
+holds the blobs of many glyphs followed by an index, RecordingFileReader
+memory-maps the file and only decodes the glyphs that are asked for.
+packRecordings() and RecordingBufferReader do the same in memory.
+
+Layout of a blob, all numbers little-endian:
+
+    - header: kind (0 point, 1 segment), operator count, point count,
+      info length
+    - operators, one byte each
+    - point recordings: point types, one byte each (segment type code,
+      0x80 for smooth points)
+      segment recordings: number of points of each operator, uint32 each
+    - padding to a multiple of 8 bytes
+    - coordinates, float64 x, y pairs
+    - info: UTF-8 JSON with names, identifiers, other keyword arguments and
+      components, only for the operators that have them
+
+Keyword arguments must be JSON serializable.
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from io import BytesIO
+
+from fontPens.recordingPointPen import CompactRecordingPointPen, _ADD_COMPONENT, _ADD_POINT, _BEGIN_PATH
+
+
+FORMAT_VERSION = 1
+
+_MAGIC = b"FPRC"
+_fileHeader = struct.Struct("<4sHHQ")
+_blobHeader = struct.Struct("<BxxxIII")
+
+_POINT_RECORDING, _SEGMENT_RECORDING = range(2)
+
+_segmentOperators = ("moveTo", "lineTo", "curveTo", "qCurveTo", "closePath", "endPath", "addComponent")
+_segmentOperatorCodes = {operator: code for code, operator in enumerate(_segmentOperators)}
+_SEGMENT_ADD_COMPONENT = _segmentOperatorCodes["addComponent"]
+
+_littleEndian = sys.byteorder == "little"
+
+
+def _arrayToBytes(values):
+    if not _littleEndian:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _arrayFromBytes(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if not _littleEndian:
+        values.byteswap()
+    return values
+
+
+def _padding(length):
+    return -length % 8
+
+
+class CompactSegmentRecording(object):
+    """
+    A segment recording, as produced by fontTools' RecordingPen, stored in
+    arrays. Points that are None, as in qCurveTo() without on-curve points,
+    are stored as NaN coordinates.
+    """
+
+    def __init__(self):
+        self._opcodes = bytearray()
+        self._pointCounts = array("I")
+        self._coordinates = array("d")
+        # opcode index -> (baseGlyphName, transformation)
+        self._info = {}
+
+    @classmethod
+    def fromRecording(cls, recording):
+        self = cls()
+        nan = float("nan")
+        for operator, operands in recording:
+            code = _segmentOperatorCodes.get(operator)
+            if code is None:
+                raise ValueError("unsupported segment pen operator: %r" % operator)
+            if code == _SEGMENT_ADD_COMPONENT:
+                baseGlyphName, transformation = operands
+                self._info[len(self._opcodes)] = baseGlyphName, tuple(transformation)
+                self._pointCounts.append(0)
+            else:
+                for pt in operands:
+                    if pt is None:
+                        self._coordinates.extend((nan, nan))
+                    else:
+                        self._coordinates.extend(pt)
+                self._pointCounts.append(len(operands))
+            self._opcodes.append(code)
+        return self
+
+    def replay(self, pen):
+        coordinates = self._coordinates
+        info = self._info
+        index = 0
+        for i, (code, pointCount) in enumerate(zip(self._opcodes, self._pointCounts)):
+            if code == _SEGMENT_ADD_COMPONENT:
+                pen.addComponent(*info[i])
+                continue
+            points = []
+            for j in range(index, index + 2 * pointCount, 2):
+                x = coordinates[j]
+                if x != x:
+                    points.append(None)
+                else:
+                    points.append((x, coordinates[j + 1]))
+            index += 2 * pointCount
+            getattr(pen, _segmentOperators[code])(*points)
+
+    def toRecording(self):
+        from fontTools.pens.recordingPen import RecordingPen
+        pen = RecordingPen()
+        self.replay(pen)
+        return pen.value
+
+
+def _isSegmentRecording(recording):
+    for item in recording:
+        return len(item) == 2
+    return False
+
+
+def packRecording(recording):
+    """
+    Pack a recording into a blob of bytes.
+
+    recording can be a point recording as produced by RecordingPointPen,
+    a segment recording as produced by fontTools' RecordingPen, or a
+    CompactRecordingPointPen or CompactSegmentRecording.
+    """
+    if isinstance(recording, CompactRecordingPointPen):
+        kind = _POINT_RECORDING
+        types = bytes(recording._pointTypes)
+        info = []
+        for i, value in sorted(recording._info.items()):
+            opcode = recording._opcodes[i]
+            if opcode == _ADD_COMPONENT:
+                baseGlyphName, transformation, kwargs = value
+                value = baseGlyphName, list(transformation), kwargs
+            info.append((i, value))
+    elif isinstance(recording, CompactSegmentRecording):
+        kind = _SEGMENT_RECORDING
+        types = _arrayToBytes(recording._pointCounts)
+        info = [(i, (baseGlyphName, list(transformation))) for i, (baseGlyphName, transformation) in sorted(recording._info.items())]
+    elif _isSegmentRecording(recording):
+        return packRecording(CompactSegmentRecording.fromRecording(recording))
+    else:
+        return packRecording(CompactRecordingPointPen.fromRecording(recording))
+    opcodes = bytes(recording._opcodes)
+    coordinates = _arrayToBytes(recording._coordinates)
+    infoData = json.dumps(info, separators=(",", ":")).encode("utf-8") if info else b""
+    header = _blobHeader.pack(kind, len(opcodes), len(recording._coordinates) // 2, len(infoData))
+    tablesLength = len(header) + len(opcodes) + len(types)
+    return b"".join([header, opcodes, types, b"\0" * _padding(tablesLength), coordinates, infoData])
+
+
+def unpackRecording(data):
+    """
+    Unpack a blob made by packRecording(), data can be any bytes-like object.
+    Return a CompactRecordingPointPen or a CompactSegmentRecording, both
+    have replay(pen) and toRecording() methods.
+    """
+    data = memoryview(data)
+    kind, opcodeCount, pointCount, infoLength = _blobHeader.unpack_from(data)
+    offset = _blobHeader.size
+    opcodes = bytearray(data[offset:offset + opcodeCount])
+    offset += opcodeCount
+    if kind == _POINT_RECORDING:
+        recording = CompactRecordingPointPen()
+        recording._pointTypes = bytearray(data[offset:offset + pointCount])
+        offset += pointCount
+    elif kind == _SEGMENT_RECORDING:
+        recording = CompactSegmentRecording()
+        recording._pointCounts = _arrayFromBytes("I", data[offset:offset + 4 * opcodeCount])
+        offset += 4 * opcodeCount
+    else:
+        raise ValueError("unknown recording kind: %r" % kind)
+    offset += _padding(offset)
+    recording._opcodes = opcodes
+    recording._coordinates = _arrayFromBytes("d", data[offset:offset + 16 * pointCount])
+    offset += 16 * pointCount
+    if infoLength:
+        info = json.loads(bytes(data[offset:offset + infoLength]).decode("utf-8"))
+        for i, value in info:
+            if kind == _SEGMENT_RECORDING:
+                baseGlyphName, transformation = value
+                value = baseGlyphName, tuple(transformation)
+            elif opcodes[i] == _ADD_COMPONENT:
+                baseGlyphName, transformation, kwargs = value
+                value = baseGlyphName, tuple(transformation), kwargs
+            elif opcodes[i] == _ADD_POINT:
+                value = tuple(value)
+            recording._info[i] = value
+    return recording
+
+
+class RecordingFileWriter(object):
+    """
+    Write the recordings of many glyphs to a single file, path can also
+    be a binary file object, which is left open.
+
+        with RecordingFileWriter(path) as writer:
+            for glyph in font:
+                recorder = RecordingPointPen()
+                glyph.drawPoints(recorder)
+                writer.writeRecording(glyph.name, recorder.value)
+    """
+
+    def __init__(self, path):
+        if hasattr(path, "write"):
+            self._file = path
+            self._closeFile = False
+        else:
+            self._file = open(path, "wb")
+            self._closeFile = True
+        self._start = self._file.tell()
+        self._file.write(_fileHeader.pack(_MAGIC, FORMAT_VERSION, 0, 0))
+        self._index = {}
+
+    def writeRecording(self, glyphName, recording):
+        """
+        Write a recording, see packRecording() for the supported recordings.
+        """
+        data = packRecording(recording)
+        offset = self._file.tell() - self._start
+        self._file.write(data)
+        self._index[glyphName] = offset, len(data)
+
+    def close(self):
+        if self._file is None:
+            return
+        end = self._file.tell()
+        self._file.write(json.dumps(self._index, separators=(",", ":")).encode("utf-8"))
+        indexEnd = self._file.tell()
+        self._file.seek(self._start)
+        self._file.write(_fileHeader.pack(_MAGIC, FORMAT_VERSION, 0, end - self._start))
+        self._file.seek(indexEnd)
+        if self._closeFile:
+            self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def packRecordings(recordings):
+    """
+    Pack the recordings of many glyphs into bytes in the recording file format.
+    recordings is a dict or a sequence of (glyphName, recording) pairs.
+    """
+    if hasattr(recordings, "items"):
+        recordings = recordings.items()
+    f = BytesIO()
+    with RecordingFileWriter(f) as writer:
+        for glyphName, recording in recordings:
+            writer.writeRecording(glyphName, recording)
+    return f.getvalue()
+
+
+class RecordingBufferReader(object):
+    """
+    Read recordings in the recording file format from any bytes-like
+    object. Only the index is read up front, each glyph is decoded when
+    it is asked for.
+    """
+
+    def __init__(self, data):
+        self._data = data
+        magic, version, reserved, indexOffset = _fileHeader.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("not a recording file")
+        if version > FORMAT_VERSION:
+            raise ValueError("unsupported recording file version: %d" % version)
+        # the buffer may be longer than the index, ignore what follows it
+        index = bytes(data[indexOffset:]).decode("utf-8")
+        self._index = json.JSONDecoder().raw_decode(index)[0]
+
+    def keys(self):
+        return self._index.keys()
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, glyphName):
+        return glyphName in self._index
+
+    def getCompactRecording(self, glyphName):
+        """
+        Return the recording of a glyph as a CompactRecordingPointPen or a CompactSegmentRecording.
+        """
+        offset, length = self._index[glyphName]
+        return unpackRecording(self._data[offset:offset + length])
+
+    def getRecording(self, glyphName):
+        """
+        Return the recording of a glyph in the list format.
+        """
+        return self.getCompactRecording(glyphName).toRecording()
+
+    def replay(self, glyphName, pen):
+        """
+        Replay the recording of a glyph into pen.
+        """
+        self.getCompactRecording(glyphName).replay(pen)
+
+    def close(self):
+        self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class RecordingFileReader(RecordingBufferReader):
+    """
+    Read a file written by RecordingFileWriter. The file is memory-mapped,
+    only the index is read when opening it and each glyph is decoded when
+    it is asked for.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            super(RecordingFileReader, self).__init__(self._mmap)
+        except ValueError:
+            self._mmap.close()
+            raise
+
+    def close(self):
+        super(RecordingFileReader, self).close()
+        self._mmap.close()
+
+
+def _testRecordingFile():
+    """
+    >>> import os
+    >>> import tempfile
+    >>> from fontTools.pens.recordingPen import RecordingPen
+    >>> from fontPens.printPen import PrintPen
+    >>> from fontPens.printPointPen import PrintPointPen
+    >>> from fontPens.recordingPointPen import RecordingPointPen
+
+    >>> pointPen = RecordingPointPen()
+    >>> pointPen.beginPath(identifier="my_path_id")
+    >>> pointPen.addPoint((100, 200), segmentType="line", name="a")
+    >>> pointPen.addPoint((150, 250))
+    >>> pointPen.addPoint((160, 250))
+    >>> pointPen.addPoint((200, 400), segmentType="curve", smooth=True, identifier="my_point_id")
+    >>> pointPen.endPath()
+    >>> pointPen.addComponent("b", (1, 0, 0, 1, 10, 10), identifier="my_component_id")
+    >>> segmentPen = RecordingPen()
+    >>> segmentPen.moveTo((0, 0))
+    >>> segmentPen.qCurveTo((10, 10), (20, 0), None)
+    >>> segmentPen.closePath()
+    >>> segmentPen.addComponent("c", (2, 0, 0, 2, 0, 0))
+
+    >>> directory = tempfile.mkdtemp()
+    >>> path = os.path.join(directory, "test.fprc")
+    >>> with RecordingFileWriter(path) as writer:
+    ...     writer.writeRecording("points", pointPen.value)
+    ...     writer.writeRecording("segments", segmentPen.value)
+    ...     writer.writeRecording("empty", [])
+    >>> reader = RecordingFileReader(path)
+    >>> sorted(reader.keys())
+    ['empty', 'points', 'segments']
+    >>> reader.getRecording("points") == pointPen.value
+    True
+    >>> reader.getRecording("empty")
+    []
+    >>> reader.replay("points", PrintPointPen())
+    pen.beginPath(identifier='my_path_id')
+    pen.addPoint((100.0, 200.0), segmentType='line', name='a')
+    pen.addPoint((150.0, 250.0))
+    pen.addPoint((160.0, 250.0))
+    pen.addPoint((200.0, 400.0), segmentType='curve', smooth=True, identifier='my_point_id')
+    pen.endPath()
+    pen.addComponent('b', (1, 0, 0, 1, 10, 10), identifier='my_component_id')
+    >>> reader.replay("segments", PrintPen())
+    pen.moveTo((0.0, 0.0))
+    pen.qCurveTo((10.0, 10.0), (20.0, 0.0), None)
+    pen.closePath()
+    pen.addComponent('c', (2, 0, 0, 2, 0, 0))
+    >>> reader.getRecording("segments") == segmentPen.value
+    True
+    >>> reader.close()
+    >>> os.remove(path)
+    >>> os.rmdir(directory)
+    """
+
+
+def _testPackRecordings():
+    """
+    >>> from fontPens.recordingPointPen import RecordingPointPen
+    >>> pen = RecordingPointPen()
+    >>> pen.beginPath()
+    >>> pen.addPoint((1, 2), segmentType="move")
+    >>> pen.endPath()
+    >>> data = packRecordings({"a": pen.value, "b": []})
+    >>> reader = RecordingBufferReader(data + bytes(100))
+    >>> sorted(reader)
+    ['a', 'b']
+    >>> reader.getRecording("a") == pen.value
+    True
+    >>> RecordingBufferReader(bytes(16))
+    Traceback (most recent call last):
+        ...
+    ValueError: not a recording file
+    """
+
+
+def _testPackRecording():
+    """
+    >>> from fontPens.recordingPointPen import RecordingPointPen
+    >>> pen = RecordingPointPen()
+    >>> pen.beginPath()
+    >>> pen.addPoint((1, 2), segmentType="move")
+    >>> pen.endPath()
+    >>> data = packRecording(pen.value)
+    >>> len(data)
+    40
+    >>> unpackRecording(data).toRecording() == pen.value
+    True
+    >>> unpackRecording(bytearray(data)).toRecording() == pen.value
+    True
+    >>> packRecording(CompactRecordingPointPen.fromRecording(pen.value)) == data
+    True
+    >>> packRecording([("moveTo", ((0, 0),)), ("addVarComponent", ("a", None, None))])
+    Traceback (most recent call last):
+        ...
+    ValueError: unsupported segment pen operator: 'addVarComponent'
+    """
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,3 +1,5 @@
+from array import array
+
 from fontTools.pens.pointPen import AbstractPointPen
 
 
@@ -12,12 +14,65 @@ def replayRecording(recording, pen):
         getattr(pen, operator)(*operands, **kwargs)
 
 
+class ReplayPlan(object):
+    """
+    A recording compiled for replaying it many times, possibly into several
+    pens at once. The operator names are looked up once per target pen
+    and the operations are dispatched by index.
+
+        plan = ReplayPlan(recorder.value)
+        plan.replay(previewPen, digestPen, marginPen)
+    """
+
+    def __init__(self, recording):
+        operators = []
+        codes = {}
+        steps = []
+        for operator, operands, kwargs in recording:
+            code = codes.get(operator)
+            if code is None:
+                code = codes[operator] = len(operators)
+                operators.append(operator)
+            steps.append((code, operands, kwargs or None))
+        self.operators = tuple(operators)
+        self.steps = tuple(steps)
+
+    def replay(self, *pens):
+        """
+        Replay the recording into all given pens, operation by operation.
+        """
+        if len(pens) == 1:
+            methods = [getattr(pens[0], operator) for operator in self.operators]
+            for code, operands, kwargs in self.steps:
+                if kwargs is None:
+                    methods[code](*operands)
+                else:
+                    methods[code](*operands, **kwargs)
+            return
+        methods = [[getattr(pen, operator) for pen in pens] for operator in self.operators]
+        for code, operands, kwargs in self.steps:
+            if kwargs is None:
+                for method in methods[code]:
+                    method(*operands)
+            else:
+                for method in methods[code]:
+                    method(*operands, **kwargs)
+
+
 class RecordingPointPen(AbstractPointPen):
 
     def __init__(self):
         self.value = []
 
-    def beginPath(self, **kwargs):
+    def reset(self):
+        """
+        Start a new recording, to record another glyph with this pen.
+        """
+        self.value = []
+
+    def beginPath(self, identifier=None, **kwargs):
+        if identifier is not None:
+            kwargs["identifier"] = identifier
         self.value.append(("beginPath", (), kwargs))
 
     def endPath(self):
@@ -26,13 +81,142 @@ class RecordingPointPen(AbstractPointPen):
     def addPoint(self, pt, segmentType=None, smooth=False, name=None, **kwargs):
         self.value.append(("addPoint", (pt, segmentType, smooth, name), kwargs))
 
-    def addComponent(self, baseGlyphName, transformation, **kwargs):
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        if identifier is not None:
+            kwargs["identifier"] = identifier
         self.value.append(("addComponent", (baseGlyphName, transformation), kwargs))
 
     def replay(self, pen):
         replayRecording(self.value, pen)
 
 
+_BEGIN_PATH, _END_PATH, _ADD_POINT, _ADD_COMPONENT = range(4)
+
+_segmentTypes = (None, "move", "line", "curve", "qcurve")
+_segmentTypeCodes = {segmentType: code for code, segmentType in enumerate(_segmentTypes)}
+# other segment types are kept in the side table
+_OTHER = len(_segmentTypes)
+_SMOOTH = 0x80
+
+
+class CompactRecordingPointPen(AbstractPointPen):
+    """
+    A RecordingPointPen that stores the recording in compact arrays:
+    operators and segment types as bytes, coordinates in an array('d')
+    and names, identifiers, other keyword arguments, components and
+    nonstandard segment types in a sparse side table.
+
+    Coordinates are replayed as floats. Use fromRecording() and
+    toRecording() to convert from and to the RecordingPointPen format.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Start a new recording, to record another glyph with this pen.
+        """
+        self._opcodes = bytearray()
+        self._pointTypes = bytearray()
+        self._coordinates = array("d")
+        # opcode index -> kwargs, (name, kwargs), (name, kwargs, segmentType)
+        # or (baseGlyphName, transformation, kwargs)
+        self._info = {}
+
+    def beginPath(self, identifier=None, **kwargs):
+        if identifier is not None:
+            kwargs["identifier"] = identifier
+        if kwargs:
+            self._info[len(self._opcodes)] = kwargs
+        self._opcodes.append(_BEGIN_PATH)
+
+    def endPath(self):
+        self._opcodes.append(_END_PATH)
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, **kwargs):
+        pointType = _segmentTypeCodes.get(segmentType)
+        if pointType is None:
+            pointType = _OTHER
+            self._info[len(self._opcodes)] = name, kwargs, segmentType
+        elif name is not None or kwargs:
+            self._info[len(self._opcodes)] = name, kwargs
+        self._opcodes.append(_ADD_POINT)
+        if smooth:
+            pointType |= _SMOOTH
+        self._pointTypes.append(pointType)
+        self._coordinates.extend(pt)
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        if identifier is not None:
+            kwargs["identifier"] = identifier
+        self._info[len(self._opcodes)] = baseGlyphName, transformation, kwargs
+        self._opcodes.append(_ADD_COMPONENT)
+
+    def replay(self, pen):
+        info = self._info
+        coordinates = self._coordinates
+        pointTypes = self._pointTypes
+        pointIndex = 0
+        for i, opcode in enumerate(self._opcodes):
+            if opcode == _ADD_POINT:
+                pointType = pointTypes[pointIndex]
+                pt = coordinates[2 * pointIndex], coordinates[2 * pointIndex + 1]
+                pointIndex += 1
+                smooth = bool(pointType & _SMOOTH)
+                pointType &= ~_SMOOTH
+                if i in info:
+                    if pointType == _OTHER:
+                        name, kwargs, segmentType = info[i]
+                    else:
+                        name, kwargs = info[i]
+                        segmentType = _segmentTypes[pointType]
+                    pen.addPoint(pt, segmentType, smooth, name, **kwargs)
+                else:
+                    pen.addPoint(pt, _segmentTypes[pointType], smooth, None)
+            elif opcode == _BEGIN_PATH:
+                if i in info:
+                    pen.beginPath(**info[i])
+                else:
+                    pen.beginPath()
+            elif opcode == _END_PATH:
+                pen.endPath()
+            else:
+                baseGlyphName, transformation, kwargs = info[i]
+                pen.addComponent(baseGlyphName, transformation, **kwargs)
+
+    def transform(self, transformation):
+        """
+        Transform all coordinates and component transformations in place.
+        """
+        from fontPens.transformPointPen import _asTransform, transformCoordinates
+        transformation = _asTransform(transformation)
+        self._coordinates = transformCoordinates(self._coordinates, transformation)
+        opcodes = self._opcodes
+        info = self._info
+        for i, value in info.items():
+            if opcodes[i] == _ADD_COMPONENT:
+                baseGlyphName, componentTransformation, kwargs = value
+                info[i] = baseGlyphName, transformation.transform(componentTransformation), kwargs
+
+    @classmethod
+    def fromRecording(cls, recording):
+        """
+        Return a new CompactRecordingPointPen from a recording as produced by RecordingPointPen.
+        """
+        pen = cls()
+        replayRecording(recording, pen)
+        return pen
+
+    def toRecording(self):
+        """
+        Return the recording in the RecordingPointPen format.
+        """
+        pen = RecordingPointPen()
+        self.replay(pen)
+        return pen.value
+
+
 def _test():
     """
         >>> from fontPens.printPointPen import PrintPointPen
@@ -56,6 +240,134 @@ def _test():
         pen.addPoint((200, 300), segmentType='line')
         pen.addPoint((200, 400), segmentType='line', identifier='my_point_id')
         pen.endPath()
+
+    Filter pens pass the identifiers positionally.
+
+        >>> pen = RecordingPointPen()
+        >>> pen.beginPath("my_path_id")
+        >>> pen.addComponent("a", (1, 0, 0, 1, 0, 0), "my_component_id")
+        >>> pen.value == [
+        ...     ("beginPath", (), {"identifier": "my_path_id"}),
+        ...     ("addComponent", ("a", (1, 0, 0, 1, 0, 0)), {"identifier": "my_component_id"})]
+        True
+    """
+
+
+def _testReplayPlan():
+    """
+        >>> from fontPens.printPointPen import PrintPointPen
+        >>> from fontPens.digestPointPen import DigestPointPen
+        >>> pen = RecordingPointPen()
+        >>> pen.beginPath(identifier="my_path_id")
+        >>> pen.addPoint((100, 200), segmentType="line")
+        >>> pen.addPoint((200, 400), segmentType="line", identifier="my_point_id")
+        >>> pen.endPath()
+        >>> pen.addComponent("a", (1, 0, 0, 1, 10, 10))
+        >>> plan = ReplayPlan(pen.value)
+        >>> plan.operators
+        ('beginPath', 'addPoint', 'endPath', 'addComponent')
+        >>> pen2 = RecordingPointPen()
+        >>> plan.replay(pen2)
+        >>> pen2.value == pen.value
+        True
+        >>> pen3 = RecordingPointPen()
+        >>> digestPen = DigestPointPen()
+        >>> plan.replay(PrintPointPen(), pen3, digestPen)
+        pen.beginPath(identifier='my_path_id')
+        pen.addPoint((100, 200), segmentType='line')
+        pen.addPoint((200, 400), segmentType='line', identifier='my_point_id')
+        pen.endPath()
+        pen.addComponent('a', (1, 0, 0, 1, 10, 10))
+        >>> pen3.value == pen.value
+        True
+        >>> digestPen.getDigestPointsOnly()
+        ((100, 200), (200, 400))
+        >>> ReplayPlan([]).replay(pen3)
+    """
+
+
+def _testCompactRecordingPointPen():
+    """
+        >>> from fontPens.printPointPen import PrintPointPen
+        >>> pen = CompactRecordingPointPen()
+        >>> pen.beginPath()
+        >>> pen.addPoint((100, 200), smooth=False, segmentType="line")
+        >>> pen.endPath()
+        >>> pen.beginPath(identifier="my_path_id")
+        >>> pen.addPoint((200, 300), segmentType="curve", smooth=True, name="a")
+        >>> pen.addPoint((200.5, 400))
+        >>> pen.addPoint((200, 400), segmentType="qcurve", identifier="my_point_id")
+        >>> pen.endPath()
+        >>> pen.addComponent("a", (1, 0, 0, 1, 10, 10), identifier="my_component_id")
+        >>> ppp = PrintPointPen()
+        >>> pen.replay(ppp)
+        pen.beginPath()
+        pen.addPoint((100.0, 200.0), segmentType='line')
+        pen.endPath()
+        pen.beginPath(identifier='my_path_id')
+        pen.addPoint((200.0, 300.0), segmentType='curve', smooth=True, name='a')
+        pen.addPoint((200.5, 400.0))
+        pen.addPoint((200.0, 400.0), segmentType='qcurve', identifier='my_point_id')
+        pen.endPath()
+        pen.addComponent('a', (1, 0, 0, 1, 10, 10), identifier='my_component_id')
+
+        >>> pen2 = RecordingPointPen()
+        >>> pen.replay(pen2)
+        >>> pen.toRecording() == pen2.value
+        True
+        >>> pen3 = CompactRecordingPointPen.fromRecording(pen2.value)
+        >>> pen3.toRecording() == pen2.value
+        True
+        >>> original = RecordingPointPen()
+        >>> original.beginPath(identifier="my_path_id")
+        >>> original.addPoint((10, 20), "line", name="b", identifier="my_point_id")
+        >>> original.endPath()
+        >>> CompactRecordingPointPen.fromRecording(original.value).toRecording() == original.value
+        True
+
+        >>> pen3.transform((2, 0, 0, 2, 0, 0))
+        >>> pen3.replay(ppp)
+        pen.beginPath()
+        pen.addPoint((200.0, 400.0), segmentType='line')
+        pen.endPath()
+        pen.beginPath(identifier='my_path_id')
+        pen.addPoint((400.0, 600.0), segmentType='curve', smooth=True, name='a')
+        pen.addPoint((401.0, 800.0))
+        pen.addPoint((400.0, 800.0), segmentType='qcurve', identifier='my_point_id')
+        pen.endPath()
+        pen.addComponent('a', <Transform [2 0 0 2 20 20]>, identifier='my_component_id')
+
+    Filter pens pass the identifiers positionally.
+
+        >>> pen = CompactRecordingPointPen()
+        >>> pen.beginPath("my_path_id")
+        >>> pen.addPoint((100, 200), "line")
+        >>> pen.endPath()
+        >>> pen.addComponent("a", (1, 0, 0, 1, 0, 0), "my_component_id")
+        >>> pen.replay(ppp)
+        pen.beginPath(identifier='my_path_id')
+        pen.addPoint((100.0, 200.0), segmentType='line')
+        pen.endPath()
+        pen.addComponent('a', (1, 0, 0, 1, 0, 0), identifier='my_component_id')
+
+    Other segment types are kept as they are.
+
+        >>> original = RecordingPointPen()
+        >>> original.beginPath()
+        >>> original.addPoint((1, 1), "foo", smooth=True)
+        >>> original.addPoint((2, 2), "spline", name="c", identifier="my_point_id")
+        >>> original.endPath()
+        >>> pen = CompactRecordingPointPen.fromRecording(original.value)
+        >>> pen.replay(ppp)
+        pen.beginPath()
+        pen.addPoint((1.0, 1.0), segmentType='foo', smooth=True)
+        pen.addPoint((2.0, 2.0), segmentType='spline', name='c', identifier='my_point_id')
+        pen.endPath()
+        >>> pen.toRecording() == original.value
+        True
+        >>> from fontPens.recordingFile import packRecording, unpackRecording
+        >>> unpackRecording(packRecording(pen)).toRecording() == original.value
+        True
     """
 
 
@@ -0,0 +1,205 @@
+from fontPens.recordingFile import RecordingBufferReader, packRecordings
+
+
+class SharedRecordings(RecordingBufferReader):
+    """
+    The recordings of many glyphs packed into a block of shared memory,
+    in the recording file format. Other processes attach to the block by
+    its name and replay glyphs from it without any pickling.
+
+    In the main process:
+
+        shared = SharedRecordings.create(recordings)
+        # pass shared.name to the workers
+        ...
+        shared.close()
+        shared.unlink()
+
+    In a worker:
+
+        shared = SharedRecordings(name)
+        shared.replay(glyphName, pen)
+        shared.close()
+
+    Requires Python 3.8 or later for multiprocessing.shared_memory.
+    """
+
+    def __init__(self, name):
+        from multiprocessing.shared_memory import SharedMemory
+        self._sharedMemory = SharedMemory(name=name)
+        super(SharedRecordings, self).__init__(self._sharedMemory.buf)
+
+    @classmethod
+    def create(cls, recordings):
+        """
+        Pack recordings into a new block of shared memory.
+        recordings is a dict or a sequence of (glyphName, recording) pairs,
+        see packRecording() for the supported recordings.
+        """
+        from multiprocessing.shared_memory import SharedMemory
+        data = packRecordings(recordings)
+        sharedMemory = SharedMemory(create=True, size=len(data))
+        sharedMemory.buf[:len(data)] = data
+        self = cls.__new__(cls)
+        self._sharedMemory = sharedMemory
+        RecordingBufferReader.__init__(self, sharedMemory.buf)
+        return self
+
+    @property
+    def name(self):
+        """
+        The name of the shared memory block, to attach to it from other processes.
+        """
+        return self._sharedMemory.name
+
+    def close(self):
+        """
+        Close the access to the shared memory from this instance.
+        """
+        super(SharedRecordings, self).close()
+        self._sharedMemory.close()
+
+    def unlink(self):
+        """
+        Free the shared memory block, call this once, from the process that created it.
+        """
+        self._sharedMemory.unlink()
+
+
+def _processSharedChunk(job):
+    function, name, glyphNames = job
+    source = SharedRecordings(name)
+    try:
+        results = [(glyphName, function(glyphName, source.getCompactRecording(glyphName))) for glyphName in glyphNames]
+    finally:
+        source.close()
+    # the results go back the same way, the main process unlinks the block
+    output = SharedRecordings.create(results)
+    output.close()
+    return output.name
+
+
+def mapSharedRecordings(function, recordings, workers=None, chunkSize=64):
+    """
+    Process many glyphs in a pool of `workers` processes, passing the
+    outlines through shared memory in both directions.
+
+    function is called as function(glyphName, recording) in the workers,
+    with a CompactRecordingPointPen or a CompactSegmentRecording to replay,
+    and must return a recording. It must be a module level function so it
+    can be passed to the workers.
+
+    Return a dict of glyph names and compact recordings with the results.
+    An error in a worker is raised here, after the shared memory blocks of
+    all chunks are freed.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    source = SharedRecordings.create(recordings)
+    try:
+        glyphNames = list(source.keys())
+        jobs = [(function, source.name, glyphNames[i:i + chunkSize]) for i in range(0, len(glyphNames), chunkSize)]
+        results = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_processSharedChunk, job) for job in jobs]
+            try:
+                while futures:
+                    output = SharedRecordings(futures[0].result())
+                    del futures[0]
+                    try:
+                        for glyphName in output:
+                            results[glyphName] = output.getCompactRecording(glyphName)
+                    finally:
+                        output.close()
+                        output.unlink()
+            finally:
+                # after an error, free the blocks of the chunks that weren't read
+                for future in futures:
+                    if not future.cancel() and future.exception() is None:
+                        output = SharedRecordings(future.result())
+                        output.close()
+                        output.unlink()
+    finally:
+        source.close()
+        source.unlink()
+    return results
+
+
+def _flattenRecording(glyphName, recording):
+    # used by the tests, needs to be importable from the workers
+    from fontTools.pens.recordingPen import RecordingPen
+    from fontTools.pens.pointPen import PointToSegmentPen
+    from fontPens.flattenPen import FlattenPen
+    recorder = RecordingPen()
+    recording.replay(PointToSegmentPen(FlattenPen(recorder, approximateSegmentLength=50, segmentLines=True)))
+    return recorder.value
+
+
+def _failingRecording(glyphName, recording):
+    # used by the tests, fails in the second chunk once the other chunks are done
+    if glyphName == "glyph4":
+        import time
+        time.sleep(.2)
+        raise ValueError(glyphName)
+    return _flattenRecording(glyphName, recording)
+
+
+def _testSharedRecordings():
+    """
+    >>> from fontPens.recordingPointPen import RecordingPointPen
+    >>> pen = RecordingPointPen()
+    >>> pen.beginPath()
+    >>> pen.addPoint((0, 0), segmentType="line", name="a")
+    >>> pen.addPoint((0, 100), segmentType="line")
+    >>> pen.addPoint((100, 100), segmentType="line")
+    >>> pen.endPath()
+    >>> shared = SharedRecordings.create({"a": pen.value})
+    >>> attached = SharedRecordings(shared.name)
+    >>> list(attached)
+    ['a']
+    >>> attached.getRecording("a") == pen.value
+    True
+    >>> attached.close()
+    >>> shared.close()
+    >>> shared.unlink()
+    """
+
+
+def _testMapSharedRecordings():
+    """
+    >>> from fontPens.recordingPointPen import CompactRecordingPointPen, RecordingPointPen
+    >>> recordings = {}
+    >>> for i in range(10):
+    ...     pen = RecordingPointPen()
+    ...     pen.beginPath()
+    ...     pen.addPoint((0, 0), segmentType="line")
+    ...     pen.addPoint((0, 100 * i), segmentType="line")
+    ...     pen.addPoint((100, 100 * i), segmentType="line")
+    ...     pen.endPath()
+    ...     recordings["glyph%d" % i] = pen.value
+    >>> results = mapSharedRecordings(_flattenRecording, recordings, workers=2, chunkSize=3)
+    >>> sorted(results) == sorted(recordings)
+    True
+    >>> expected = _flattenRecording("glyph1", CompactRecordingPointPen.fromRecording(recordings["glyph1"]))
+    >>> results["glyph1"].toRecording() == expected
+    True
+    >>> len(expected)
+    9
+
+    An error in a worker frees the shared memory of all chunks.
+
+    >>> import os
+    >>> def sharedBlocks():
+    ...     return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+    >>> blocks = sharedBlocks()
+    >>> mapSharedRecordings(_failingRecording, recordings, workers=2, chunkSize=3)
+    Traceback (most recent call last):
+        ...
+    ValueError: glyph4
+    >>> sharedBlocks() == blocks
+    True
+    """
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
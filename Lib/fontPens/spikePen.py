@@ -1,6 +1,172 @@
-from fontPens.flattenPen import FlattenPen
+from array import array
+from math import hypot, pi, sin
+from random import Random
+
 from fontTools.pens.basePen import BasePen
-from math import atan2, sin, cos, pi
+
+from fontPens.flattenPen import FlattenPen
+
+
+# ============
+# = patterns =
+# ============
+
+_patternBlockSize = 256
+
+# the number of glyphs spikeGlyphs() sends to a worker at once
+_spikeChunkSize = 16
+
+
+def _randomValues(seed, key, start, count):
+    # Random values in [0, 1) for spikes start to start + count. The values
+    # are generated in fixed blocks seeded from the seed, the key and the
+    # block index, so they don't depend on how the range is requested and
+    # are the same in every process.
+    values = []
+    block, offset = divmod(start, _patternBlockSize)
+    while len(values) < count:
+        rng = Random("%r/%r/%d" % (seed, key, block))
+        blockValues = [rng.random() for i in range(_patternBlockSize)]
+        values.extend(blockValues[offset:offset + count - len(values)])
+        block += 1
+        offset = 0
+    return values
+
+
+class SpikePattern(object):
+    """
+    Base class for spike patterns. A pattern calculates the lengths of
+    a range of spikes of a contour at once.
+
+    - minimum, maximum: the spike lengths vary between
+      minimum * spikeLength and maximum * spikeLength.
+
+    Subclasses implement getSpikeLengths().
+    """
+
+    def __init__(self, minimum=0.0, maximum=1.0):
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def getSpikeLengths(self, spikeLength, start, count, key=None):
+        """
+        Return an array with the lengths for spikes start to start + count.
+        key identifies the contour, for instance a (glyphName, contourIndex) tuple.
+        """
+        raise NotImplementedError
+
+    def _scale(self, spikeLength, values):
+        minimum = self.minimum * spikeLength
+        factor = (self.maximum - self.minimum) * spikeLength
+        return array("d", [minimum + factor * v for v in values])
+
+
+class SinePattern(SpikePattern):
+    """
+    Spike lengths following a sine wave with a period of `period` spikes.
+    """
+
+    def __init__(self, period=10, phase=0.0, minimum=0.0, maximum=1.0):
+        super(SinePattern, self).__init__(minimum, maximum)
+        self.period = period
+        self.phase = phase
+
+    def getSpikeLengths(self, spikeLength, start, count, key=None):
+        step = 2 * pi / self.period
+        phase = self.phase
+        return self._scale(spikeLength, [.5 + .5 * sin(i * step + phase) for i in range(start, start + count)])
+
+
+class RandomPattern(SpikePattern):
+    """
+    Random spike lengths, the same seed gives the same lengths for the same contour.
+    """
+
+    def __init__(self, seed=0, minimum=0.0, maximum=1.0):
+        super(RandomPattern, self).__init__(minimum, maximum)
+        self.seed = seed
+
+    def getSpikeLengths(self, spikeLength, start, count, key=None):
+        return self._scale(spikeLength, _randomValues(self.seed, key, start, count))
+
+
+class NoisePattern(SpikePattern):
+    """
+    Smoothly varying random spike lengths: random values every `period`
+    spikes, interpolated in between.
+    """
+
+    def __init__(self, seed=0, period=8, minimum=0.0, maximum=1.0):
+        super(NoisePattern, self).__init__(minimum, maximum)
+        self.seed = seed
+        self.period = period
+
+    def getSpikeLengths(self, spikeLength, start, count, key=None):
+        if not count:
+            return array("d")
+        period = self.period
+        firstKnot = start // period
+        lastKnot = (start + count - 1) // period + 1
+        knots = _randomValues(self.seed, key, firstKnot, lastKnot - firstKnot + 1)
+        values = []
+        for i in range(start, start + count):
+            knot, position = divmod(i, period)
+            t = position / float(period)
+            t = t * t * (3 - 2 * t)
+            a = knots[knot - firstKnot]
+            b = knots[knot - firstKnot + 1]
+            values.append(a + (b - a) * t)
+        return self._scale(spikeLength, values)
+
+
+# ==========
+# = spikes =
+# ==========
+
+def _spikePoint(prevPt, pt, nextPt, spikeLength):
+    # move pt perpendicular to the line from prevPt to nextPt
+    dx = prevPt[0] - nextPt[0]
+    dy = prevPt[1] - nextPt[1]
+    d = hypot(dx, dy)
+    if d:
+        return pt[0] - dy / d * spikeLength, pt[1] + dx / d * spikeLength
+    return pt[0] - spikeLength, pt[1]
+
+
+def spikeContour(points, spikeLength=40, closed=True, patternFunc=None, pattern=None, patternKey=None):
+    """
+    Spike a whole contour at once and return the new list of points.
+    Every other point, starting with the first, is moved perpendicular
+    to the direction of the contour.
+
+    - points: a list of (x, y) points, for closed contours without a
+      closing point that duplicates the first.
+    - closed: whether the last point connects back to the first one,
+      the endpoints of open contours are spiked along their first and
+      last segment.
+    - patternFunc: an optional function which recalculates the offset.
+    - pattern: an optional SpikePattern calculating the lengths of all spikes,
+      patternKey is passed on to it to identify the contour.
+    """
+    nPoints = len(points)
+    if not nPoints:
+        return []
+    if closed:
+        prevPoints = points[-1:] + points[:-1]
+        nextPoints = points[1:] + points[:1]
+    else:
+        prevPoints = points[:1] + points[:-1]
+        nextPoints = points[1:] + points[-1:]
+    if pattern is not None:
+        spikeLengths = pattern.getSpikeLengths(spikeLength, 0, (nPoints + 1) // 2, patternKey)
+    elif patternFunc is not None:
+        spikeLengths = [patternFunc(spikeLength) for i in range(0, nPoints, 2)]
+    else:
+        spikeLengths = [spikeLength] * ((nPoints + 1) // 2)
+    result = list(points)
+    for i, thisSpikeLength in zip(range(0, nPoints, 2), spikeLengths):
+        result[i] = _spikePoint(prevPoints[i], points[i], nextPoints[i], thisSpikeLength)
+    return result
 
 
 class SpikePen(BasePen):
@@ -8,63 +174,188 @@ class SpikePen(BasePen):
     """
     Add narly spikes or dents to the glyph.
     patternFunc is an optional function which recalculates the offset.
+    pattern is an optional SpikePattern which calculates the lengths of the
+    spikes in bulk, patternKey (for instance the glyph name) is passed on
+    to it together with the contour index.
+
+    The first point of a closed contour is spiked against the last point,
+    the endpoints of an open contour along its first and last segment, as
+    spikeContour() does. The last point of a closed contour is assumed to
+    be the closing point drawn by FlattenPen and is dropped.
+
+    Points are spiked as they arrive, with a window of three points. Only
+    the first point has to wait for the end of the contour, as it depends
+    on the last point if the contour is closed, so the spiked points are
+    kept until then and drawn after it.
     """
 
-    def __init__(self, otherPen, segmentLength=20, spikeLength=40, patternFunc=None):
+    def __init__(self, otherPen, segmentLength=20, spikeLength=40, patternFunc=None, pattern=None, patternKey=None):
         self.otherPen = otherPen
         self.segmentLength = segmentLength
         self.spikeLength = spikeLength
         self.patternFunc = patternFunc
+        self.pattern = pattern
+        self.patternKey = patternKey
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the current contour and restart the contour count, to draw
+        another glyph with this pen. Set patternKey for the new glyph.
+        """
+        self._firstPt = None
+        self._secondPt = None
+        self._firstSpikeLength = None
+        self._window = None
+        self._spiked = None
+        self._index = 0
+        self._contourIndex = -1
+        self._spikeLengths = None
+        self._spikeLengthsStart = 0
 
     def _moveTo(self, pt):
-        self._points = [pt]
+        self._firstPt = pt
+        self._secondPt = None
+        self._window = [pt]
+        self._spiked = []
+        self._index = 1
+        self._contourIndex += 1
+        self._spikeLengths = None
+        # take the first length in order, for patternFunc
+        self._firstSpikeLength = self._getSpikeLength(0)
 
     def _lineTo(self, pt):
-        self._points.append(pt)
-
-    def _processPoints(self):
-        pointCount = len(self._points)
-        for i in range(0, pointCount):
-            x, y = self._points[i]
-
-            if not i % 2:
-                previousPoint = self._points[i - 1]
-                nextPoint = self._points[(i + 1) % pointCount]
-                angle = atan2(previousPoint[0] - nextPoint[0], previousPoint[1] - nextPoint[1])
-                if self.patternFunc is not None:
-                    thisSpikeLength = self.patternFunc(self.spikeLength)
-                else:
-                    thisSpikeLength = self.spikeLength
-                x -= sin(angle + .5 * pi) * thisSpikeLength
-                y -= cos(angle + .5 * pi) * thisSpikeLength
-
-            if i == 0:
-                self.otherPen.moveTo((x, y))
-            else:
-                self.otherPen.lineTo((x, y))
+        if self._secondPt is None:
+            self._secondPt = pt
+        window = self._window
+        window.append(pt)
+        if len(window) == 4:
+            # keep one point in reserve, it may be the closing point
+            self._processPoint(window[0], window[1], window[2])
+            del window[0]
+
+    def _getSpikeLength(self, spikeIndex):
+        if self.pattern is None:
+            if self.patternFunc is not None:
+                return self.patternFunc(self.spikeLength)
+            return self.spikeLength
+        # ask the pattern for the lengths a block at a time
+        offset = spikeIndex - self._spikeLengthsStart
+        if self._spikeLengths is None or not 0 <= offset < len(self._spikeLengths):
+            self._spikeLengthsStart = spikeIndex
+            self._spikeLengths = self.pattern.getSpikeLengths(
+                self.spikeLength, spikeIndex, _patternBlockSize, (self.patternKey, self._contourIndex))
+            offset = 0
+        return self._spikeLengths[offset]
+
+    def _processPoint(self, prevPt, pt, nextPt):
+        index = self._index
+        if not index % 2:
+            pt = _spikePoint(prevPt, pt, nextPt, self._getSpikeLength(index // 2))
+        self._spiked.append(pt)
+        self._index = index + 1
+
+    def _endContour(self, closed):
+        window = self._window
+        if window is None:
+            # a contour without points
+            return
+        self._window = None
+        if closed:
+            # drop the closing point
+            del window[-1]
+            if not window:
+                self._spiked = None
+                return
+        firstPt = self._firstPt
+        lastPt = window[-1]
+        singlePoint = self._index == 1 and len(window) == 1
+        # spike the rest of the points, up to the last one
+        window.append(firstPt if closed else lastPt)
+        processPoint = self._processPoint
+        for i in range(1, len(window) - 1):
+            processPoint(window[i - 1], window[i], window[i + 1])
+        if singlePoint:
+            nextPt = prevPt = firstPt
+        else:
+            nextPt = self._secondPt
+            prevPt = lastPt if closed else firstPt
+        spiked = self._spiked
+        self._spiked = None
+        otherPen = self.otherPen
+        otherPen.moveTo(_spikePoint(prevPt, firstPt, nextPt, self._firstSpikeLength))
+        lineTo = otherPen.lineTo
+        for pt in spiked:
+            lineTo(pt)
 
     def closePath(self):
-        # pop last point
-        self._points.pop()
-        self._processPoints()
+        self._endContour(closed=True)
         self.otherPen.closePath()
 
     def endPath(self):
-        self._processPoints()
+        self._endContour(closed=False)
         self.otherPen.endPath()
 
+    def addComponent(self, glyphName, transformation):
+        self.otherPen.addComponent(glyphName, transformation)
+
+
+def _makeSpikePipeline(outPen, segmentLength, spikeLength, patternFunc, pattern, patternKey):
+    spikePen = SpikePen(outPen, spikeLength=spikeLength, patternFunc=patternFunc, pattern=pattern, patternKey=patternKey)
+    return FlattenPen(spikePen, approximateSegmentLength=segmentLength, segmentLines=True)
+
 
-def spikeGlyph(aGlyph, segmentLength=20, spikeLength=40, patternFunc=None):
+def spikeGlyph(aGlyph, segmentLength=20, spikeLength=40, patternFunc=None, pattern=None):
+    """
+    Convenience function that applies the **SpikePen** to a glyph in place.
+    The glyph name is used as pattern key.
+    """
     from fontTools.pens.recordingPen import RecordingPen
     recorder = RecordingPen()
-    spikePen = SpikePen(recorder, spikeLength=spikeLength, patternFunc=patternFunc)
-    filterPen = FlattenPen(spikePen, approximateSegmentLength=segmentLength, segmentLines=True)
+    filterPen = _makeSpikePipeline(recorder, segmentLength, spikeLength, patternFunc, pattern, aGlyph.name)
     aGlyph.draw(filterPen)
     aGlyph.clear()
     recorder.replay(aGlyph.getPen())
     return aGlyph
 
 
+def _spikeRecording(job):
+    from fontTools.pens.recordingPen import RecordingPen, replayRecording
+    value, segmentLength, spikeLength, pattern, patternKey = job
+    recorder = RecordingPen()
+    replayRecording(value, _makeSpikePipeline(recorder, segmentLength, spikeLength, None, pattern, patternKey))
+    return recorder.value
+
+
+def spikeGlyphs(glyphs, segmentLength=20, spikeLength=40, pattern=None, workers=None):
+    """
+    Convenience function that applies the **SpikePen** to many glyphs in place.
+
+    The glyphs are spiked in a pool of `workers` processes, None uses the
+    number of CPUs and 1 runs in this process, as do glyphs that fit in a
+    single chunk of 16. The output only depends on the glyph names and the
+    pattern seed, not on the number of workers. The pattern must be
+    picklable, per spike pattern functions aren't supported here.
+    """
+    from fontTools.pens.recordingPen import RecordingPen, replayRecording
+    glyphs = list(glyphs)
+    jobs = []
+    for glyph in glyphs:
+        recorder = RecordingPen()
+        glyph.draw(recorder)
+        jobs.append((recorder.value, segmentLength, spikeLength, pattern, glyph.name))
+    if workers == 1 or len(jobs) <= _spikeChunkSize:
+        results = map(_spikeRecording, jobs)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_spikeRecording, jobs, chunksize=_spikeChunkSize))
+    for glyph, value in zip(glyphs, results):
+        glyph.clear()
+        replayRecording(value, glyph.getPen())
+    return glyphs
+
+
 # =========
 # = tests =
 # =========
@@ -105,15 +396,63 @@ def _testSpikePen():
     >>> glyph = _makeTestGlyphLine()
     >>> pen = SpikePen(PrintPen())
     >>> glyph.draw(pen)
-    pen.moveTo((9.999999999999995, 40.0))
+    pen.moveTo((10.0, -40.0))
     pen.lineTo((30, 0))
     pen.lineTo((50.0, -40.0))
     pen.lineTo((70, 0))
-    pen.lineTo((90.0, 40.0))
+    pen.lineTo((90.0, -40.0))
     pen.endPath()
     """
 
 
+def _testSpikeContour():
+    """
+    >>> from fontTools.pens.recordingPen import RecordingPen
+    >>> points = [(10, 0), (30, 0), (50, 0), (70, 0), (90, 0)]
+    >>> spikeContour(points, closed=False)
+    [(10.0, -40.0), (30, 0), (50.0, -40.0), (70, 0), (90.0, -40.0)]
+    >>> spikeContour(points, spikeLength=10, patternFunc=lambda length: -length)
+    [(10.0, -10.0), (30, 0), (50.0, 10.0), (70, 0), (90.0, -10.0)]
+    >>> spikeContour([])
+    []
+
+    The pen gives the same result, closed contours end on the closing point.
+
+    >>> def drawContour(pen, points, closed=True):
+    ...     pen.moveTo(points[0])
+    ...     if closed:
+    ...         points = points + points[:1]
+    ...     for pt in points[1:]:
+    ...         pen.lineTo(pt)
+    ...     if closed:
+    ...         pen.closePath()
+    ...     else:
+    ...         pen.endPath()
+    >>> points = [(100, 100), (100, 120), (100, 140), (120, 140), (140, 140)]
+    >>> recorder = RecordingPen()
+    >>> drawContour(SpikePen(recorder), points)
+    >>> [args[0] for operator, args in recorder.value[:-1]] == spikeContour(points)
+    True
+    >>> recorder.value[-1]
+    ('closePath', ())
+    >>> recorder = RecordingPen()
+    >>> drawContour(SpikePen(recorder), points, closed=False)
+    >>> [args[0] for operator, args in recorder.value[:-1]] == spikeContour(points, closed=False)
+    True
+
+    Long contours, which don't fit in the window, as well.
+
+    >>> points = [(i * 10, 0) for i in range(500)] + [(i * 10, 100) for i in range(500, 0, -1)]
+    >>> for closed in (True, False):
+    ...     recorder = RecordingPen()
+    ...     drawContour(SpikePen(recorder), points, closed)
+    ...     print([operator for operator, args in recorder.value].count("moveTo"),
+    ...           [args[0] for operator, args in recorder.value[:-1]] == spikeContour(points, closed=closed))
+    1 True
+    1 True
+    """
+
+
 def _testSpikeGlyph():
     """
     >>> from fontPens.printPen import PrintPen
@@ -165,6 +504,116 @@ def _testSpikeGlyph():
     """
 
 
+def _testSpikePatterns():
+    """
+    >>> [round(v, 3) for v in SinePattern(period=4).getSpikeLengths(10, 0, 5)]
+    [5.0, 10.0, 5.0, 0.0, 5.0]
+    >>> [round(v, 3) for v in SinePattern(period=4, minimum=-1).getSpikeLengths(10, 1, 3)]
+    [10.0, 0.0, -10.0]
+
+    Random and noise patterns depend only on the seed, the key and the spike index.
+
+    >>> pattern = RandomPattern(seed=1, minimum=0.5)
+    >>> lengths = pattern.getSpikeLengths(40, 0, 600, ("a", 0))
+    >>> all(20 <= v < 40 for v in lengths)
+    True
+    >>> list(pattern.getSpikeLengths(40, 250, 10, ("a", 0))) == list(lengths[250:260])
+    True
+    >>> list(RandomPattern(seed=1).getSpikeLengths(40, 0, 10, ("a", 0))) == list(RandomPattern(seed=2).getSpikeLengths(40, 0, 10, ("a", 0)))
+    False
+    >>> list(pattern.getSpikeLengths(40, 0, 10, ("a", 0))) == list(pattern.getSpikeLengths(40, 0, 10, ("a", 1)))
+    False
+    >>> pattern = NoisePattern(seed=1, period=4)
+    >>> lengths = pattern.getSpikeLengths(40, 0, 300, "a")
+    >>> list(pattern.getSpikeLengths(40, 5, 50, "a")) == list(lengths[5:55])
+    True
+    >>> max(abs(a - b) for a, b in zip(lengths, lengths[1:])) < 40
+    True
+    >>> pattern.getSpikeLengths(40, 0, 0)
+    array('d')
+    """
+
+
+def _testSpikePenPattern():
+    """
+    >>> from fontTools.pens.recordingPen import RecordingPen
+    >>> points = [(i * 10, 0) for i in range(1000)]
+    >>> pattern = RandomPattern(seed=3)
+    >>> recorder = RecordingPen()
+    >>> pen = SpikePen(recorder, pattern=pattern, patternKey="a")
+    >>> pen.moveTo(points[0])
+    >>> for pt in points[1:] + points[:1]:
+    ...     pen.lineTo(pt)
+    >>> pen.closePath()
+    >>> spiked = spikeContour(points, pattern=pattern, patternKey=("a", 0))
+    >>> [args[0] for operator, args in recorder.value[:-1]] == spiked
+    True
+    >>> recorder = RecordingPen()
+    >>> pen = SpikePen(recorder, pattern=pattern, patternKey="a")
+    >>> pen.moveTo(points[0])
+    >>> for pt in points[1:]:
+    ...     pen.lineTo(pt)
+    >>> pen.endPath()
+    >>> spiked = spikeContour(points, closed=False, pattern=pattern, patternKey=("a", 0))
+    >>> [args[0] for operator, args in recorder.value[:-1]] == spiked
+    True
+    """
+
+
+def _testSpikeGlyphs():
+    """
+    >>> from fontTools.pens.recordingPen import RecordingPen
+    >>> def makeGlyphs(names="abc"):
+    ...     glyphs = []
+    ...     for name in names:
+    ...         glyph = _makeTestGlyphRect()
+    ...         glyph.name = name
+    ...         glyphs.append(glyph)
+    ...     return glyphs
+    >>> def drawings(glyphs):
+    ...     result = []
+    ...     for glyph in glyphs:
+    ...         recorder = RecordingPen()
+    ...         glyph.draw(recorder)
+    ...         result.append(recorder.value)
+    ...     return result
+    >>> glyphs = spikeGlyphs(makeGlyphs(), pattern=NoisePattern(seed=5), workers=1)
+    >>> single = drawings(glyphs)
+    >>> single[0] == single[1]
+    False
+    >>> glyphs = spikeGlyphs(makeGlyphs(), pattern=NoisePattern(seed=5), workers=2)
+    >>> drawings(glyphs) == single
+    True
+    >>> names = "abcdefghijklmnopqrstuvwxyz"
+    >>> single = drawings(spikeGlyphs(makeGlyphs(names), pattern=NoisePattern(seed=5), workers=1))
+    >>> drawings(spikeGlyphs(makeGlyphs(names), pattern=NoisePattern(seed=5), workers=2)) == single
+    True
+
+    A single chunk of glyphs is spiked in this process, the pattern
+    doesn't even have to be picklable then.
+
+    >>> class LocalPattern(SinePattern):
+    ...     pass
+    >>> glyphs = spikeGlyphs(makeGlyphs(), pattern=LocalPattern(period=4))
+    >>> drawings(glyphs) == drawings(spikeGlyphs(makeGlyphs(), pattern=SinePattern(period=4), workers=1))
+    True
+    >>> glyph = spikeGlyph(makeGlyphs()[1], pattern=NoisePattern(seed=5))
+    >>> drawings([glyph])[0] == single[1]
+    True
+    """
+
+
+def _testSpikePenComponents():
+    """
+    Components are passed on, SpikePen has no glyph set to draw them from.
+
+    >>> from fontPens.printPen import PrintPen
+    >>> pen = SpikePen(PrintPen())
+    >>> pen.addComponent("a", (1, 0, 0, 1, 10, 0))
+    pen.addComponent('a', (1, 0, 0, 1, 10, 0))
+    """
+
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
\ No newline at end of file
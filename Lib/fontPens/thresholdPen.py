@@ -16,6 +16,12 @@ class ThresholdPen(AbstractPen):
         self._lastPt = None
         self.otherPen = otherPen
 
+    def reset(self):
+        """
+        Forget the current contour, to draw another glyph with this pen.
+        """
+        self._lastPt = None
+
     def moveTo(self, pt):
         self._lastPt = pt
         self.otherPen.moveTo(pt)
@@ -19,6 +19,13 @@ class ThresholdPointPen(AbstractPointPen):
         self._offCurveBuffer = []
         self.otherPointPen = otherPointPen
 
+    def reset(self):
+        """
+        Forget the current contour, to draw another glyph with this pen.
+        """
+        self._lastPt = None
+        self._offCurveBuffer = []
+
     def beginPath(self, identifier=None):
         """Start a new sub path."""
         self.otherPointPen.beginPath(identifier)
@@ -43,18 +50,21 @@ class ThresholdPointPen(AbstractPointPen):
             self._offCurveBuffer = []
 
         elif segmentType == "line":
-            if self._lastPt is None:
+            lastPt = self._lastPt
+            if lastPt is None:
                 self.otherPointPen.addPoint(pt, segmentType, smooth, name)  # how to add kwargs?
                 self._lastPt = pt
-            elif distance(pt, self._lastPt) >= self.threshold:
+            elif distance(pt, lastPt) >= self.threshold:
                 # we're oncurve and far enough from the last oncurve
-                if self._offCurveBuffer:
+                addPoint = self.otherPointPen.addPoint
+                offCurveBuffer = self._offCurveBuffer
+                if offCurveBuffer:
                     # empty any buffered offcurves
-                    for buf_pt, buf_segmentType, buf_smooth, buf_name, buf_kwargs in self._offCurveBuffer:
-                        self.otherPointPen.addPoint(buf_pt, buf_segmentType, buf_smooth, buf_name)  # how to add kwargs?
+                    for buf_pt, buf_segmentType, buf_smooth, buf_name, buf_kwargs in offCurveBuffer:
+                        addPoint(buf_pt, buf_segmentType, buf_smooth, buf_name)  # how to add kwargs?
                     self._offCurveBuffer = []
                 # finally add the oncurve.
-                self.otherPointPen.addPoint(pt, segmentType, smooth, name)  # how to add kwargs?
+                addPoint(pt, segmentType, smooth, name)  # how to add kwargs?
                 self._lastPt = pt
             else:
                 # we're too short, so we're not going to make it.
@@ -1,21 +1,107 @@
+from array import array
+
 from fontTools.pens.pointPen import AbstractPointPen
 
+from fontPens.recordingPointPen import replayRecording
+
+
+def _identity(pt):
+    return pt
+
+
+def _makeTransformPoint(transformation):
+    """
+    Return a function transforming a single point, with fast paths for
+    the identity, translations and scale + translate transformations.
+    """
+    xx, xy, yx, yy, dx, dy = transformation
+    if xy or yx:
+        return transformation.transformPoint
+    if xx == 1 and yy == 1:
+        if not dx and not dy:
+            return _identity
+
+        def translate(pt):
+            x, y = pt
+            return x + dx, y + dy
+        return translate
+
+    def scale(pt):
+        x, y = pt
+        return x * xx + dx, y * yy + dy
+    return scale
+
+
+def _asTransform(transformation):
+    if not hasattr(transformation, "transformPoint"):
+        from fontTools.misc.transform import Transform
+        transformation = Transform(*transformation)
+    return transformation
+
+
+def transformCoordinates(coordinates, transformation):
+    """
+    Transform a flat sequence of x, y values, for instance an array('d'),
+    all at once. Return a new array('d').
+    """
+    xx, xy, yx, yy, dx, dy = transformation
+    xs = coordinates[0::2]
+    ys = coordinates[1::2]
+    result = array("d", coordinates)
+    if xy or yx:
+        result[0::2] = array("d", [xx * x + yx * y + dx for x, y in zip(xs, ys)])
+        result[1::2] = array("d", [xy * x + yy * y + dy for x, y in zip(xs, ys)])
+    else:
+        result[0::2] = array("d", [x * xx + dx for x in xs])
+        result[1::2] = array("d", [y * yy + dy for y in ys])
+    return result
+
+
+def transformRecording(recording, transformation):
+    """
+    Transform a recording, as produced by RecordingPointPen, all at once.
+    Return a new recording with all point coordinates and component
+    transformations transformed, which can be replayed into any pointpen.
+    """
+    transformation = _asTransform(transformation)
+    transformPoint = _makeTransformPoint(transformation)
+    transformComponent = transformation.transform
+    result = []
+    append = result.append
+    for operator, operands, kwargs in recording:
+        if operator == "addPoint":
+            operands = (transformPoint(operands[0]),) + operands[1:]
+        elif operator == "addComponent":
+            operands = (operands[0], transformComponent(operands[1])) + operands[2:]
+        append((operator, operands, kwargs))
+    return result
+
 
 class TransformPointPen(AbstractPointPen):
     """
     PointPen that transforms all coordinates, and passes them to another
     PointPen. It also transforms the transformation given to addComponent().
+
+    When outPen is a TransformPointPen itself, the two transformations are
+    combined and the points are passed directly to its outPen.
     """
 
     def __init__(self, outPen, transformation):
-        if not hasattr(transformation, "transformPoint"):
-            from fontTools.misc.transform import Transform
-            transformation = Transform(*transformation)
+        transformation = _asTransform(transformation)
+        if type(outPen) is TransformPointPen:
+            # first our transformation, then the one of outPen
+            transformation = outPen._transformation.transform(transformation)
+            outPen = outPen._outPen
         self._transformation = transformation
-        self._transformPoint = transformation.transformPoint
+        self._transformPoint = _makeTransformPoint(transformation)
         self._outPen = outPen
         self._stack = []
 
+    def reset(self):
+        """
+        TransformPointPen keeps no state between glyphs, there is nothing to reset.
+        """
+
     def beginPath(self, identifier=None):
         self._outPen.beginPath(identifier=identifier)
 
@@ -30,6 +116,13 @@ class TransformPointPen(AbstractPointPen):
         transformation = self._transformation.transform(transformation)
         self._outPen.addComponent(glyphName, transformation, identifier)
 
+    def addRecording(self, recording):
+        """
+        Transform a whole recording, as produced by RecordingPointPen,
+        at once and pass it on to the out pen.
+        """
+        replayRecording(transformRecording(recording, self._transformation), self._outPen)
+
 
 def _testTransformPointPen():
     """
@@ -42,6 +135,84 @@ def _testTransformPointPen():
     pen.addPoint((20, 20), segmentType='move', name='hello')
     >>> pen.endPath()
     pen.endPath()
+
+    >>> pen = TransformPointPen(PrintPointPen(), (2, 0, 0, 3, 20, 20))
+    >>> pen.beginPath()
+    pen.beginPath()
+    >>> pen.addPoint((10, 10), "line")
+    pen.addPoint((40, 50), segmentType='line')
+    >>> pen.endPath()
+    pen.endPath()
+
+    >>> pen = TransformPointPen(PrintPointPen(), (1, 0, 0, 1, 0, 0))
+    >>> pen.beginPath()
+    pen.beginPath()
+    >>> pen.addPoint((10, 10), "line", identifier="abc")
+    pen.addPoint((10, 10), segmentType='line', identifier='abc')
+    >>> pen.endPath()
+    pen.endPath()
+    """
+
+
+def _testTransformPointPenChain():
+    """
+    >>> from fontPens.printPointPen import PrintPointPen
+
+    >>> printPen = PrintPointPen()
+    >>> translatePen = TransformPointPen(printPen, (1, 0, 0, 1, 20, 20))
+    >>> skewPen = TransformPointPen(translatePen, (1, 0, 1, 1, 0, 0))
+    >>> pen = TransformPointPen(skewPen, (2, 0, 0, 2, 0, 0))
+    >>> pen._outPen is printPen
+    True
+    >>> pen.beginPath()
+    pen.beginPath()
+    >>> pen.addPoint((5, 5), "line")
+    pen.addPoint((40, 30), segmentType='line')
+    >>> pen.endPath()
+    pen.endPath()
+    >>> pen.addComponent("a", (1, 0, 0, 1, 10, 0))
+    pen.addComponent('a', <Transform [2 0 2 2 40 20]>)
+    """
+
+
+def _testTransformRecording():
+    """
+    >>> from fontPens.printPointPen import PrintPointPen
+    >>> from fontPens.recordingPointPen import RecordingPointPen
+
+    >>> recorder = RecordingPointPen()
+    >>> recorder.beginPath(identifier="contour1")
+    >>> recorder.addPoint((0, 0), "line", name="start")
+    >>> recorder.addPoint((100, 50), "line", identifier="point1")
+    >>> recorder.endPath()
+    >>> recorder.addComponent("a", (1, 0, 0, 1, 10, 0))
+    >>> recording = transformRecording(recorder.value, (2, 0, 0, 2, 0, 0))
+    >>> recording[1]
+    ('addPoint', ((0, 0), 'line', False, 'start'), {})
+    >>> recording[2]
+    ('addPoint', ((200, 100), 'line', False, None), {'identifier': 'point1'})
+    >>> recording[-1]
+    ('addComponent', ('a', <Transform [2 0 0 2 20 0]>), {})
+
+    >>> pen = TransformPointPen(TransformPointPen(PrintPointPen(), (1, 0, 0, 1, 5, 5)), (1, 0, 0.5, 1, 0, 0))
+    >>> pen.addRecording(recorder.value)
+    pen.beginPath(identifier='contour1')
+    pen.addPoint((5.0, 5.0), segmentType='line', name='start')
+    pen.addPoint((130.0, 55.0), segmentType='line', identifier='point1')
+    pen.endPath()
+    pen.addComponent('a', <Transform [1 0 0.5 1 15 5]>)
+    """
+
+
+def _testTransformCoordinates():
+    """
+    >>> from array import array
+    >>> transformCoordinates(array("d", [0, 0, 10, 20]), (2, 0, 0, 0.5, 10, 10))
+    array('d', [10.0, 10.0, 30.0, 20.0])
+    >>> transformCoordinates([0, 0, 10, 20], (1, 0, 1, 1, 0, 0))
+    array('d', [0.0, 0.0, 30.0, 20.0])
+    >>> transformCoordinates(array("d"), (1, 0, 1, 1, 0, 0))
+    array('d')
     """
 
 
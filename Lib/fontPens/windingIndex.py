@@ -0,0 +1,314 @@
+"""
+Winding numbers and point-in-glyph tests for many points at once.
+
+    index = buildWindingIndex(glyph, glyphSet=font)
+    inside = index.contains(points)
+
+The outline is drawn once and cut into edges going only up or only down,
+sorted by their lowest y. The points are sorted by y as well and swept from
+bottom to top: the edges crossing the horizontal line through a row of points
+are intersected once, each point of the row then counts the crossings on its
+right with a binary search.
+
+The edges are the exact lines and curves of the outline, or the lines of
+its flattened outline when approximateSegmentLength is given.
+"""
+from bisect import bisect_right
+
+from fontTools.misc.bezierTools import (
+    calcCubicParameters, calcQuadraticParameters, solveCubic, solveQuadratic, splitCubicAtT, splitQuadraticAtT,
+)
+from fontTools.pens.basePen import BasePen
+
+from fontPens.flattenPen import FlattenPen
+
+
+_LINE = 0
+_QUADRATIC = 1
+_CUBIC = 2
+
+
+def _lineEdge(pt0, pt1):
+    (x0, y0), (x1, y1) = pt0, pt1
+    if y0 == y1:
+        # horizontal lines never cross a horizontal ray
+        return None
+    direction = 1 if y1 > y0 else -1
+    return (min(y0, y1), max(y0, y1), direction, _LINE, (x0, y0, (x1 - x0) / (y1 - y0)))
+
+
+def _curveEdge(points, kind):
+    y0 = points[0][1]
+    y1 = points[-1][1]
+    if y0 == y1:
+        # a monotonic piece with the same start and end height is flat
+        return None
+    direction = 1 if y1 > y0 else -1
+    if kind == _CUBIC:
+        (ax, ay), (bx, by), (cx, cy), (dx, dy) = calcCubicParameters(*points)
+        coefficients = (ax, bx, cx, dx, ay, by, cy, dy)
+    else:
+        (ax, ay), (bx, by), (cx, cy) = calcQuadraticParameters(*points)
+        coefficients = (ax, bx, cx, ay, by, cy)
+    return (min(y0, y1), max(y0, y1), direction, kind, coefficients)
+
+
+def _pickRoot(roots):
+    best = None
+    for t in roots:
+        if -1e-9 <= t <= 1 + 1e-9:
+            t = min(max(t, 0.0), 1.0)
+            if best is None or abs(t - .5) < abs(best - .5):
+                best = t
+    return best
+
+
+def _crossing(edge, y):
+    # the x of the edge at height y
+    kind = edge[3]
+    data = edge[4]
+    if kind == _LINE:
+        x0, y0, slope = data
+        return x0 + (y - y0) * slope
+    if kind == _CUBIC:
+        ax, bx, cx, dx, ay, by, cy, dy = data
+        t = _pickRoot(solveCubic(ay, by, cy, dy - y))
+        if t is None:
+            t = 0.0 if abs(dy - y) < abs(ay + by + cy + dy - y) else 1.0
+        return ((ax * t + bx) * t + cx) * t + dx
+    ax, bx, cx, ay, by, cy = data
+    t = _pickRoot(solveQuadratic(ay, by, cy - y))
+    if t is None:
+        t = 0.0 if abs(cy - y) < abs(ay + by + cy - y) else 1.0
+    return (ax * t + bx) * t + cx
+
+
+def _extremaT(values):
+    return sorted(t for t in values if 0 < t < 1)
+
+
+class _EdgePen(BasePen):
+    """
+    Collects the y-monotonic edges of an outline.
+    """
+
+    def __init__(self, glyphSet=None):
+        BasePen.__init__(self, glyphSet)
+        self.edges = []
+        self.firstPt = None
+
+    def _addEdge(self, edge):
+        if edge is not None:
+            self.edges.append(edge)
+
+    def _moveTo(self, pt):
+        self.firstPt = pt
+
+    def _lineTo(self, pt):
+        self._addEdge(_lineEdge(self._getCurrentPoint(), pt))
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        pt0 = self._getCurrentPoint()
+        # split at the vertical extrema, where dy/dt is 0
+        (ax, ay), (bx, by), (cx, cy), (dx, dy) = calcCubicParameters(pt0, pt1, pt2, pt3)
+        ts = _extremaT(solveQuadratic(3 * ay, 2 * by, cy))
+        for piece in (splitCubicAtT(pt0, pt1, pt2, pt3, *ts) if ts else [(pt0, pt1, pt2, pt3)]):
+            self._addEdge(_curveEdge(piece, _CUBIC))
+
+    def _qCurveToOne(self, pt1, pt2):
+        pt0 = self._getCurrentPoint()
+        (ax, ay), (bx, by), (cx, cy) = calcQuadraticParameters(pt0, pt1, pt2)
+        ts = _extremaT([-by / (2 * ay)] if ay else [])
+        for piece in (splitQuadraticAtT(pt0, pt1, pt2, *ts) if ts else [(pt0, pt1, pt2)]):
+            self._addEdge(_curveEdge(piece, _QUADRATIC))
+
+    def _closePath(self):
+        currentPt = self._getCurrentPoint()
+        if currentPt is not None and self.firstPt is not None and currentPt != self.firstPt:
+            self._addEdge(_lineEdge(currentPt, self.firstPt))
+        self.firstPt = None
+
+    # open contours are closed, like when they are filled
+    _endPath = _closePath
+
+    def addComponent(self, glyphName, transformation):
+        if self.glyphSet is None:
+            # without a glyph set components can't be drawn
+            return
+        BasePen.addComponent(self, glyphName, transformation)
+
+
+class WindingIndex(object):
+    """
+    The edges of an outline, prepared for winding number queries.
+
+    Winding numbers are positive for counter-clockwise contours. A point
+    exactly on the outline may be counted inside or outside.
+    """
+
+    def __init__(self, edges):
+        self.edges = sorted(edges, key=lambda edge: edge[0])
+
+    def __len__(self):
+        return len(self.edges)
+
+    def windings(self, points):
+        """
+        Return the winding numbers of the outline around each of points, in order.
+        """
+        points = list(points)
+        result = [0] * len(points)
+        edges = self.edges
+        if not edges or not points:
+            return result
+        order = sorted(range(len(points)), key=lambda index: points[index][1])
+        edgeCount = len(edges)
+        nextEdge = 0
+        active = []
+        position = 0
+        pointCount = len(order)
+        while position < pointCount:
+            y = points[order[position]][1]
+            # the edges crossing height y: yMin <= y < yMax
+            while nextEdge < edgeCount and edges[nextEdge][0] <= y:
+                active.append(edges[nextEdge])
+                nextEdge += 1
+            active = [edge for edge in active if edge[1] > y]
+            crossings = sorted((_crossing(edge, y), edge[2]) for edge in active)
+            xs = [x for x, direction in crossings]
+            # the winding of the crossings right of each crossing
+            rightWindings = [0] * (len(crossings) + 1)
+            for i in range(len(crossings) - 1, -1, -1):
+                rightWindings[i] = rightWindings[i + 1] + crossings[i][1]
+            while position < pointCount:
+                index = order[position]
+                x, pointY = points[index]
+                if pointY != y:
+                    break
+                result[index] = rightWindings[bisect_right(xs, x)]
+                position += 1
+        return result
+
+    def winding(self, pt):
+        """
+        Return the winding number of the outline around pt.
+        """
+        return self.windings([pt])[0]
+
+    def contains(self, points, evenOdd=False):
+        """
+        Return for each of points whether it is inside the outline, with the
+        nonzero fill rule, or the even-odd rule when evenOdd is True.
+        """
+        if evenOdd:
+            return [winding % 2 == 1 for winding in self.windings(points)]
+        return [winding != 0 for winding in self.windings(points)]
+
+    def containsPoint(self, pt, evenOdd=False):
+        """
+        Return whether pt is inside the outline.
+        """
+        return self.contains([pt], evenOdd)[0]
+
+
+def buildWindingIndex(glyph, glyphSet=None, approximateSegmentLength=None, componentCache=None):
+    """
+    Draw glyph once and return a WindingIndex of its outline. Components
+    are drawn from glyphSet, when given, and skipped otherwise.
+
+    With approximateSegmentLength, the edges are the lines of the outline
+    flattened by a FlattenPen, to match other results on flattened outlines.
+    There are many more of them, the exact edges are usually faster.
+    """
+    pen = _EdgePen(glyphSet)
+    if approximateSegmentLength is None:
+        glyph.draw(pen)
+    else:
+        glyph.draw(FlattenPen(
+            pen, approximateSegmentLength=approximateSegmentLength, glyphSet=glyphSet, componentCache=componentCache))
+    return WindingIndex(pen.edges)
+
+
+# =========
+# = tests =
+# =========
+
+def _makeTestGlyph():
+    # a counter-clockwise square with a clockwise curved hole, and an overlapping clockwise square
+    from fontParts.fontshell import RGlyph
+    testGlyph = RGlyph()
+    testGlyph.name = "testGlyph"
+    testGlyph.width = 500
+    pen = testGlyph.getPen()
+    pen.moveTo((0, 0))
+    pen.lineTo((400, 0))
+    pen.lineTo((400, 400))
+    pen.lineTo((0, 400))
+    pen.closePath()
+    pen.moveTo((100, 200))
+    pen.curveTo((100, 300), (300, 300), (300, 200))
+    pen.curveTo((300, 100), (100, 100), (100, 200))
+    pen.closePath()
+    pen.moveTo((350, 350))
+    pen.lineTo((350, 450))
+    pen.lineTo((450, 450))
+    pen.lineTo((450, 350))
+    pen.closePath()
+    return testGlyph
+
+
+def _testWindingIndex():
+    """
+    >>> glyph = _makeTestGlyph()
+    >>> index = buildWindingIndex(glyph)
+    >>> points = [(50, 50), (200, 200), (200, 290), (375, 375), (425, 425), (500, 200), (200, -10)]
+    >>> index.windings(points)
+    [1, 0, 1, 0, -1, 0, 0]
+    >>> index.contains(points)
+    [True, False, True, False, True, False, False]
+    >>> index.contains(points, evenOdd=True)
+    [True, False, True, False, True, False, False]
+    >>> index.winding((200, 250)), index.containsPoint((200, 260))
+    (0, False)
+
+    The same as fontTools.pens.pointInsidePen, for a grid of points,
+    with the exact and the flattened outline.
+
+    >>> from fontTools.pens.pointInsidePen import PointInsidePen
+    >>> points = [(x + .5, y + .5) for x in range(-20, 480, 20) for y in range(-20, 480, 20)]
+    >>> expected = []
+    >>> for pt in points:
+    ...     pen = PointInsidePen(None, pt)
+    ...     glyph.draw(pen)
+    ...     expected.append(pen.getWinding())
+    >>> index.windings(points) == expected
+    True
+    >>> flattened = buildWindingIndex(glyph, approximateSegmentLength=5)
+    >>> sum(a != b for a, b in zip(flattened.windings(points), index.windings(points)))
+    0
+
+    Components are drawn from the glyph set, when given.
+
+    >>> from fontParts.fontshell import RGlyph
+    >>> composite = RGlyph()
+    >>> pen = composite.getPen()
+    >>> pen.addComponent("testGlyph", (1, 0, 0, 1, 500, 0))
+    >>> pen.moveTo((0, 0))
+    >>> pen.lineTo((0, 100))
+    >>> pen.lineTo((100, 100))
+    >>> pen.closePath()
+    >>> buildWindingIndex(composite).windings([(550, 50), (10, 50)])
+    [0, -1]
+    >>> buildWindingIndex(composite, approximateSegmentLength=5).windings([(550, 50), (10, 50)])
+    [0, -1]
+    >>> glyphSet = {"testGlyph": glyph}
+    >>> buildWindingIndex(composite, glyphSet=glyphSet).windings([(550, 50), (10, 50)])
+    [1, -1]
+    >>> buildWindingIndex(composite, glyphSet=glyphSet, approximateSegmentLength=5).windings([(550, 50), (10, 50)])
+    [1, -1]
+    """
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
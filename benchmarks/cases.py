@@ -0,0 +1,680 @@
+"""
+The benchmark cases.
+
+A case is a function decorated with @case(name) that takes a SyntheticFont
+and returns a function without arguments doing the work to time, once over
+the whole font. Cases import what they need from fontPens when they are
+set up, a case needing something a revision doesn't have is skipped.
+"""
+import fnmatch
+
+from fontTools.pens.basePen import NullPen
+from fontTools.pens.pointPen import AbstractPointPen
+
+
+_cases = []
+
+
+def case(name):
+    def decorator(function):
+        _cases.append((name, function))
+        return function
+    return decorator
+
+
+def getCases(patterns=None):
+    """
+    Return (name, setup function) pairs for all cases, or the cases
+    matching any of the fnmatch style patterns.
+    """
+    if not patterns:
+        return list(_cases)
+    return [(name, setup) for name, setup in _cases if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)]
+
+
+class _NullPointPen(AbstractPointPen):
+
+    def beginPath(self, identifier=None, **kwargs):
+        pass
+
+    def endPath(self):
+        pass
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        pass
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        pass
+
+
+def _drawFont(font, makePen):
+    def run():
+        for glyph in font.values():
+            glyph.draw(makePen(glyph))
+    return run
+
+
+def _drawPointsFont(font, makePen):
+    def run():
+        for glyph in font.values():
+            glyph.drawPoints(makePen(glyph))
+    return run
+
+
+def _segments(font, operator):
+    # the segments of one kind, with their start point
+    segments = []
+    for glyph in font.values():
+        currentPt = None
+        for op, operands in glyph.recording:
+            if op == operator:
+                segments.append((currentPt,) + tuple(operands))
+            if operands:
+                currentPt = operands[-1]
+    return segments
+
+
+def _quadraticSegments(font):
+    # split each cubic in two quadratics, close enough for timing
+    from fontPens.penTools import middlePoint
+    segments = []
+    for pt0, pt1, pt2, pt3 in _segments(font, "curveTo"):
+        mid = middlePoint(pt1, pt2)
+        segments.append((pt0, pt1, mid))
+        segments.append((mid, pt2, pt3))
+    return segments
+
+
+# ========
+# = pens =
+# ========
+
+@case("FlattenPen")
+def _flattenPen(font):
+    from fontPens.flattenPen import FlattenPen
+    nullPen = NullPen()
+    return _drawFont(font, lambda glyph: FlattenPen(nullPen, approximateSegmentLength=5, segmentLines=True))
+
+
+@case("SamplingPen")
+def _samplingPen(font):
+    from fontPens.flattenPen import SamplingPen
+    nullPen = NullPen()
+    return _drawFont(font, lambda glyph: SamplingPen(nullPen, steps=10))
+
+
+@case("FlattenPen.adapters")
+def _flattenPenAdapters(font):
+    # FlattenPen between point pens, the way FlattenPointPen is used
+    from fontTools.pens.pointPen import PointToSegmentPen, SegmentToPointPen
+    from fontPens.flattenPen import FlattenPen
+    nullPointPen = _NullPointPen()
+    return _drawPointsFont(font, lambda glyph: PointToSegmentPen(
+        FlattenPen(SegmentToPointPen(nullPointPen), approximateSegmentLength=5, segmentLines=True)))
+
+
+@case("FlattenPointPen")
+def _flattenPointPen(font):
+    from fontPens.flattenPen import FlattenPointPen
+    nullPointPen = _NullPointPen()
+    return _drawPointsFont(font, lambda glyph: FlattenPointPen(nullPointPen, approximateSegmentLength=5, segmentLines=True))
+
+
+@case("SamplingPen.adapters")
+def _samplingPenAdapters(font):
+    from fontTools.pens.pointPen import PointToSegmentPen, SegmentToPointPen
+    from fontPens.flattenPen import SamplingPen
+    nullPointPen = _NullPointPen()
+    return _drawPointsFont(font, lambda glyph: PointToSegmentPen(SamplingPen(SegmentToPointPen(nullPointPen), steps=10)))
+
+
+@case("SamplingPointPen")
+def _samplingPointPen(font):
+    from fontPens.flattenPen import SamplingPointPen
+    nullPointPen = _NullPointPen()
+    return _drawPointsFont(font, lambda glyph: SamplingPointPen(nullPointPen, steps=10))
+
+
+def _compositeGlyphs(font, baseCount=20):
+    # a composite per glyph, a base glyph and a scaled down accent from a few base glyphs
+    from syntheticFont import SyntheticGlyph
+    baseNames = sorted(font)[:baseCount]
+    composites = []
+    for i, glyphName in enumerate(sorted(font)):
+        recording = [
+            ("addComponent", (baseNames[i % len(baseNames)], (1, 0, 0, 1, 0, 0))),
+            ("addComponent", (baseNames[(i * 7) % len(baseNames)], (.3, 0, 0, .3, 200, 700))),
+        ]
+        composites.append(SyntheticGlyph(glyphName + ".composite", font[glyphName].width, recording))
+    return composites
+
+
+def _decomposingCase(penClass, **kwargs):
+    # components decomposed the BasePen way, each base glyph drawn again for each component
+    def setup(font):
+        from fontTools.pens.basePen import BasePen
+        from fontPens import flattenPen
+        composites = _compositeGlyphs(font)
+        nullPen = NullPen()
+
+        class DecomposingPen(getattr(flattenPen, penClass)):
+            def addComponent(self, glyphName, transformation):
+                BasePen.addComponent(self, glyphName, transformation)
+
+        def run():
+            for glyph in composites:
+                pen = DecomposingPen(nullPen, **kwargs)
+                pen.glyphSet = font
+                glyph.draw(pen)
+        return run
+    return setup
+
+
+def _componentCacheCase(penClass, **kwargs):
+    # each base glyph flattened once per run
+    def setup(font):
+        from fontPens import flattenPen
+        composites = _compositeGlyphs(font)
+        nullPen = NullPen()
+        penClass_ = getattr(flattenPen, penClass)
+
+        def run():
+            componentCache = {}
+            for glyph in composites:
+                glyph.draw(penClass_(nullPen, glyphSet=font, componentCache=componentCache, **kwargs))
+        return run
+    return setup
+
+
+case("components.FlattenPen.decompose")(_decomposingCase("FlattenPen", approximateSegmentLength=5, segmentLines=True))
+case("components.FlattenPen.cache")(_componentCacheCase("FlattenPen", approximateSegmentLength=5, segmentLines=True))
+case("components.SamplingPen.decompose")(_decomposingCase("SamplingPen", steps=10))
+case("components.SamplingPen.cache")(_componentCacheCase("SamplingPen", steps=10))
+
+
+@case("MarginPen")
+def _marginPen(font):
+    from fontPens.marginPen import MarginPen
+
+    def makePen(glyph):
+        return MarginPen(font, 350, isHorizontal=True)
+    return _drawFont(font, makePen)
+
+
+@case("AngledMarginPen")
+def _angledMarginPen(font):
+    from fontPens.angledMarginPen import AngledMarginPen
+    return _drawFont(font, lambda glyph: AngledMarginPen(font, glyph.width, font.italicAngle))
+
+
+@case("ThresholdPen")
+def _thresholdPen(font):
+    from fontPens.thresholdPen import ThresholdPen
+    nullPen = NullPen()
+    return _drawFont(font, lambda glyph: ThresholdPen(nullPen, threshold=10))
+
+
+@case("ThresholdPointPen")
+def _thresholdPointPen(font):
+    from fontPens.thresholdPointPen import ThresholdPointPen
+    nullPen = _NullPointPen()
+    return _drawPointsFont(font, lambda glyph: ThresholdPointPen(nullPen, threshold=10))
+
+
+@case("SpikePen")
+def _spikePen(font):
+    from fontTools.pens.recordingPen import RecordingPen
+    from fontPens.flattenPen import FlattenPen
+    from fontPens.spikePen import SpikePen
+    # SpikePen draws polylines, flatten the font first as spikeGlyph() does
+    recordings = []
+    for glyph in font.values():
+        recorder = RecordingPen()
+        glyph.draw(FlattenPen(recorder, approximateSegmentLength=20, segmentLines=True))
+        recordings.append(recorder)
+    nullPen = NullPen()
+
+    def run():
+        for recorder in recordings:
+            recorder.replay(SpikePen(nullPen, spikeLength=40))
+    return run
+
+
+@case("DigestPointPen")
+def _digestPointPen(font):
+    from fontPens.digestPointPen import DigestPointPen
+
+    def run():
+        for glyph in font.values():
+            pen = DigestPointPen()
+            glyph.drawPoints(pen)
+            pen.getDigest()
+            pen.getDigestPointsOnly()
+    return run
+
+
+@case("DigestPointStructurePen")
+def _digestPointStructurePen(font):
+    from fontPens.digestPointPen import DigestPointStructurePen
+
+    def run():
+        for glyph in font.values():
+            pen = DigestPointStructurePen()
+            glyph.drawPoints(pen)
+            pen.getDigest()
+    return run
+
+
+@case("GuessSmoothPointPen")
+def _guessSmoothPointPen(font):
+    from fontPens.guessSmoothPointPen import GuessSmoothPointPen
+    nullPen = _NullPointPen()
+    return _drawPointsFont(font, lambda glyph: GuessSmoothPointPen(nullPen))
+
+
+@case("TransformPointPen")
+def _transformPointPen(font):
+    from fontPens.transformPointPen import TransformPointPen
+    nullPen = _NullPointPen()
+    return _drawPointsFont(font, lambda glyph: TransformPointPen(nullPen, (1, 0, .2, 1, 10, 0)))
+
+
+@case("RecordingPointPen")
+def _recordingPointPen(font):
+    from fontPens.recordingPointPen import RecordingPointPen
+    return _drawPointsFont(font, lambda glyph: RecordingPointPen())
+
+
+@case("RecordingPointPen.replay")
+def _recordingPointPenReplay(font):
+    from fontPens.recordingPointPen import RecordingPointPen
+    recordings = []
+    for glyph in font.values():
+        pen = RecordingPointPen()
+        glyph.drawPoints(pen)
+        recordings.append(pen)
+    nullPen = _NullPointPen()
+
+    def run():
+        for pen in recordings:
+            pen.replay(nullPen)
+    return run
+
+
+@case("CompactRecordingPointPen")
+def _compactRecordingPointPen(font):
+    from fontPens.recordingPointPen import CompactRecordingPointPen
+    return _drawPointsFont(font, lambda glyph: CompactRecordingPointPen())
+
+
+@case("PrintPen")
+def _printPen(font):
+    import io
+    from fontPens.printPen import PrintPen
+
+    # raises a TypeError, and skips the case, on revisions that only print to stdout
+    PrintPen(stream=io.StringIO())
+
+    def run():
+        stream = io.StringIO()
+        for glyph in font.values():
+            pen = PrintPen(stream=stream, bufferSize=1000)
+            glyph.draw(pen)
+            pen.flush()
+    return run
+
+
+@case("penPipeline")
+def _penPipeline(font):
+    from fontTools.pens.transformPen import TransformPen
+    from fontPens.flattenPen import FlattenPen
+    from fontPens.penPipeline import buildPenPipeline
+    from fontPens.spikePen import SpikePen
+    from fontPens.thresholdPen import ThresholdPen
+    stages = [
+        (FlattenPen, dict(approximateSegmentLength=10, segmentLines=True)),
+        (ThresholdPen, dict(threshold=8)),
+        (SpikePen, dict(spikeLength=20)),
+        (TransformPen, dict(transformation=(1, 0, .2, 1, 0, 0))),
+    ]
+    nullPen = NullPen()
+    return _drawFont(font, lambda glyph: buildPenPipeline(stages, nullPen))
+
+
+@case("Instrumentation")
+def _instrumentation(font):
+    from fontPens.flattenPen import FlattenPen
+    from fontPens.penInstrumentation import Instrumentation
+    from fontPens.thresholdPen import ThresholdPen
+    nullPen = NullPen()
+
+    def run():
+        instrumentation = Instrumentation()
+        for glyph in font.values():
+            glyph.draw(instrumentation.instrument(FlattenPen(ThresholdPen(nullPen), approximateSegmentLength=5)))
+        instrumentation.report(groupByClass=True)
+    return run
+
+
+@case("packRecording")
+def _packRecording(font):
+    from fontPens.recordingFile import packRecording, unpackRecording
+    recordings = [glyph.recording for glyph in font.values()]
+
+    def run():
+        for recording in recordings:
+            unpackRecording(packRecording(recording))
+    return run
+
+
+# =============
+# = instances =
+# =============
+
+def _penFactories(font):
+    from fontPens.angledMarginPen import AngledMarginPen
+    from fontPens.digestPointPen import DigestPointPen
+    from fontPens.flattenPen import FlattenPen
+    from fontPens.marginPen import MarginPen
+    from fontPens.thresholdPen import ThresholdPen
+    nullPen = NullPen()
+    return [
+        ("MarginPen", lambda glyph: MarginPen(font, 350), "draw"),
+        ("AngledMarginPen", lambda glyph: AngledMarginPen(font, glyph.width, font.italicAngle), "draw"),
+        ("DigestPointPen", lambda glyph: DigestPointPen(), "drawPoints"),
+        ("ThresholdPen", lambda glyph: ThresholdPen(nullPen), "draw"),
+        ("FlattenPen", lambda glyph: FlattenPen(nullPen), "draw"),
+    ]
+
+
+def _instancesCase(name):
+    # one new pen per glyph, all kept alive: the peak memory shows the size of the instances
+    def setup(font):
+        for penName, makePen, drawMethod in _penFactories(font):
+            if penName == name:
+                break
+
+        def run():
+            pens = [makePen(glyph) for glyph in font.values() for i in range(10)]
+            return pens
+        return run
+    return setup
+
+
+def _reuseCase(name):
+    # one pen for all glyphs, reset between glyphs
+    def setup(font):
+        for penName, makePen, drawMethod in _penFactories(font):
+            if penName == name:
+                break
+        pen = makePen(None if drawMethod == "drawPoints" else next(iter(font.values())))
+        reset = pen.reset
+
+        def run():
+            for glyph in font.values():
+                reset()
+                getattr(glyph, drawMethod)(pen)
+        return run
+    return setup
+
+
+def _newPenCase(name):
+    # a new pen per glyph, to compare with the reused pen
+    def setup(font):
+        for penName, makePen, drawMethod in _penFactories(font):
+            if penName == name:
+                break
+
+        def run():
+            for glyph in font.values():
+                getattr(glyph, drawMethod)(makePen(glyph))
+        return run
+    return setup
+
+
+for _name in ("MarginPen", "AngledMarginPen", "DigestPointPen", "ThresholdPen", "FlattenPen"):
+    case("instances.%s" % _name)(_instancesCase(_name))
+    case("new.%s" % _name)(_newPenCase(_name))
+    case("reuse.%s" % _name)(_reuseCase(_name))
+
+
+# =================
+# = outline index =
+# =================
+
+@case("OutlineIndex.build")
+def _outlineIndexBuild(font):
+    from fontPens.outlineIndex import indexGlyph
+
+    def run():
+        for glyph in font.values():
+            indexGlyph(glyph)
+    return run
+
+
+@case("OutlineIndex.distance")
+def _outlineIndexDistance(font):
+    from fontPens.outlineIndex import indexGlyph
+    indexes = [indexGlyph(glyph) for glyph in font.values()]
+    points = [(x, y) for x in range(0, 800, 100) for y in range(-100, 900, 100)]
+
+    def run():
+        for index in indexes:
+            for pt in points:
+                index.distance(pt)
+    return run
+
+
+@case("OutlineIndex.minimumDistance")
+def _outlineIndexMinimumDistance(font):
+    # pairs of glyphs side by side, as in a kerning check
+    from fontPens.outlineIndex import indexGlyph
+    glyphs = list(font.values())
+    indexes = [indexGlyph(glyph) for glyph in glyphs]
+    pairs = [(indexes[i], indexes[i - 1], (glyphs[i].width - 100, 0)) for i in range(len(glyphs))]
+
+    def run():
+        for index, other, offset in pairs:
+            index.minimumDistance(other, offset)
+    return run
+
+
+# ===========
+# = winding =
+# ===========
+
+def _samplePoints(glyph, count=20):
+    # a grid of points over the advance and the height of the glyphs
+    return [(glyph.width * (i + .5) / count, -100 + 1000 * (j + .5) / count) for i in range(count) for j in range(count)]
+
+
+@case("PointInsidePen.grid")
+def _pointInsidePenGrid(font):
+    # one drawing per point
+    from fontTools.pens.pointInsidePen import PointInsidePen
+    samples = [(glyph, _samplePoints(glyph)) for glyph in font.values()]
+
+    def run():
+        for glyph, points in samples:
+            for pt in points:
+                pen = PointInsidePen(None, pt)
+                glyph.draw(pen)
+                pen.getWinding()
+    return run
+
+
+@case("WindingIndex.grid")
+def _windingIndexGrid(font):
+    from fontPens.windingIndex import buildWindingIndex
+    samples = [(glyph, _samplePoints(glyph)) for glyph in font.values()]
+
+    def run():
+        for glyph, points in samples:
+            buildWindingIndex(glyph).windings(points)
+    return run
+
+
+@case("WindingIndex.grid.flattened")
+def _windingIndexGridFlattened(font):
+    from fontPens.windingIndex import buildWindingIndex
+    samples = [(glyph, _samplePoints(glyph)) for glyph in font.values()]
+
+    def run():
+        for glyph, points in samples:
+            buildWindingIndex(glyph, approximateSegmentLength=5).windings(points)
+    return run
+
+
+# =================
+# = intersections =
+# =================
+
+@case("contourIntersections.find")
+def _findIntersections(font):
+    from fontPens.contourIntersections import findIntersections
+
+    def run():
+        for glyph in font.values():
+            findIntersections(glyph)
+    return run
+
+
+@case("contourIntersections.any")
+def _hasIntersections(font):
+    from fontPens.contourIntersections import hasIntersections
+
+    def run():
+        for glyph in font.values():
+            hasIntersections(glyph)
+    return run
+
+
+# ========
+# = glif =
+# ========
+
+def _glifs(font):
+    from fontTools.ufoLib.glifLib import writeGlyphToString
+    return [writeGlyphToString(glyph.name, glyph, glyph.drawPoints) for glyph in font.values()]
+
+
+@case("glif.glifLib.readGlyphFromString")
+def glifLibCase(font):
+    from fontTools.ufoLib.glifLib import readGlyphFromString
+    glifs = _glifs(font)
+
+    class Glyph(object):
+        pass
+
+    def run():
+        for glif in glifs:
+            readGlyphFromString(glif, Glyph(), _NullPointPen())
+    return run
+
+
+@case("glif.drawGlif")
+def drawGlifCase(font):
+    from fontPens.glifReader import drawGlif
+    glifs = _glifs(font)
+
+    def run():
+        for glif in glifs:
+            drawGlif(glif, pointPen=_NullPointPen())
+    return run
+
+
+# ============
+# = penTools =
+# ============
+
+@case("penTools.distance")
+def _distance(font):
+    from fontPens.penTools import distance
+    lines = _segments(font, "lineTo")
+
+    def run():
+        for pt0, pt1 in lines:
+            distance(pt0, pt1)
+    return run
+
+
+@case("penTools.middlePoint")
+def _middlePoint(font):
+    from fontPens.penTools import middlePoint
+    lines = _segments(font, "lineTo")
+
+    def run():
+        for pt0, pt1 in lines:
+            middlePoint(pt0, pt1)
+    return run
+
+
+@case("penTools.interpolatePoint")
+def _interpolatePoint(font):
+    from fontPens.penTools import interpolatePoint
+    lines = _segments(font, "lineTo")
+
+    def run():
+        for pt0, pt1 in lines:
+            interpolatePoint(pt0, pt1, .3)
+    return run
+
+
+@case("penTools.getCubicPoint")
+def _getCubicPoint(font):
+    from fontPens.penTools import getCubicPoint
+    curves = _segments(font, "curveTo")
+    ts = [i / 10 for i in range(11)]
+
+    def run():
+        for pt0, pt1, pt2, pt3 in curves:
+            for t in ts:
+                getCubicPoint(t, pt0, pt1, pt2, pt3)
+    return run
+
+
+@case("penTools.getCubicPoints")
+def _getCubicPoints(font):
+    from fontPens.penTools import getCubicPoints
+    curves = _segments(font, "curveTo")
+    ts = [i / 10 for i in range(11)]
+
+    def run():
+        for pt0, pt1, pt2, pt3 in curves:
+            getCubicPoints(ts, pt0, pt1, pt2, pt3)
+    return run
+
+
+@case("penTools.getQuadraticPoint")
+def _getQuadraticPoint(font):
+    from fontPens.penTools import getQuadraticPoint
+    curves = _quadraticSegments(font)
+    ts = [i / 10 for i in range(11)]
+
+    def run():
+        for pt0, pt1, pt2 in curves:
+            for t in ts:
+                getQuadraticPoint(t, pt0, pt1, pt2)
+    return run
+
+
+@case("penTools.estimateCubicCurveLength")
+def _estimateCubicCurveLength(font):
+    from fontPens.penTools import estimateCubicCurveLength
+    curves = _segments(font, "curveTo")
+
+    def run():
+        for pt0, pt1, pt2, pt3 in curves:
+            estimateCubicCurveLength(pt0, pt1, pt2, pt3)
+    return run
+
+
+@case("penTools.estimateQuadraticCurveLength")
+def _estimateQuadraticCurveLength(font):
+    from fontPens.penTools import estimateQuadraticCurveLength
+    curves = _quadraticSegments(font)
+
+    def run():
+        for pt0, pt1, pt2 in curves:
+            estimateQuadraticCurveLength(pt0, pt1, pt2)
+    return run
@@ -0,0 +1,203 @@
+"""
+Benchmark the fontPens pens and pen tools on a synthetic font.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --glyphs 1000 --case "*Pen" --json results.json
+    python benchmarks/run.py --compare master HEAD
+
+Each case is timed over the whole font, the best of --repeat runs is
+reported as time and as points per second. The peak memory allocated
+during a run is measured in a separate run with tracemalloc.
+
+--compare checks out both revisions in temporary git worktrees, runs
+this script against the Lib folder of each and prints the ratios.
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+_here = os.path.dirname(os.path.abspath(__file__))
+
+
+def timeCase(run, repeat):
+    best = None
+    for i in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        duration = time.perf_counter() - start
+        if best is None or duration < best:
+            best = duration
+    return best
+
+
+def measurePeakMemory(run):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def runBenchmarks(options):
+    from cases import getCases
+    from syntheticFont import makeSyntheticFont
+    import fontPens
+
+    font = makeSyntheticFont(
+        glyphCount=options.glyphs,
+        contoursPerGlyph=options.contours,
+        segmentsPerContour=options.segments,
+        curveRatio=options.curveRatio,
+        seed=options.seed)
+    pointCount = font.pointCount
+    results = dict(
+        fontPens=os.path.dirname(os.path.abspath(fontPens.__file__)),
+        python=sys.version.split()[0],
+        glyphs=options.glyphs,
+        points=pointCount,
+        cases={},
+    )
+    for name, setup in getCases(options.case):
+        try:
+            run = setup(font)
+        except (ImportError, AttributeError, TypeError) as error:
+            results["cases"][name] = dict(skipped=str(error))
+            continue
+        # warm up
+        run()
+        duration = timeCase(run, options.repeat)
+        result = dict(time=duration, pointsPerSecond=pointCount / duration if duration else None)
+        if options.memory:
+            result["peakMemory"] = measurePeakMemory(run)
+        results["cases"][name] = result
+    return results
+
+
+def _formatMemory(value):
+    if value is None:
+        return "-"
+    return "%.1f KiB" % (value / 1024)
+
+
+def printResults(results, stream=sys.stdout):
+    stream.write("fontPens: %s\n" % results["fontPens"])
+    stream.write("python %s, %d glyphs, %d points\n\n" % (results["python"], results["glyphs"], results["points"]))
+    stream.write("%-40s %12s %14s %14s\n" % ("case", "time (ms)", "points/s", "peak memory"))
+    for name, result in results["cases"].items():
+        if "skipped" in result:
+            stream.write("%-40s skipped: %s\n" % (name, result["skipped"]))
+            continue
+        stream.write("%-40s %12.3f %14.0f %14s\n" % (
+            name, result["time"] * 1000, result["pointsPerSecond"] or 0, _formatMemory(result.get("peakMemory"))))
+
+
+def printComparison(revisionA, resultsA, revisionB, resultsB, stream=sys.stdout):
+    stream.write("%d glyphs, %d points\n\n" % (resultsA["glyphs"], resultsA["points"]))
+    stream.write("%-40s %12s %12s %8s %14s %14s\n" % (
+        "case", "%s (ms)" % revisionA[:8], "%s (ms)" % revisionB[:8], "speedup", "memory A", "memory B"))
+    for name, resultA in resultsA["cases"].items():
+        resultB = resultsB["cases"].get(name)
+        if resultB is None or "skipped" in resultA or "skipped" in resultB:
+            stream.write("%-40s skipped\n" % name)
+            continue
+        stream.write("%-40s %12.3f %12.3f %7.2fx %14s %14s\n" % (
+            name, resultA["time"] * 1000, resultB["time"] * 1000, resultA["time"] / resultB["time"],
+            _formatMemory(resultA.get("peakMemory")), _formatMemory(resultB.get("peakMemory"))))
+
+
+def _git(*args, **kwargs):
+    return subprocess.check_output(("git",) + args, cwd=_here, **kwargs).decode("utf-8").strip()
+
+
+def _runRevision(revision, arguments, tempDir):
+    worktree = os.path.join(tempDir, "worktree")
+    _git("worktree", "add", "--detach", worktree, revision, stderr=subprocess.DEVNULL)
+    try:
+        outputPath = os.path.join(tempDir, "results.json")
+        subprocess.check_call(
+            [sys.executable, os.path.abspath(__file__), "--lib", os.path.join(worktree, "Lib"), "--json", outputPath, "--quiet"] + arguments)
+        with open(outputPath) as f:
+            return json.load(f)
+    finally:
+        _git("worktree", "remove", "--force", worktree)
+
+
+def compareRevisions(revisionA, revisionB, arguments):
+    results = []
+    for revision in (revisionA, revisionB):
+        commit = _git("rev-parse", "--verify", revision + "^{commit}")
+        sys.stderr.write("benchmarking %s (%s)\n" % (revision, commit[:8]))
+        tempDir = tempfile.mkdtemp()
+        try:
+            results.append(_runRevision(commit, arguments, tempDir))
+        finally:
+            shutil.rmtree(tempDir, ignore_errors=True)
+    return results
+
+
+def _benchmarkArguments(options):
+    # the arguments passed on to the runs of --compare
+    arguments = [
+        "--glyphs", str(options.glyphs),
+        "--contours", str(options.contours),
+        "--segments", str(options.segments),
+        "--curve-ratio", str(options.curveRatio),
+        "--seed", str(options.seed),
+        "--repeat", str(options.repeat),
+    ]
+    for pattern in options.case or ():
+        arguments += ["--case", pattern]
+    if not options.memory:
+        arguments.append("--no-memory")
+    return arguments
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the fontPens pens and pen tools.")
+    parser.add_argument("--glyphs", type=int, default=200, help="number of glyphs in the synthetic font")
+    parser.add_argument("--contours", type=int, default=2, help="number of contours per glyph")
+    parser.add_argument("--segments", type=int, default=16, help="number of segments per contour")
+    parser.add_argument("--curve-ratio", dest="curveRatio", type=float, default=.5, help="ratio of curve segments")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic font")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed runs, the best one is reported")
+    parser.add_argument("--case", action="append", help="only run the cases matching this pattern, can be repeated")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="don't measure the peak memory")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("REV_A", "REV_B"), help="compare two git revisions")
+    parser.add_argument("--lib", help="benchmark the fontPens package in this folder")
+    parser.add_argument("--quiet", action="store_true", help="don't print the results")
+    options = parser.parse_args(args)
+
+    if options.compare:
+        revisionA, revisionB = options.compare
+        resultsA, resultsB = compareRevisions(revisionA, revisionB, _benchmarkArguments(options))
+        printComparison(revisionA, resultsA, revisionB, resultsB)
+        if options.json:
+            with open(options.json, "w") as f:
+                json.dump({revisionA: resultsA, revisionB: resultsB}, f, indent=2)
+        return
+
+    if options.lib:
+        sys.path.insert(0, os.path.abspath(options.lib))
+    results = runBenchmarks(options)
+    if not options.quiet:
+        printResults(results)
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
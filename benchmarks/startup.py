@@ -0,0 +1,79 @@
+"""
+Benchmark the import time of fontPens in fresh interpreters.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --check
+
+--check fails when importing the package imports fontTools, or takes
+longer than --max-import-time milliseconds, so short lived processes
+only pay for the pens they use.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+
+_here = os.path.dirname(os.path.abspath(__file__))
+
+_statements = [
+    ("import fontPens", "import fontPens"),
+    ("fontPens.FlattenPen", "import fontPens; fontPens.FlattenPen"),
+    ("fontPens.DigestPointPen", "import fontPens; fontPens.DigestPointPen"),
+    ("fontPens.penTools", "import fontPens.penTools"),
+    ("all of fontPens", "import fontPens; [getattr(fontPens, name) for name in fontPens.__all__]"),
+]
+
+_timer = """
+import sys, time
+sys.path.insert(0, %r)
+start = time.perf_counter()
+%s
+duration = time.perf_counter() - start
+print(duration, 'fontTools' in sys.modules)
+"""
+
+
+def timeStatement(statement, lib, repeat):
+    """
+    Return the median time of statement in repeat fresh interpreters,
+    and whether it imported fontTools.
+    """
+    durations = []
+    importsFontTools = False
+    for i in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", _timer % (lib, statement)])
+        duration, fontTools = output.decode("ascii").split()
+        durations.append(float(duration))
+        importsFontTools = fontTools == "True"
+    durations.sort()
+    return durations[len(durations) // 2], importsFontTools
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the import time of fontPens.")
+    parser.add_argument("--lib", default=os.path.join(os.path.dirname(_here), "Lib"), help="the folder containing fontPens")
+    parser.add_argument("--repeat", type=int, default=15, help="number of interpreters per statement, the median is reported")
+    parser.add_argument("--check", action="store_true", help="fail when the package import is too slow")
+    parser.add_argument("--max-import-time", dest="maxImportTime", type=float, default=20, help="in milliseconds, for --check")
+    options = parser.parse_args(args)
+
+    failures = []
+    print("%-30s %12s %10s" % ("statement", "time (ms)", "fontTools"))
+    for name, statement in _statements:
+        duration, importsFontTools = timeStatement(statement, options.lib, options.repeat)
+        print("%-30s %12.2f %10s" % (name, duration * 1000, "yes" if importsFontTools else "no"))
+        if name == "import fontPens":
+            if importsFontTools:
+                failures.append("importing fontPens imports fontTools")
+            if duration * 1000 > options.maxImportTime:
+                failures.append("importing fontPens takes %.2f ms" % (duration * 1000))
+    if options.check and failures:
+        for failure in failures:
+            sys.stderr.write("%s\n" % failure)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Synthetic fonts for the benchmarks, built offline from a seed.
+"""
+from math import cos, pi, sin
+from random import Random
+
+from fontTools.pens.pointPen import SegmentToPointPen
+from fontTools.pens.recordingPen import RecordingPen
+
+
+class SyntheticGlyph(object):
+    """
+    A minimal glyph: a name, a width, and the outline as a segment recording.
+    """
+
+    def __init__(self, name, width, recording):
+        self.name = name
+        self.width = width
+        self.recording = recording
+        self.contourCount = sum(1 for operator, operands in recording if operator == "moveTo")
+        self.pointCount = sum(len(operands) for operator, operands in recording)
+
+    def draw(self, pen):
+        for operator, operands in self.recording:
+            getattr(pen, operator)(*operands)
+
+    def drawPoints(self, pointPen):
+        pen = SegmentToPointPen(pointPen)
+        self.draw(pen)
+
+
+class SyntheticFont(dict):
+    """
+    A dict of glyph names and SyntheticGlyphs, usable as a glyphSet.
+    """
+
+    def __init__(self, glyphs, italicAngle=-10):
+        super(SyntheticFont, self).__init__((glyph.name, glyph) for glyph in glyphs)
+        self.italicAngle = italicAngle
+
+    @property
+    def pointCount(self):
+        return sum(glyph.pointCount for glyph in self.values())
+
+
+def _drawContour(pen, rng, segmentCount, curveRatio, centerX, centerY, radius):
+    # a star shaped contour around the center, so contours are reasonably well formed
+    points = []
+    for i in range(segmentCount):
+        r = radius * rng.uniform(.6, 1.0)
+        angle = 2 * pi * i / segmentCount
+        points.append((angle, r))
+
+    def onCurve(angle, r):
+        return round(centerX + cos(angle) * r), round(centerY + sin(angle) * r)
+
+    first = onCurve(*points[0])
+    pen.moveTo(first)
+    for i in range(1, segmentCount + 1):
+        angle, r = points[i % segmentCount]
+        prevAngle, prevR = points[i - 1]
+        pt = onCurve(angle, r)
+        if rng.random() < curveRatio:
+            step = (angle - prevAngle) if i < segmentCount else (2 * pi - prevAngle)
+            pen.curveTo(
+                onCurve(prevAngle + step / 3, prevR * 1.1),
+                onCurve(prevAngle + 2 * step / 3, r * 1.1),
+                pt)
+        elif i < segmentCount:
+            pen.lineTo(pt)
+    pen.closePath()
+
+
+def makeSyntheticFont(glyphCount=100, contoursPerGlyph=2, segmentsPerContour=12, curveRatio=.5, seed=0):
+    """
+    Make a SyntheticFont with glyphCount glyphs of contoursPerGlyph contours,
+    each with segmentsPerContour segments of which about curveRatio are curves.
+    """
+    rng = Random(seed)
+    glyphs = []
+    for glyphIndex in range(glyphCount):
+        recorder = RecordingPen()
+        for contourIndex in range(contoursPerGlyph):
+            radius = 300.0 / (contourIndex + 1)
+            _drawContour(recorder, rng, segmentsPerContour, curveRatio, 350, 350, radius)
+        glyphs.append(SyntheticGlyph("glyph%05d" % glyphIndex, 700, recorder.value))
+    return SyntheticFont(glyphs)